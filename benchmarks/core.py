@@ -7,6 +7,7 @@
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 """Benchmarks for DataLad"""
 
+import logging
 import os
 import sys
 import os.path as osp
@@ -18,6 +19,9 @@ from time import time
 from subprocess import call
 
 from datalad.cmd import Runner
+from datalad.log import log_progress
+from datalad.log import OnlyProgressLog
+from datalad.log import ProgressHandler
 
 from datalad.api import add
 from datalad.api import create
@@ -64,6 +68,24 @@ class startup(SuprocBenchmarks):
     def time_import_api(self):
         call([sys.executable, "-c", "import datalad.api"])
 
+    def time_import_api_command(self):
+        call([sys.executable, "-c", "import datalad.api; datalad.api.status"])
+
+    def time_version(self):
+        call(["datalad", "--version"], env=self.env)
+
+    def time_create_help(self):
+        call(["datalad", "create", "--help"], env=self.env)
+
+    def time_status_help(self):
+        call(["datalad", "status", "--help"], env=self.env)
+
+    def time_save_help(self):
+        call(["datalad", "save", "--help"], env=self.env)
+
+    def time_wtf_help(self):
+        call(["datalad", "wtf", "--help"], env=self.env)
+
 
 class runner(SuprocBenchmarks):
     """Some rudimentary tests to see if there is no major slowdowns from Runner
@@ -137,4 +159,32 @@ class runner(SuprocBenchmarks):
     #                               log_stdout='offline',
     #                               log_stderr='offline')
 
-    # TODO: track the one with in/out, i.e. for those BatchedProcesses
\ No newline at end of file
+    # TODO: track the one with in/out, i.e. for those BatchedProcesses
+
+
+class logprogress(SuprocBenchmarks):
+    """Progress reporting of a loop of 1M iterations with log_progress"""
+
+    params = ['progressbar', 'disabled']
+    param_names = ['logging']
+
+    def setup(self, logging_):
+        self.lgr = logging.getLogger('datalad.benchmarks.logprogress')
+        self.lgr.propagate = False
+        self.lgr.setLevel(
+            logging.INFO if logging_ == 'progressbar' else logging.WARNING)
+        self.handler = ProgressHandler()
+        self.handler.addFilter(OnlyProgressLog())
+        self.lgr.addHandler(self.handler)
+
+    def teardown(self, logging_):
+        self.lgr.removeHandler(self.handler)
+        super(logprogress, self).teardown()
+
+    def time_loop(self, logging_):
+        log_progress(self.lgr.info, 'bmlogprogress', 'Start',
+                     total=1000000, label='Loop', unit=' iterations')
+        for i in range(1000000):
+            log_progress(self.lgr.info, 'bmlogprogress', 'Iteration %i', i,
+                         update=1, increment=True)
+        log_progress(self.lgr.info, 'bmlogprogress', 'Done')
@@ -0,0 +1,149 @@
+# emacs: -*- mode: python; py-indent-offset: 4; tab-width: 4; indent-tabs-mode: nil -*-
+# ex: set sts=4 ts=4 sw=4 noet:
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the datalad package for the
+#   copyright and license terms.
+#
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""Benchmarks of plugins"""
+
+import os
+import os.path as op
+import random
+import subprocess
+import tempfile
+
+from datalad.api import Dataset
+from datalad.support.gitrepo import GitRepo
+from datalad.utils import get_tempfile_kwargs
+
+from .common import SuprocBenchmarks
+
+try:
+    from datalad.support.compression import BlockCompressor
+except ImportError:
+    # older versions compress with a single thread within tarfile
+    BlockCompressor = None
+
+
+def _get_synthetic_data(size, seed=0):
+    """Return moderately compressible data"""
+    rng = random.Random(seed)
+    words = [
+        bytes(bytearray(rng.randint(97, 122) for _ in range(rng.randint(2, 9))))
+        for _ in range(1000)]
+    out = bytearray()
+    while len(out) < size:
+        out += b' '.join(rng.choice(words) for _ in range(1000))
+    return bytes(out[:size])
+
+
+def _make_synthetic_annex_branch(path, nkeys, ncommits, seed=0):
+    """Create a repository with a git-annex branch resembling git-annex's
+
+    The branch has `ncommits` commits, each modifying the location logs of
+    a tenth of `nkeys` keys.  No git-annex is needed to create it.
+    """
+    rng = random.Random(seed)
+    repo = GitRepo(path, create=True)
+    keys = ['SHA256E-s%d--%064x.dat' % (rng.randint(1, 10 ** 9),
+                                          rng.getrandbits(256))
+            for _ in range(nkeys)]
+    logs = {}
+    stream = []
+    ts = 1500000000
+    for commit in range(ncommits):
+        changes = []
+        if commit == 0:
+            uuid_log = b'5c4a7b52 here timestamp=%d.0s\n' % ts
+            changes.append(b'M 100644 inline uuid.log\ndata %d\n%s\n'
+                           % (len(uuid_log), uuid_log))
+        for key in rng.sample(keys, max(1, nkeys // 10)):
+            ts += 1
+            logs[key] = logs.get(key, '') + '%d.%09ds %d %s\n' % (
+                ts, rng.randint(0, 10 ** 9 - 1), rng.randint(0, 1),
+                '5c4a7b52-b9a2-4e2a-9cf0-0e9d3b1e3f%02x' % rng.randint(0, 3))
+            data = logs[key].encode()
+            changes.append(
+                b'M 100644 inline %s/%s/%s.log\ndata %d\n%s\n'
+                % (key[:3].encode(), key[3:6].encode(), key.encode(),
+                   len(data), data))
+        # commits to the same branch within a stream are chained
+        stream.append(
+            b'commit refs/heads/git-annex\n'
+            b'committer a <a@b> %d +0000\ndata 6\nupdate\n' % ts)
+        stream.extend(changes)
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=path,
+                   input=b''.join(stream), check=True)
+    return repo
+
+
+class export_archive(SuprocBenchmarks):
+    """Throughput of exporting a dataset of 64 files of 1MB"""
+
+    params = [['gz', 'bz2', 'xz', ''], [1, 4]]
+    param_names = ['compression', 'jobs']
+    timeout = 600
+
+    def setup(self, compression, jobs):
+        tempdir = tempfile.mkdtemp(**get_tempfile_kwargs({}, prefix="bm"))
+        self.remove_paths.append(tempdir)
+        self.ds = Dataset(op.join(tempdir, 'ds')).create(no_annex=True)
+        for i in range(64):
+            with open(op.join(self.ds.path, 'file%d' % i), 'wb') as f:
+                f.write(_get_synthetic_data(1024 ** 2, seed=i))
+        self.ds.save()
+        self.outname = op.join(tempdir, 'out')
+
+    def time_export_archive(self, compression, jobs):
+        self.ds.export_archive(
+            filename=self.outname, compression=compression, jobs=jobs)
+
+
+class block_compressor(SuprocBenchmarks):
+    """Throughput of compressing 64MB of data"""
+
+    params = [['gz', 'bz2', 'xz'], [1, 4]]
+    param_names = ['compression', 'jobs']
+    timeout = 600
+
+    def setup(self, compression, jobs):
+        if BlockCompressor is None:
+            raise NotImplementedError
+        self.data = _get_synthetic_data(64 * 1024 ** 2)
+
+    def time_compress(self, compression, jobs):
+        with open(os.devnull, 'wb') as f, \
+                BlockCompressor(f, compression, jobs=jobs) as cf:
+            for i in range(0, len(self.data), 1024 ** 2):
+                cf.write(self.data[i:i + 1024 ** 2])
+
+
+class check_dates(SuprocBenchmarks):
+    """Searching dates in a git-annex branch of 20 commits"""
+
+    params = [[1000, 10000], [None, 4]]
+    param_names = ['nkeys', 'jobs']
+    timeout = 600
+
+    def setup_cache(self):
+        repos = {}
+        for nkeys in self.params[0]:
+            path = tempfile.mkdtemp(**get_tempfile_kwargs({}, prefix="bm"))
+            _make_synthetic_annex_branch(path, nkeys, 20)
+            repos[nkeys] = path
+        return repos
+
+    def setup(self, repos, nkeys, jobs):
+        self.repo = GitRepo(repos[nkeys])
+
+    def time_check_dates_all(self, repos, nkeys, jobs):
+        from datalad.support.repodates import check_dates
+        kwargs = {} if jobs is None else dict(jobs=jobs)
+        check_dates(self.repo, 0, annex=True, tags=False, **kwargs)
+
+    def time_check_dates_tree(self, repos, nkeys, jobs):
+        from datalad.support.repodates import check_dates
+        kwargs = {} if jobs is None else dict(jobs=jobs)
+        check_dates(self.repo, 0, annex="tree", tags=False, **kwargs)
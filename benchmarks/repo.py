@@ -7,6 +7,23 @@
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 """Benchmarks of the basic repos (Git/Annex) functionality"""
 
+import json
+import os
+import os.path as op
+import subprocess
+import tempfile
+
+from datalad.api import (
+    create,
+    Dataset,
+)
+from datalad.support.annexrepo import (
+    AnnexRepo,
+    ProcessAnnexProgressIndicators,
+)
+from datalad.support.gitrepo import GitRepo
+from datalad.utils import get_tempfile_kwargs
+
 from .common import (
     SampleSuperDatasetBenchmarks,
     SuprocBenchmarks,
@@ -21,3 +38,134 @@ class gitrepo(SampleSuperDatasetBenchmarks):
     def time_get_content_info(self):
         info = self.repo.get_content_info()
         assert isinstance(info, dict)   # just so we do not end up with a generator
+
+
+def _make_synthetic_worktree(path, nfiles, nchanged=3):
+    """Create a repository with `nfiles` committed files in 100 directories
+
+    The first `nchanged` files are modified afterwards.
+    """
+    repo = GitRepo(path, create=True)
+    files = []
+    for i in range(nfiles):
+        d = op.join(path, 'd%02d' % (i % 100))
+        if not op.exists(d):
+            os.mkdir(d)
+        f = op.join(d, 'f%07d' % i)
+        with open(f, 'w') as fp:
+            fp.write('%d\n' % i)
+        files.append(f)
+    subprocess.run(['git', 'add', '.'], cwd=path, check=True)
+    subprocess.run(['git', 'commit', '-q', '-m', 'files'], cwd=path, check=True)
+    for f in files[:nchanged]:
+        with open(f, 'a') as fp:
+            fp.write('changed\n')
+    return repo
+
+
+class gitrepo_diffstatus(SuprocBenchmarks):
+    """Status of a worktree with a few changes among many files"""
+
+    params = [10000, 100000]
+    param_names = ['nfiles']
+    timeout = 600
+
+    def setup_cache(self):
+        repos = {}
+        for nfiles in self.params:
+            path = tempfile.mkdtemp(**get_tempfile_kwargs({}, prefix="bm"))
+            _make_synthetic_worktree(path, nfiles)
+            repos[nfiles] = path
+        return repos
+
+    def setup(self, repos, nfiles):
+        self.repo = GitRepo(repos[nfiles])
+
+    def time_diffstatus_full(self, repos, nfiles):
+        self.repo.diffstatus('HEAD', None)
+
+    def time_diffstatus_changes(self, repos, nfiles):
+        self.repo.diffstatus('HEAD', None, report_clean=False)
+
+
+class annexrepo_add_sharded(SuprocBenchmarks):
+    """Adding files of mixed sizes to an annex on a tmpfs"""
+
+    params = [1, 2, 4]
+    param_names = ['shards']
+    number = 1
+    timeout = 600
+
+    def setup(self, shards):
+        # tmpfs, so the timing reflects hashing and not the disk
+        tmpfs = '/dev/shm' if op.isdir('/dev/shm') else None
+        path = tempfile.mkdtemp(dir=tmpfs, prefix='bm')
+        self.remove_paths.append(path)
+        self.repo = AnnexRepo(path, create=True)
+        self.files = []
+        for i, size in enumerate([64, 32, 16, 8] + [1] * 8):
+            f = 'f%02d' % i
+            with open(op.join(path, f), 'wb') as fp:
+                fp.write(os.urandom(size * 1024 ** 2))
+            self.files.append(f)
+
+    def time_add(self, shards):
+        for r in self.repo._iter_annex_add(
+                self.files, ['--include-dotfiles'], shards=shards):
+            assert r['success']
+
+
+class annexrepo_progress(SuprocBenchmarks):
+    """Processing of the --json-progress output of parallel downloads"""
+
+    def setup(self):
+        # 8 parallel downloads of 1000 keys, with 50 updates each, in the
+        # compact format of git-annex
+        size = 1024 ** 2
+        keys = ['MD5E-s%d--%032x.dat' % (size, i) for i in range(1000)]
+        self.expected = {k: size for k in keys}
+        self.lines = []
+        for i in range(0, len(keys), 8):
+            batch = keys[i:i + 8]
+            for step in range(1, 51):
+                for k in batch:
+                    self.lines.append(json.dumps({
+                        'byte-progress': size * step // 50,
+                        'action': {'command': 'get', 'note': 'from web...',
+                                   'key': k, 'file': k},
+                        'percent-progress': '%d%%' % (step * 2)},
+                        separators=(',', ':')))
+            for k in batch:
+                self.lines.append(json.dumps({
+                    'command': 'get', 'note': 'from web...', 'success': True,
+                    'key': k, 'file': k}, separators=(',', ':')))
+
+    def time_progress(self):
+        proc = ProcessAnnexProgressIndicators(expected=self.expected)
+        for line in self.lines:
+            proc(line)
+        proc.finish()
+
+
+class datasetrepo(SuprocBenchmarks):
+    """Benchmarks of (repeated) `Dataset.repo` access"""
+
+    params = ['git', 'annex']
+    param_names = ['repo_type']
+
+    def setup(self, repo_type):
+        path = tempfile.mkdtemp(**get_tempfile_kwargs({}, prefix='bm'))
+        self.remove_paths.append(path)
+        self.ds = create(path, no_annex=repo_type == 'git')
+        # the first access does the full detection
+        assert self.ds.repo is not None
+
+    def time_repo_access(self, repo_type):
+        ds = self.ds
+        for _ in range(1000):
+            ds.repo
+
+    def time_repo_access_new_dataset(self, repo_type):
+        # as done by commands which get a path and not a Dataset instance
+        for _ in range(100):
+            Dataset(self.ds.path).repo
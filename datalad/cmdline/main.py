@@ -282,6 +282,18 @@ def setup_parser(
     # --help output before we setup --help for each command
     helpers.parser_add_common_opt(parser, 'help')
 
+    help_only = not return_subparsers and need_single_subparser is False \
+        and ('--help' in cmdlineargs or '--help-np' in cmdlineargs)
+    registered = {}
+    if help_only:
+        # only the command summary is needed, take it from the registry
+        # instead of importing every single interface
+        from ..interface.registry import get_command_registry
+        registered = {
+            (group_name, cmd['cmd_name']): cmd['cmd_description']
+            for group_name, _, commands in get_command_registry()
+            for cmd in commands}
+
     grp_short_descriptions = defaultdict(list)
     # create subparser, use module suffix as cmd name
     subparsers = parser.add_subparsers()
@@ -291,6 +303,13 @@ def setup_parser(
             cmd_name = get_cmdline_command_name(_intfspec)
             if need_single_subparser and cmd_name != need_single_subparser:
                 continue
+            if (group_name, cmd_name) in registered:
+                # still needs a subparser to be listed in the usage
+                parts[cmd_name] = subparsers.add_parser(
+                    cmd_name, add_help=False)
+                grp_short_descriptions[group_name].append(
+                    (cmd_name, registered[(group_name, cmd_name)]))
+                continue
             _intf = load_interface(_intfspec)
             if _intf is None:
                 # TODO(yoh):  add doc why we could skip this one... makes this
@@ -42,6 +42,7 @@ DATALAD_SPECIAL_REMOTES_UUIDS = {
 }
 
 ARCHIVES_TEMP_DIR = join(DATALAD_GIT_DIR, 'tmp', 'archives')
+ARCHIVES_INDEX_DIR = join(DATALAD_GIT_DIR, 'archives-index')
 ANNEX_TEMP_DIR = join('.git', 'annex', 'tmp')
 ANNEX_TRANSFER_DIR = join('.git', 'annex', 'transfer')
 
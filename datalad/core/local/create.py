@@ -300,6 +300,8 @@ class Create(Interface):
             initopts = {'_from_cmdline_': initopts}
 
         # create and configure desired repository
+        # any previously detected repository is no longer valid
+        tbds._invalidate_repo_cache()
         if no_annex:
             lgr.info("Creating a new git repo at %s", tbds.path)
             tbrepo = GitRepo(
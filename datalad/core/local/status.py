@@ -48,6 +48,7 @@ from datalad.distribution.dataset import (
     rev_resolve_path,
     path_under_rev_dataset,
     rev_get_dataset_root,
+    rev_get_dataset_roots,
 )
 
 import datalad.utils as ut
@@ -277,14 +278,16 @@ class Status(Interface):
 
         paths_by_ds = OrderedDict()
         if path:
+            # it is important to capture the exact form of the
+            # given path argument, before any normalization happens
+            # for further decision logic below
+            paths = [(text_type(p), rev_resolve_path(p, dataset))
+                     for p in sorted(assure_list(path))]
+            # determine all roots at once, sharing directory lookups
+            roots = rev_get_dataset_roots(text_type(p) for _, p in paths)
             # sort any path argument into the respective subdatasets
-            for p in sorted(assure_list(path)):
-                # it is important to capture the exact form of the
-                # given path argument, before any normalization happens
-                # for further decision logic below
-                orig_path = text_type(p)
-                p = rev_resolve_path(p, dataset)
-                root = rev_get_dataset_root(text_type(p))
+            for orig_path, p in paths:
+                root = roots[text_type(p)]
                 if root is None:
                     # no root, not possibly underneath the refds
                     yield dict(
@@ -15,19 +15,20 @@ from .distribution.dataset import Dataset
 def _generate_func_api():
     """Auto detect all available interfaces and generate a function-based
        API from them
-    """
-    from importlib import import_module
 
+    Interfaces are only imported once their command is first accessed.
+    """
     from .interface.base import get_interface_groups
     from .interface.base import get_api_name
+    from .interface.registry import setup_api
+
+    def get_specs():
+        return [
+            (get_api_name(intfspec), intfspec)
+            for grp_name, grp_descr, interfaces in get_interface_groups()
+            for intfspec in interfaces]
 
-    for grp_name, grp_descr, interfaces in get_interface_groups():
-        for intfspec in interfaces:
-            # turn the interface spec into an instance
-            mod = import_module(intfspec[0], package='datalad')
-            intf = getattr(mod, intfspec[1])
-            api_name = get_api_name(intfspec)
-            globals()[api_name] = intf.__call__
+    setup_api(globals(), get_specs)
 
 
 # Invoke above helper
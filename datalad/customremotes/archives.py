@@ -16,6 +16,9 @@ import os.path as op
 from collections import OrderedDict
 from operator import itemgetter
 import shutil
+import threading
+
+from six.moves.urllib.parse import unquote as urlunquote
 
 import logging
 lgr = logging.getLogger('datalad.customremotes.archive')
@@ -78,6 +81,8 @@ class ArchiveAnnexCustomRemote(AnnexCustomRemote):
 
     AVAILABILITY = "local"
     COST = 500
+    # concurrent jobs are serialized per archive
+    SUPPORTS_ASYNC = True
 
     def __init__(self, persistent_cache=True, **kwargs):
         super(ArchiveAnnexCustomRemote, self).__init__(**kwargs)
@@ -87,6 +92,10 @@ class ArchiveAnnexCustomRemote(AnnexCustomRemote):
 
         self._last_url = None  # for heuristic to choose among multiple URLs
         self._cache = ArchivesCache(self.path, persistent=persistent_cache)
+        # concurrent jobs must not fetch or extract the same archive at once.
+        # Inter-process locks do not help since they are owned by the process
+        self._archive_locks = {}
+        self._archive_locks_lock = threading.Lock()
 
     def stop(self, *args):
         """Stop communication with annex"""
@@ -126,6 +135,11 @@ class ArchiveAnnexCustomRemote(AnnexCustomRemote):
     def cache(self):
         return self._cache
 
+    def _get_archive_lock(self, akey):
+        """Return a lock to hold while fetching or extracting the archive"""
+        with self._archive_locks_lock:
+            return self._archive_locks.setdefault(akey, threading.Lock())
+
     def _parse_url(self, url):
         """Parse url and return archive key, file within archive and additional attributes (such as size)
         """
@@ -252,6 +266,11 @@ class ArchiveAnnexCustomRemote(AnnexCustomRemote):
         # TODO: this would throw exception if not present, so this statement is kinda bogus
         akey_path = self.get_contentlocation(akey, absolute=True)
         if akey_path:
+            # a stored index knows sizes without extracting anything
+            if size is None:
+                index = self.cache.get_index(akey)
+                if index is not None and urlunquote(afile) in index:
+                    size = index[urlunquote(afile)]['size']
             # Extract via cache only if size is not yet known
             if size is None:
                 # if for testing we want to force getting the archive extracted
@@ -298,12 +317,29 @@ class ArchiveAnnexCustomRemote(AnnexCustomRemote):
         # Otherwise it is unrealistic to even require to recompute key if we
         # knew the backend etc
         lgr.debug("VERIFYING key %s" % key)
-        # The same content could be available from multiple locations within the same
-        # archive, so let's not ask it twice since here we don't care about "afile"
-        for akey, _ in self._gen_akey_afiles(key, unique_akeys=True):
-            if self.get_contentlocation(akey) or self.repo.is_available(akey, batch=True, key=True):
-                self.send("CHECKPRESENT-SUCCESS", key)
-                return
+        key_size = self.repo.get_size_from_key(key)
+        checked_akeys = set()
+        for akey, afile in self._gen_akey_afiles(key, unique_akeys=False):
+            # the same content could be available from multiple locations
+            # within the same archive, so let's not ask about it twice
+            if akey in checked_akeys:
+                continue
+            # no need to even get the archive if its stored index tells that
+            # it has no such file
+            index = self.cache.get_index(akey)
+            if index is not None:
+                afile = urlunquote(afile)
+                if afile not in index or (
+                        key_size is not None and
+                        index[afile]['size'] != key_size):
+                    continue
+            checked_akeys.add(akey)
+            if not self.get_contentlocation(akey):
+                with self._repo_lock:
+                    if not self.repo.is_available(akey, batch=True, key=True):
+                        continue
+            self.send("CHECKPRESENT-SUCCESS", key)
+            return
         self.send("CHECKPRESENT-UNKNOWN", key)
 
     def req_REMOVE(self, key):
@@ -365,33 +401,8 @@ class ArchiveAnnexCustomRemote(AnnexCustomRemote):
                 continue
             akeys_tried.append(akey)
             try:
-                with lock_if_check_fails(
-                    check=(self.get_contentlocation, (akey,)),
-                    lock_path=(lambda k: opj(self.repo.path, '.git', 'datalad-archives-%s' % k), (akey,)),
-                    operation="annex-get"
-                ) as (akey_fpath, lock):
-                    if lock:
-                        assert not akey_fpath
-                        self._annex_get_archive_by_key(akey)
-                        akey_fpath = self.get_contentlocation(akey)
-
-                if not akey_fpath:
-                    raise RuntimeError(
-                        "We were reported to fetch it alright but now can't "
-                        "get its location.  Check logic"
-                )
-
-                akey_path = opj(self.repo.path, akey_fpath)
-                assert exists(akey_path), "Key file %s is not present" % akey_path
-
-                # Extract that bloody file from the bloody archive
-                # TODO: implement/use caching, for now a simple one
-                #  actually patool doesn't support extraction of a single file
-                #  https://github.com/wummel/patool/issues/20
-                # so
-                pwd = getpwd()
-                lgr.debug(u"Getting file {afile} from {akey_path} while PWD={pwd}".format(**locals()))
-                apath = self.cache[akey_path].get_extracted_file(afile)
+                with self._get_archive_lock(akey):
+                    apath = self._get_extracted_file(akey, afile)
                 link_file_load(apath, path)
                 self.send('TRANSFER-SUCCESS', cmd, key)
                 return
@@ -407,6 +418,35 @@ class ArchiveAnnexCustomRemote(AnnexCustomRemote):
             "Tried: {akeys_tried}".format(**locals())
         )
 
+    def _get_extracted_file(self, akey, afile):
+        """Fetch the archive if needed and return path to the extracted file"""
+        with lock_if_check_fails(
+            check=(self.get_contentlocation, (akey,)),
+            lock_path=(lambda k: opj(self.repo.path, '.git', 'datalad-archives-%s' % k), (akey,)),
+            operation="annex-get"
+        ) as (akey_fpath, lock):
+            if lock:
+                assert not akey_fpath
+                self._annex_get_archive_by_key(akey)
+                akey_fpath = self.get_contentlocation(akey)
+
+        if not akey_fpath:
+            raise RuntimeError(
+                "We were reported to fetch it alright but now can't "
+                "get its location.  Check logic"
+        )
+
+        akey_path = opj(self.repo.path, akey_fpath)
+        assert exists(akey_path), "Key file %s is not present" % akey_path
+
+        # Extract that bloody file from the bloody archive. Members of tar
+        # and zip archives are extracted on their own, through the archive's
+        # index (kept by its key), anything else is extracted entirely
+        pwd = getpwd()
+        lgr.debug(u"Getting file {afile} from {akey_path} while PWD={pwd}".format(**locals()))
+        earchive = self.cache.get_archive(akey_path, key=akey)
+        return earchive.get_extracted_file(afile)
+
     def _annex_get_archive_by_key(self, akey):
         # TODO: make it more stringent?
         # Command could have fail to run if key was not present locally yet
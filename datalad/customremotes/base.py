@@ -16,10 +16,12 @@ import inspect
 import errno
 import os
 import sys
+import threading
 
 from ..support.path import exists, join as opj, realpath, dirname, lexists
 
 from six.moves import range
+from six.moves.queue import Queue
 from six.moves.urllib.parse import urlparse
 
 import logging
@@ -199,6 +201,10 @@ class AnnexCustomRemote(object):
 
     COST = DEFAULT_COST
     AVAILABILITY = DEFAULT_AVAILABILITY
+    # Whether requests could be processed concurrently, i.e. if ASYNC
+    # protocol extension could be announced for git-annex to run multiple
+    # jobs (e.g. TRANSFERs for `get -J`) through a single process
+    SUPPORTS_ASYNC = False
 
     def __init__(self, path=None, cost=None, fin=None, fout=None):  # , availability=DEFAULT_AVAILABILITY):
         """
@@ -245,6 +251,16 @@ class AnnexCustomRemote(object):
 
         self._contentlocations = DictCache(size_limit=100)  # TODO: config ?
 
+        # ASYNC protocol extension: per job queues of incoming messages and
+        # threads processing them
+        self._async = False
+        self._jobs = {}
+        # job of the current thread
+        self._job = threading.local()
+        self._send_lock = threading.Lock()
+        # batched annex processes must not be used by multiple jobs at once
+        self._repo_lock = threading.Lock()
+
         # instruct annex backend UI to use this remote
         if ui.backend == 'annex':
             ui.set_specialremote(self)
@@ -290,17 +306,18 @@ class AnnexCustomRemote(object):
         This is a wrapper around AnnexRepo.get_contentlocation which provides caching
         of the result (we are asking the location for the same archive key often)
         """
-        if key not in self._contentlocations:
-            fpath = self.repo.get_contentlocation(key, batch=True)
-            if fpath:  # shouldn't store empty ones
-                self._contentlocations[key] = fpath
-        else:
-            fpath = self._contentlocations[key]
-            # but verify that it exists
-            if verify_exists and not lexists(opj(self.path, fpath)):
-                # prune from cache
-                del self._contentlocations[key]
-                fpath = ''
+        with self._repo_lock:
+            if key not in self._contentlocations:
+                fpath = self.repo.get_contentlocation(key, batch=True)
+                if fpath:  # shouldn't store empty ones
+                    self._contentlocations[key] = fpath
+            else:
+                fpath = self._contentlocations[key]
+                # but verify that it exists
+                if verify_exists and not lexists(opj(self.path, fpath)):
+                    # prune from cache
+                    del self._contentlocations[key]
+                    fpath = ''
 
         if absolute and fpath:
             return opj(self.path, fpath)
@@ -323,12 +340,16 @@ class AnnexCustomRemote(object):
             lgr.debug("We are not yet in the loop, thus should not send to annex"
                       " anything.  Got: %s" % msg.encode())
             return
+        job = getattr(self._job, 'id', None)
+        if job is not None:
+            msg = "J %s %s" % (job, msg)
         try:
             self.heavydebug("Sending %r" % msg)
-            self.fout.write(msg + "\n")  # .encode())
-            self.fout.flush()
-            if self._protocol is not None:
-                self._protocol += "send %s" % msg
+            with self._send_lock:
+                self.fout.write(msg + "\n")  # .encode())
+                self.fout.flush()
+                if self._protocol is not None:
+                    self._protocol += "send %s" % msg
         except IOError as exc:
             lgr.debug("Failed to send due to %s" % str(exc))
             if exc.errno == errno.EPIPE:
@@ -357,9 +378,18 @@ class AnnexCustomRemote(object):
         # TODO: should we strip or should we not? verify how annex would deal
         # with filenames starting/ending with spaces - encoded?
         # Split right away
-        l = self.fin.readline().rstrip(os.linesep)
-        if self._protocol is not None:
-            self._protocol += "recv %s" % l
+        queue = getattr(self._job, 'queue', None)
+        if queue is None:
+            l = self.fin.readline().rstrip(os.linesep)
+            if self._protocol is not None:
+                self._protocol += "recv %s" % l
+        else:
+            # message for this job was already read by the main loop
+            l = queue.get()
+            if l is None:
+                # not stop(), which is for the entire remote to do
+                raise AnnexRemoteQuit(
+                    "No more messages for job %s" % self._job.id)
         msg = l.split(None, n)
         if req and ((not msg) or (req != msg[0])):
             # verify correct response was given
@@ -420,39 +450,94 @@ class AnnexCustomRemote(object):
 
         self.send("VERSION", SUPPORTED_PROTOCOL)
 
-        while True:
-            l = self.read(n=1)
+        try:
+            while True:
+                l = self.read(n=1)
+
+                if l is not None and not l:
+                    # empty line: exit
+                    self.stop()
+                    return
 
-            if l is not None and not l:
-                # empty line: exit
-                self.stop()
-                return
-
-            req, req_load = l[0], l[1:]
-            method = getattr(self, "req_%s" % req, None)
-            if not method:
-                self.send_unsupported(
-                    "We have no support for %s request, part of %s response"
-                    % (req, l)
-                )
-                continue
+                if self._async and l[0] == 'J' and len(l) > 1:
+                    # "J <job> <message>" of one of concurrent jobs
+                    job_msg = l[1].split(None, 1)
+                    self._queue_job_message(*job_msg)
+                    continue
 
-            req_nargs = self._req_nargs[req]
-            if req_load and req_nargs > 1:
-                assert len(req_load) == 1, "Could be only one due to n=1"
-                # but now we need to slice it according to the respective req
-                # We assume that at least it shouldn't start with a space
-                # since str.split would get rid of it as well, and then we should
-                # have used re.split(" ", ...)
-                req_load = req_load[0].split(None, req_nargs - 1)
+                self._process_request(l)
+        finally:
+            self._finish_jobs()
 
-            try:
-                method(*req_load)
-            except Exception as e:
-                self.error("Problem processing %r with parameters %r: %r"
-                           % (req, req_load, exc_str(e)))
-                from traceback import format_exc
-                lgr.error("Caught exception detail: %s" % format_exc())
+    def _process_request(self, l):
+        """Process a single request (as split by read) from git-annex
+        """
+        req, req_load = l[0], l[1:]
+        method = getattr(self, "req_%s" % req, None)
+        if not method:
+            self.send_unsupported(
+                "We have no support for %s request, part of %s response"
+                % (req, l)
+            )
+            return
+
+        req_nargs = self._req_nargs[req]
+        if req_load and req_nargs > 1:
+            assert len(req_load) == 1, "Could be only one due to n=1"
+            # but now we need to slice it according to the respective req
+            # We assume that at least it shouldn't start with a space
+            # since str.split would get rid of it as well, and then we should
+            # have used re.split(" ", ...)
+            req_load = req_load[0].split(None, req_nargs - 1)
+
+        try:
+            method(*req_load)
+        except AnnexRemoteQuit:
+            raise
+        except Exception as e:
+            self.error("Problem processing %r with parameters %r: %r"
+                       % (req, req_load, exc_str(e)))
+            from traceback import format_exc
+            lgr.error("Caught exception detail: %s" % format_exc())
+
+    def _queue_job_message(self, job, msg=''):
+        """Pass a message to the thread of the job, starting it if needed
+
+        Messages of a single job are strictly sequential, so its thread
+        receives requests and replies to its own requests in order.
+        """
+        if job not in self._jobs:
+            queue = Queue()
+            thread = threading.Thread(
+                target=self._job_loop, args=(job, queue),
+                name="annex-remote-job-%s" % job)
+            thread.daemon = True
+            self._jobs[job] = (queue, thread)
+            thread.start()
+        self._jobs[job][0].put(msg)
+
+    def _job_loop(self, job, queue):
+        self._job.id = job
+        self._job.queue = queue
+        try:
+            while True:
+                msg = queue.get()
+                if msg is None:
+                    return
+                if not msg:
+                    self.send_unsupported("Empty request for job %s" % job)
+                    continue
+                self._process_request(msg.split(None, 1))
+        except AnnexRemoteQuit:
+            pass
+
+    def _finish_jobs(self):
+        """Let all job threads finish their current requests and exit"""
+        for queue, thread in self._jobs.values():
+            queue.put(None)
+        for queue, thread in self._jobs.values():
+            thread.join()
+        self._jobs = {}
 
     def req_INITREMOTE(self, *args):
         """Initialize this remote. Provides high level abstraction.
@@ -484,6 +569,23 @@ class AnnexCustomRemote(object):
         self.debug("Encodings: filesystem %s, default %s"
                    % (sys.getfilesystemencoding(), sys.getdefaultencoding()))
 
+    def req_EXTENSIONS(self, extensions=''):
+        """Negotiate protocol extensions offered by git-annex
+
+        ASYNC is accepted if this remote supports concurrent processing of
+        requests, and is enabled via datalad.customremotes.async
+        """
+        from datalad import cfg
+        offered = extensions.split()
+        accepted = []
+        if 'INFO' in offered:
+            accepted.append('INFO')
+        if 'ASYNC' in offered and self.SUPPORTS_ASYNC \
+                and cfg.obtain('datalad.customremotes.async'):
+            accepted.append('ASYNC')
+            self._async = True
+        self.send('EXTENSIONS', *accepted)
+
     def req_EXPORTSUPPORTED(self):
         self.send(
             'EXPORTSUPPORTED-SUCCESS'
@@ -31,6 +31,8 @@ class DataladAnnexCustomRemote(AnnexCustomRemote):
     SUPPORTED_SCHEMES = ('http', 'https', 's3')
 
     AVAILABILITY = "global"
+    # downloaders (and their sessions and credentials) are shared by the jobs
+    SUPPORTS_ASYNC = True
 
     def __init__(self, **kwargs):
         super(DataladAnnexCustomRemote, self).__init__(**kwargs)
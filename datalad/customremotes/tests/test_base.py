@@ -9,12 +9,15 @@
 """Tests for the base of our custom remotes"""
 
 
+import os
+import threading
 from os.path import isabs
 
 from datalad.tests.utils import with_tree
 from datalad.support.annexrepo import AnnexRepo
 
 from ..base import AnnexCustomRemote, DEFAULT_AVAILABILITY, DEFAULT_COST
+from datalad.tests.utils import assert_false
 from datalad.tests.utils import eq_
 
 @with_tree(tree={'file.dat': ''})
@@ -113,6 +116,9 @@ BASE_INTERACTION_SCENARIOS = [
     [  # some unknown option
         ('FANCYNEWOPTION', 'UNSUPPORTED-REQUEST'),
     ],
+    [  # ASYNC is not supported by default
+        ('EXTENSIONS INFO ASYNC', 'EXTENSIONS INFO'),
+    ],
     [
         # get the COST etc for , and make sure we do not
         # fail right on unsupported
@@ -152,3 +158,63 @@ def test_interactions(tdir):
     ]:
         check_interaction_scenario(AnnexCustomRemote, tdir, scenario)
 
+
+
+class AsyncRemote(AnnexCustomRemote):
+    """Remote which needs two transfers to run concurrently to succeed"""
+
+    SUPPORTS_ASYNC = True
+
+    def __init__(self, **kwargs):
+        super(AsyncRemote, self).__init__(**kwargs)
+        self.second_started = threading.Event()
+
+    def _transfer(self, cmd, key, file):
+        # a request to annex within a job
+        dirhash = self.get_DIRHASH(key)
+        if key == 'key1':
+            # would time out if transfers are processed one at a time
+            if not self.second_started.wait(10):
+                raise RuntimeError("transfer of key2 did not start")
+        else:
+            self.second_started.set()
+        self.send('TRANSFER-SUCCESS', cmd, key, dirhash)
+
+
+@with_tree(tree={'file.dat': ''})
+def test_async_interactions(tdir):
+    AnnexRepo(tdir, create=True, init=True)
+    # pipes to drive the protocol as git-annex would do
+    remote_in, annex_out = os.pipe()
+    annex_in, remote_out = os.pipe()
+    annex_out, annex_in = os.fdopen(annex_out, 'w'), os.fdopen(annex_in)
+    cr = AsyncRemote(
+        path=tdir, fin=os.fdopen(remote_in), fout=os.fdopen(remote_out, 'w'))
+    remote = threading.Thread(target=cr.main)
+    remote.start()
+
+    def send(msg):
+        annex_out.write(msg + '\n')
+        annex_out.flush()
+
+    def recv():
+        return annex_in.readline().rstrip('\n')
+
+    eq_(recv(), 'VERSION 1')
+    send('EXTENSIONS INFO ASYNC')
+    eq_(recv(), 'EXTENSIONS INFO ASYNC')
+    send('J 1 TRANSFER RETRIEVE key1 file1')
+    eq_(recv(), 'J 1 DIRHASH key1')
+    send('J 1 VALUE aa/bb')
+    send('J 2 TRANSFER RETRIEVE key2 file2')
+    eq_(recv(), 'J 2 DIRHASH key2')
+    send('J 2 VALUE cc/dd')
+    eq_({recv(), recv()},
+        {'J 1 TRANSFER-SUCCESS RETRIEVE key1 aa/bb',
+         'J 2 TRANSFER-SUCCESS RETRIEVE key2 cc/dd'})
+    # job numbers could be reused for subsequent requests
+    send('J 2 GETCOST')
+    eq_(recv(), 'J 2 COST %d' % DEFAULT_COST)
+    annex_out.close()
+    remote.join(10)
+    assert_false(remote.is_alive())
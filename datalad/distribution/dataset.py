@@ -12,6 +12,7 @@
 import logging
 import os
 import os.path as op
+from collections import OrderedDict
 from os.path import curdir
 from os.path import exists
 from os.path import join as opj
@@ -47,6 +48,7 @@ import datalad.utils as ut
 from datalad.utils import getpwd
 from datalad.utils import optional_args, expandpath, is_explicit_path
 from datalad.utils import get_dataset_root
+from datalad.utils import _get_containing_dataset_root
 from datalad.utils import dlabspath
 from datalad.utils import Path
 from datalad.utils import PurePath
@@ -57,6 +59,35 @@ lgr = logging.getLogger('datalad.dataset')
 lgr.log(5, "Importing dataset")
 
 
+def _get_repo_signature(path):
+    """Return a cheap fingerprint of the repository at `path`
+
+    The fingerprint is composed of `stat()` results (device, inode, size,
+    number of links, mtime) of the dataset directory, its .git directory, the local Git config
+    (holding the annex configuration), and the directory of local branches.
+    Initializing an annex, creating the git-annex branch, or replacing the
+    repository alters the fingerprint.
+
+    Returns
+    -------
+    tuple or None
+      None, if no fingerprint could be determined (no repository, or a .git
+      file pointing elsewhere), in which case a full validation is needed.
+    """
+    sig = []
+    for p in (path,
+              opj(path, '.git'),
+              opj(path, '.git', 'config'),
+              opj(path, '.git', 'refs', 'heads')):
+        try:
+            st = os.stat(p)
+        except OSError:
+            return None
+        sig.append(
+            (st.st_dev, st.st_ino, st.st_size, st.st_nlink, st.st_mtime))
+    return tuple(sig)
+
+
 # TODO: use the same piece for resolving paths against Git/AnnexRepo instances
 #       (see normalize_path)
 def resolve_path(path, ds=None):
@@ -177,6 +208,7 @@ class Dataset(object):
             path = text_type(path)
         self._path = path
         self._repo = None
+        self._repo_signature = None
         self._id = None
         self._cfg = None
         self._cfg_bound = None
@@ -231,10 +263,19 @@ class Dataset(object):
         """
         repo = self._repo
         self._repo = None
+        self._repo_signature = None
         if repo:
             # might take care about lingering batched processes etc
             del repo
 
+    def _invalidate_repo_cache(self):
+        """Enforce a full validation of the repository on next `repo` access
+
+        To be called by code that creates, converts or removes the
+        repository of a dataset.
+        """
+        self._repo_signature = None
+
     @property
     def path(self):
         """path to the dataset"""
@@ -248,15 +289,27 @@ class Dataset(object):
         If testing the validity of an instance of GitRepo is guaranteed to be
         really cheap this could also serve as a test whether a repo is present.
 
-        Note, that this property is evaluated every time it is used. If used
-        multiple times within a function it's probably a good idea to store its
-        value in a local variable and use this variable instead.
+        Note, that this property is evaluated every time it is used. However,
+        as long as the repository on the filesystem remains unchanged, only
+        a few `stat()` calls are needed to confirm the validity of a
+        previously detected repository instance.
 
         Returns
         -------
         GitRepo or AnnexRepo
         """
 
+        # Fast path: if nothing changed on the filesystem since the last full
+        # validation (see _get_repo_signature), the instance is still valid,
+        # as long as it is the one registered as flyweight.
+        # Explicit invalidation: _invalidate_repo_cache()
+        signature = _get_repo_signature(self._path)
+        if self._repo is not None and signature is not None and \
+                signature == self._repo_signature and \
+                self._repo is self._repo.__class__._unique_instances.get(
+                    self._repo.path, None):
+            return self._repo
+
         # If we already got a *Repo instance, check whether it's still valid;
         # Note, that this basically does part of the testing that would
         # (implicitly) be done in the loop below again. So, there's still
@@ -280,6 +333,7 @@ class Dataset(object):
                                                 allow_noninitialized=True):
                     # it's still the object registered as flyweight and it's a
                     # valid annex repo
+                    self._repo_signature = signature
                     return self._repo
             elif isinstance(self._repo, GitRepo):
                 # it's supposed to be a plain git
@@ -289,6 +343,7 @@ class Dataset(object):
                         self._repo.is_with_annex():
                     # it's still the object registered as flyweight, it's a
                     # valid git repo and it hasn't turned into an annex
+                    self._repo_signature = signature
                     return self._repo
 
         # Note: Although it looks like the "self._repo = None" assignments
@@ -318,6 +373,7 @@ class Dataset(object):
 
         if not valid:
             self._repo = None
+        self._repo_signature = signature if valid else None
 
         if self._repo is None:
             # Often .repo is requested to 'sense' if anything is installed
@@ -344,9 +400,8 @@ class Dataset(object):
         there may have never been a call to `create` in this branch before
         current commit.
 
-        Note, that this property is evaluated every time it is used. If used
-        multiple times within a function it's probably a good idea to store its
-        value in a local variable and use this variable instead.
+        Note, that this property is evaluated every time it is used, and
+        delegates to `repo` (via `config`).
 
         Returns
         -------
@@ -360,9 +415,9 @@ class Dataset(object):
     def config(self):
         """Get an instance of the parser for the persistent dataset configuration.
 
-        Note, that this property is evaluated every time it is used. If used
-        multiple times within a function it's probably a good idea to store its
-        value in a local variable and use this variable instead.
+        Note, that this property is evaluated every time it is used, and
+        delegates to `repo`. Without a repository, only the user and system
+        configuration is available.
 
         Returns
         -------
@@ -734,20 +789,20 @@ def rev_get_dataset_root(path):
     If none can be found, at a symlink at `path` is pointing to a
     dataset, `path` itself will be reported as the root.
     """
+    return _rev_get_dataset_root(path)
+
+
+def _rev_get_dataset_root(path, cache=None):
+    """Helper of `rev_get_dataset_root()`, see `_get_dataset_root_abs()`
+    for `cache`"""
     suffix = '.git'
     altered = None
     if op.islink(path) or not op.isdir(path):
         altered = path
         path = op.dirname(path)
-    apath = op.abspath(path)
-    # while we can still go up
-    while op.split(apath)[1]:
-        if op.exists(op.join(path, suffix)):
-            return path
-        # new test path in the format we got it
-        path = op.normpath(op.join(path, os.pardir))
-        # no luck, next round
-        apath = op.abspath(path)
+    root = _get_containing_dataset_root(path, cache=cache)
+    if root is not None:
+        return root
     # if we applied dirname() at the top, we give it another go with
     # the actual path, if it was itself a symlink, it could be the
     # top-level dataset itself
@@ -757,4 +812,27 @@ def rev_get_dataset_root(path):
     return None
 
 
+def rev_get_dataset_roots(paths):
+    """Return the roots of existent datasets containing any of the given paths
+
+    This is the batch version of `rev_get_dataset_root()`. Directories
+    visited for any path are cached for the duration of the call, hence
+    lookups for many paths sharing parent directories need only a few
+    `stat()` calls per path.
+
+    Parameters
+    ----------
+    paths : iterable(str)
+
+    Returns
+    -------
+    OrderedDict
+      Each path is mapped to the root of its dataset, in the same form as
+      reported by `rev_get_dataset_root()`, or None.
+    """
+    cache = {}
+    return OrderedDict((p, _rev_get_dataset_root(p, cache=cache))
+                       for p in paths)
+
+
 lgr.log(5, "Done importing dataset")
@@ -617,7 +617,8 @@ class Get(Interface):
                     yield r
                 continue
             respath_by_status = {}
-            for res in ds.repo.get(
+            # results are reported as git-annex obtains the files
+            for res in ds.repo.iter_get(
                     content,
                     options=['--from=%s' % source] if source else [],
                     jobs=jobs):
@@ -251,6 +251,7 @@ class Remove(Interface):
                         # could be an empty dir in case an already uninstalled subdataset
                         # got removed
                         rmdir(ap['path'])
+                        Dataset(ap['path'])._invalidate_repo_cache()
                 else:
                     # anything that is not a dataset can simply be passed on
                     to_reporemove[ap['path']] = ap
@@ -18,6 +18,7 @@ from six import text_type
 
 from ..dataset import Dataset, EnsureDataset, resolve_path, require_dataset
 from ..dataset import rev_resolve_path
+from ..dataset import rev_get_dataset_roots
 from datalad import cfg
 from datalad.api import create
 from datalad.api import get
@@ -172,6 +173,26 @@ def test_repo_cache(path):
     assert_true(isinstance(ds.repo, AnnexRepo))
 
 
+@with_tempfile(mkdir=True)
+def test_repo_cache_signature(path):
+    ds = Dataset(path)
+    GitRepo(path=path, create=True)
+    repo = ds.repo
+    assert_is_not_none(ds._repo_signature)
+    # unchanged repository -> cached validation
+    assert_is(ds.repo, repo)
+    # explicit invalidation enforces a full validation, but yields the
+    # same instance
+    ds._invalidate_repo_cache()
+    assert_is_none(ds._repo_signature)
+    assert_is(ds.repo, repo)
+    assert_is_not_none(ds._repo_signature)
+    # repository gone -> no repo
+    rmtree(opj(path, '.git'))
+    assert_is_none(ds.repo)
+    assert_is_none(ds._repo_signature)
+
+
 @known_failure_windows  # leaves modified .gitmodules behind
 @with_tempfile(mkdir=True)
 def test_subdatasets(path):
@@ -556,3 +577,18 @@ def test_hashable(path):
     eq_(len(tryme), 3)
     tryme.add(AnnexRepo(path))
     eq_(len(tryme), 4)
+
+
+@with_tempfile(mkdir=True)
+def test_rev_get_dataset_roots(path):
+    sub = opj(path, 'sub')
+    deep = opj(sub, 'deep')
+    os.makedirs(deep)
+    GitRepo(path, create=True)
+    fpath = opj(deep, 'file')
+    eq_(rev_get_dataset_roots([deep, fpath, sub]),
+        {deep: path, fpath: path, sub: path})
+    # a dataset created between calls is found, whatever was seen before
+    GitRepo(sub, create=True)
+    eq_(list(rev_get_dataset_roots([fpath, path]).items()),
+        [(fpath, sub), (path, path)])
@@ -78,8 +78,9 @@ def _uninstall_dataset(ds, check, has_super, **kwargs):
     if has_super and not exists(ds.path):
         # recreate an empty mountpoint to make Git happier
         os.makedirs(ds.path)
-    # invalidate loaded ConfigManager:
+    # invalidate loaded ConfigManager and repository validation:
     ds._cfg = None
+    ds._invalidate_repo_cache()
     yield get_status_dict(status='ok', ds=ds, **kwargs)
 
 
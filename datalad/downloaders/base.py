@@ -15,6 +15,7 @@ __docformat__ = 'restructuredtext'
 import msgpack
 import os
 import sys
+import threading
 import time
 
 from abc import ABCMeta, abstractmethod
@@ -56,11 +57,63 @@ class DownloaderSession(object):
         self.headers = headers
         self.url = url
 
+    # whether portions of the content could be fetched via download_range
+    supports_ranges = False
+    # opaque identifier of the version of the content (e.g. ETag), to make
+    # sure that portions of the content fetched at different times match
+    validator = None
+
     def download(self, f=None, pbar=None, size=None):
         raise NotImplementedError("must be implemented in subclases")
 
         # TODO: get_status ?
 
+    def download_range(self, f, start, end=None, pbar=None):
+        """Download a byte range of the content into a file object
+
+        Parameters
+        ----------
+        f: file
+          File object positioned where the range must be written to
+        start: int
+          Offset of the first byte
+        end: int, optional
+          Offset of the last byte (inclusive).  If None, till the end
+        pbar: optional
+          Progress bar, updated with the offset of the last written byte
+
+        Returns
+        -------
+        int
+          Number of written bytes
+        """
+        raise NotImplementedError("must be implemented in subclases")
+
+    def close(self):
+        """Release resources, e.g. if download will not be called"""
+        pass
+
+
+class _SegmentsProgress(object):
+    """Progress bar proxy to report the total of concurrently downloaded segments
+    """
+
+    def __init__(self, pbar, starts):
+        self._pbar = pbar
+        self._starts = starts
+        self._done = [0] * len(starts)
+        self._lock = threading.Lock()
+
+    def get_segment_pbar(self, i):
+        progress = self
+
+        class SegmentPbar(object):
+            def update(self, offset):
+                with progress._lock:
+                    progress._done[i] = offset - progress._starts[i]
+                    progress._pbar.update(sum(progress._done))
+        return SegmentPbar()
+
 
 @auto_repr
 @add_metaclass(ABCMeta)
@@ -69,6 +122,8 @@ class BaseDownloader(object):
 
     _DEFAULT_AUTHENTICATOR = None
     _DOWNLOAD_SIZE_TO_VERIFY_AUTH = 10000
+    # do not split downloads into segments smaller than this
+    _DOWNLOAD_MIN_SEGMENT_SIZE = 16 * 1024 ** 2
 
     def __init__(self, credential=None, authenticator=None):
         """
@@ -393,28 +448,61 @@ class BaseDownloader(object):
 
         # FETCH CONTENT
         # TODO: pbar = ui.get_progressbar(size=response.headers['size'])
+        temp_filepath = self._get_temp_download_filename(filepath)
+        resume_filepath = temp_filepath + '.resume'
+        # a partial download is kept only if it could be resumed later on
+        resumable = downloader_session.supports_ranges \
+            and bool(downloader_session.validator) \
+            and bool(downloader_session.size) and size is None
+        resume_record = dict(
+            url=downloader_session.url,
+            validator=downloader_session.validator,
+            size=downloader_session.size)
+        keep_temp = False
         try:
-            temp_filepath = self._get_temp_download_filename(filepath)
-            if exists(temp_filepath):
-                # eventually we might want to continue the download
-                lgr.warning(
-                    "Temporary file %s from the previous download was found. "
-                    "It will be overriden" % temp_filepath)
-                # TODO.  also logic below would clean it up atm
-
-            with open(temp_filepath, 'wb') as fp:
-                # TODO: url might be a bit too long for the beast.
-                # Consider to improve to make it animated as well, or shorten here
-                pbar = ui.get_progressbar(label=url, fill_text=filepath, total=target_size)
-                t0 = time.time()
-                downloader_session.download(fp, pbar, size=size)
-                downloaded_time = time.time() - t0
-                pbar.finish()
-            downloaded_size = os.stat(temp_filepath).st_size
+            offset = self._get_resume_offset(
+                temp_filepath, resume_filepath, resume_record) \
+                if resumable else 0
+            segments = self._get_download_segments(
+                downloader_session, offset, size)
+
+            # TODO: url might be a bit too long for the beast.
+            # Consider to improve to make it animated as well, or shorten here
+            pbar = ui.get_progressbar(label=url, fill_text=filepath, total=target_size)
+            t0 = time.time()
+            if segments:
+                downloader_session.close()
+                self._download_segments(
+                    downloader_session, temp_filepath, segments, pbar)
+                downloaded_size = sum(e - s + 1 for s, e in segments)
+            else:
+                if resumable:
+                    from ..support.json_py import dump
+                    dump(resume_record, resume_filepath)
+                    keep_temp = True
+                if offset:
+                    lgr.info("Resuming download of %s from byte %d",
+                             url, offset)
+                    downloader_session.close()
+                    with open(temp_filepath, 'ab') as fp:
+                        downloader_session.download_range(
+                            fp, offset, pbar=pbar)
+                else:
+                    with open(temp_filepath, 'wb') as fp:
+                        downloader_session.download(fp, pbar, size=size)
+                downloaded_size = os.stat(temp_filepath).st_size
+            downloaded_time = time.time() - t0
+            pbar.finish()
 
             # (headers.get('Content-type', "") and headers.get('Content-Type')).startswith('text/html')
             #  and self.authenticator.html_form_failure_re: # TODO: use information in authenticator
-            self._verify_download(url, downloaded_size, target_size, temp_filepath)
+            try:
+                self._verify_download(url, downloaded_size, target_size, temp_filepath)
+            except Exception as e:
+                # only the missing remainder could be fetched later on
+                keep_temp = keep_temp and isinstance(e, IncompleteDownloadError)
+                raise
+            keep_temp = False
 
             # adjust atime/mtime according to headers/status
             if status.mtime:
@@ -438,13 +526,91 @@ class BaseDownloader(object):
             ))
             raise DownloadError(exc_str(e))  # for now
         finally:
-            if exists(temp_filepath):
-                # clean up
-                lgr.debug("Removing a temporary download %s", temp_filepath)
-                unlink(temp_filepath)
+            if keep_temp and exists(temp_filepath):
+                lgr.info(
+                    "Keeping partial download %s to resume it on the next "
+                    "attempt", temp_filepath)
+            else:
+                for f in (temp_filepath, resume_filepath):
+                    if exists(f):
+                        # clean up
+                        lgr.debug("Removing a temporary download %s", f)
+                        unlink(f)
 
         return filepath
 
+    @staticmethod
+    def _get_resume_offset(temp_filepath, resume_filepath, resume_record):
+        """Return the size of the partial download which could be resumed
+
+        A partial download is only resumed, if it was downloaded from the same
+        URL and the same version of the content, as recorded alongside.
+        """
+        if not exists(temp_filepath):
+            return 0
+        from ..support.json_py import load
+        try:
+            record = load(resume_filepath, fixup=False) \
+                if exists(resume_filepath) else None
+        except Exception as e:
+            lgr.debug("Failed to load %s: %s", resume_filepath, exc_str(e))
+            record = None
+        offset = os.stat(temp_filepath).st_size
+        if record != resume_record or offset >= resume_record['size']:
+            lgr.warning(
+                "Temporary file %s from the previous download was found. "
+                "It will be overriden" % temp_filepath)
+            return 0
+        return offset
+
+    def _get_download_segments(self, downloader_session, offset, size):
+        """Return byte ranges to download concurrently, or None
+
+        Segments are only used for fresh downloads of the full content, if
+        enabled via datalad.download.segments and the server supports ranges.
+        """
+        nsegments = cfg.obtain('datalad.download.segments')
+        target_size = downloader_session.size
+        if nsegments < 2 or offset or size is not None or not target_size \
+                or not downloader_session.supports_ranges:
+            return None
+        nsegments = min(
+            nsegments, target_size // self._DOWNLOAD_MIN_SEGMENT_SIZE)
+        if nsegments < 2:
+            return None
+        step = -(-target_size // nsegments)
+        return [(start, min(start + step, target_size) - 1)
+                for start in range(0, target_size, step)]
+
+    @staticmethod
+    def _download_segments(downloader_session, filepath, segments, pbar):
+        """Download `segments` concurrently into their places in `filepath`
+        """
+        from multiprocessing.pool import ThreadPool
+
+        with open(filepath, 'wb') as fp:
+            fp.truncate(segments[-1][1] + 1)
+
+        progress = _SegmentsProgress(pbar, [s for s, e in segments])
+
+        def download_segment(i):
+            start, end = segments[i]
+            with open(filepath, 'r+b') as fp:
+                fp.seek(start)
+                downloaded = downloader_session.download_range(
+                    fp, start, end, pbar=progress.get_segment_pbar(i))
+            if downloaded != end - start + 1:
+                raise IncompleteDownloadError(
+                    "Downloaded size %d of the segment %d-%d differs from "
+                    "expected %d" % (downloaded, start, end, end - start + 1))
+
+        lgr.debug("Downloading %d segments into %s", len(segments), filepath)
+        pool = ThreadPool(len(segments))
+        try:
+            pool.map(download_segment, range(len(segments)))
+        finally:
+            pool.terminate()
+
     def download(self, url, path=None, **kwargs):
         """Fetch content as pointed by the URL optionally into a file
 
@@ -17,9 +17,13 @@ import requests.auth
 # from urllib3.exceptions import MaxRetryError, NewConnectionError
 
 import io
+import threading
+from collections import defaultdict
 from six import BytesIO
+from six.moves.urllib.parse import urlparse
 from time import sleep
 
+from .. import cfg
 from ..utils import assure_list_from_str, assure_dict_from_str
 from ..dochelpers import borrowkwargs
 
@@ -96,7 +100,7 @@ def check_response_status(response, err_prefix="", session=None):
             err_msg,
             supported_types=process_www_authenticate(
                 response.headers.get('WWW-Authenticate')))
-    elif response.status_code in {200}:
+    elif response.status_code in {200, 206}:
         pass
     elif response.status_code in {301, 302, 307}:
         # TODO: apparently tests do not excercise this one yet
@@ -349,12 +353,23 @@ class HTTPBearerTokenAuthenticator(HTTPRequestsAuthenticator):
 @auto_repr
 class HTTPDownloaderSession(DownloaderSession):
     def __init__(self, size=None, filename=None,  url=None, headers=None,
-                 response=None, chunk_size=1024 ** 2):
+                 response=None, chunk_size=1024 ** 2, session=None,
+                 request_headers=None):
         super(HTTPDownloaderSession, self).__init__(
             size=size, filename=filename, url=url, headers=headers,
         )
         self.chunk_size = chunk_size
         self.response = response
+        self.session = session
+        self.request_headers = request_headers
+        if session is not None and headers and \
+                headers.get('Accept-Ranges', '').strip().lower() == 'bytes':
+            self.supports_ranges = True
+            # a weak ETag cannot be used in If-Range
+            etag = headers.get('ETag')
+            self.validator = etag \
+                if etag and not etag.startswith('W/') \
+                else headers.get('Last-Modified')
 
     def download(self, f=None, pbar=None, size=None):
         response = self.response
@@ -364,13 +379,52 @@ class HTTPDownloaderSession(DownloaderSession):
         #     # see https://rationalpie.wordpress.com/2010/06/02/python-streaming-gzip-decompression/
         #     # for ways to implement in python 2 and 3.2's gzip is working better with streams
 
-        total = 0
         return_content = f is None
         if f is None:
             # no file to download to
             # TODO: actually strange since it should have been decoded then...
             f = BytesIO()
 
+        self._stream(response, f, pbar=pbar, size=size)
+
+        if return_content:
+            out = f.getvalue()
+            return out
+
+    def download_range(self, f, start, end=None, pbar=None):
+        headers = dict(self.request_headers or {})
+        headers['Range'] = 'bytes=%d-%s' % (start, '' if end is None else end)
+        if self.validator:
+            # if content has changed, server would respond with all of it
+            headers['If-Range'] = self.validator
+        response = self.session.get(self.url, stream=True, headers=headers)
+        try:
+            check_response_status(response, session=self.session)
+            if response.status_code != 206:
+                raise DownloadError(
+                    "Range request to %s was not satisfied (status code %d), "
+                    "content might have changed"
+                    % (self.url, response.status_code))
+            return self._stream(
+                response, f, pbar=pbar,
+                size=None if end is None else end - start + 1,
+                offset=start)
+        finally:
+            response.close()
+
+    def close(self):
+        if self.response is not None:
+            self.response.close()
+
+    def _stream(self, response, f, pbar=None, size=None, offset=0):
+        """Write content of the `response` into `f`
+
+        Returns
+        -------
+        int
+          Number of bytes written
+        """
+        total = 0
         # must use .raw to be able avoiding decoding/decompression while downloading
         # to a file
         chunk_size_ = min(self.chunk_size, size) if size is not None else self.chunk_size
@@ -408,7 +462,7 @@ class HTTPDownloaderSession(DownloaderSession):
                 try:
                     # TODO: pbar is not robust ATM against > 100% performance ;)
                     if pbar:
-                        pbar.update(total)
+                        pbar.update(offset + total)
                 except Exception as e:
                     lgr.warning("Failed to update progressbar: %s" % exc_str(e))
                 # TEMP
@@ -416,10 +470,112 @@ class HTTPDownloaderSession(DownloaderSession):
                 ui.out.flush()
                 if size is not None and total >= size:
                     break  # we have done as much as we were asked
+        return total
 
-        if return_content:
-            out = f.getvalue()
-            return out
+
+class HTTPSessionRegistry(object):
+    """Process-wide registry of HTTP sessions to share pooled connections
+
+    Sessions are registered per scheme, host (and port), credential, and
+    authenticator (type and configuration), so that downloaders for the same
+    site (e.g. created for different providers or threads) do not need to
+    establish new connections and authenticate again, while a downloader
+    never gets a session that was authenticated differently.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        # per host: number of sessions created and times they were shared
+        self._counts = defaultdict(lambda: {'sessions': 0, 'shared': 0})
+
+    @staticmethod
+    def _get_key(url, credential=None, authenticator=None):
+        parsed = urlparse(url)
+        if authenticator is not None:
+            authenticator = (
+                authenticator.__class__.__name__,
+                repr(sorted(vars(authenticator).items())))
+        return (parsed.scheme, parsed.netloc,
+                getattr(credential, 'name', credential),
+                authenticator)
+
+    def get(self, url, credential=None, authenticator=None):
+        """Return the registered session for the url, credential and
+        authenticator, or None
+        """
+        key = self._get_key(url, credential, authenticator)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._counts[key[1]]['shared'] += 1
+        return session
+
+    def register(self, url, session, credential=None, authenticator=None):
+        """Register (or replace) a session for the url, credential and
+        authenticator"""
+        key = self._get_key(url, credential, authenticator)
+        with self._lock:
+            self._sessions[key] = session
+            self._counts[key[1]]['sessions'] += 1
+
+    @staticmethod
+    def new_session():
+        """Return a new session configured to pool connections"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=cfg.obtain('datalad.download.http.pool-connections'),
+            # concurrent segments of a download need their own connections
+            pool_maxsize=max(cfg.obtain('datalad.download.http.pool-maxsize'),
+                             cfg.obtain('datalad.download.segments')))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not cfg.obtain('datalad.download.http.keep-alive'):
+            session.headers['Connection'] = 'close'
+        return session
+
+    def clear(self):
+        """Close and forget all registered sessions"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def get_stats(self):
+        """Return connection reuse counters per host
+
+        Returns
+        -------
+        dict
+          For each host (with port, if given in the URL) a dict with the
+          number of 'sessions' created and the number of times one was
+          'shared', and of the 'connections' established and the 'requests'
+          sent over them by the pools of the registered sessions.
+        """
+        stats = {}
+        with self._lock:
+            sessions = list(self._sessions.items())
+            counts = {k: dict(v) for k, v in self._counts.items()}
+        for (scheme, netloc, _, _), session in sessions:
+            host_stats = stats.setdefault(
+                netloc,
+                dict(counts.get(netloc, {}), connections=0, requests=0))
+            adapter = session.get_adapter('%s://%s' % (scheme, netloc))
+            pools = getattr(
+                getattr(adapter, 'poolmanager', None), 'pools', None)
+            if pools is None:
+                continue
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool is None or \
+                        netloc.split(':')[0] != getattr(pool, 'host', None):
+                    continue
+                host_stats['connections'] += pool.num_connections
+                host_stats['requests'] += pool.num_requests
+        return stats
+
+
+http_sessions = HTTPSessionRegistry()
 
 
 @auto_repr
@@ -451,10 +607,16 @@ class HTTPDownloader(BaseDownloader):
             if self._session:
                 lgr.debug("http session: Reusing previous")
                 return True  # we used old
+            session = http_sessions.get(
+                url, self.credential, self.authenticator)
+            if session is not None:
+                lgr.debug("http session: Reusing shared")
+                self._session = session
+                return True
             elif url in cookies_db:
                 cookie_dict = cookies_db[url]
                 lgr.debug("http session: Creating new with old cookies %s", list(cookie_dict.keys()))
-                self._session = requests.Session()
+                self._session = http_sessions.new_session()
                 # not sure what happens if cookie is expired (need check to that or exception will prolly get thrown)
 
                 # TODO dict_to_cookiejar doesn't preserve all fields when reversed
@@ -462,12 +624,17 @@ class HTTPDownloader(BaseDownloader):
                 # TODO cookie could be expired w/ something like (but docs say it should be expired automatically):
                 # http://docs.python-requests.org/en/latest/api/#requests.cookies.RequestsCookieJar.clear_expired_cookies
                 # self._session.cookies.clear_expired_cookies()
+                http_sessions.register(
+                    url, self._session, self.credential, self.authenticator)
                 return True
 
         lgr.debug("http session: Creating brand new session")
-        self._session = requests.Session()
+        self._session = http_sessions.new_session()
         if self.authenticator:
             self.authenticator.authenticate(url, self.credential, self._session)
+        # share only once authenticated
+        http_sessions.register(
+            url, self._session, self.credential, self.authenticator)
 
         return False
 
@@ -483,6 +650,7 @@ class HTTPDownloader(BaseDownloader):
             headers = {}
         if 'Accept-Encoding' not in headers:
             headers['Accept-Encoding'] = ''
+        request_headers = headers
         # TODO: our tests ATM aren't ready for retries, thus altogether disabled for now
         nretries = 1
         for retry in range(1, nretries+1):
@@ -524,7 +692,9 @@ class HTTPDownloader(BaseDownloader):
             url=response.url,
             filename=url_filename,
             headers=headers,
-            response=response
+            response=response,
+            session=self._session,
+            request_headers=request_headers,
         )
 
     @classmethod
@@ -8,6 +8,7 @@
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 """Tests for http downloader"""
 
+import logging
 import time
 from calendar import timegm
 from six import PY3
@@ -28,6 +29,8 @@ from ..credentials import Token
 from ..credentials import LORIS_Token
 from ..http import HTMLFormAuthenticator
 from ..http import HTTPDownloader
+from ..http import HTTPDownloaderSession
+from ..http import HTTPSessionRegistry
 from ..http import HTTPBearerTokenAuthenticator
 from ..http import process_www_authenticate
 from ...support.network import get_url_straight_filename
@@ -54,8 +57,11 @@ from ...tests.utils import SkipTest
 from ...tests.utils import assert_in
 from ...tests.utils import assert_not_in
 from ...tests.utils import assert_equal
+from ...tests.utils import assert_not_equal
 from ...tests.utils import assert_greater
 from ...tests.utils import assert_false
+from ...tests.utils import assert_true
+from ...tests.utils import eq_
 from ...tests.utils import assert_raises
 from ...tests.utils import ok_file_has_content
 from ...tests.utils import serve_path_via_http, with_tree
@@ -65,6 +71,7 @@ from ...tests.utils import with_tempfile
 from ...tests.utils import use_cassette
 from ...tests.utils import skip_if
 from ...tests.utils import without_http_proxy
+from ...tests.utils import patch_config
 from ...support.exceptions import AccessDeniedError
 from ...support.exceptions import AnonymousAccessDeniedError
 from ...support.status import FileStatus
@@ -342,6 +349,119 @@ def test_mtime(path, url, tempfile):
     assert_equal(os.stat(tempfile).st_mtime, 1000)
 
 
+@with_tree(tree={'file.dat': '0123456789' * 1000})
+@serve_path_via_http
+@with_tempfile
+def test_download_resume(path, url, tempfile):
+    furl = url + 'file.dat'
+    temp_filepath = tempfile + '.datalad-download-temp'
+    downloader = HTTPDownloader()
+    orig_stream = HTTPDownloaderSession._stream
+
+    def interrupted_stream(self, response, f, pbar=None, size=None, offset=0):
+        orig_stream(self, response, f, pbar=pbar, size=3000, offset=offset)
+        raise IOError("connection lost")
+
+    with patch.object(HTTPDownloaderSession, '_stream', interrupted_stream), \
+            swallow_logs():
+        assert_raises(DownloadError, downloader.download, furl, tempfile)
+    # partial download is kept along with the record to validate it
+    assert_false(os.path.exists(tempfile))
+    ok_file_has_content(temp_filepath, '0123456789' * 300)
+    assert_true(os.path.exists(temp_filepath + '.resume'))
+
+    with patch.object(HTTPDownloaderSession, 'download_range',
+                      autospec=True,
+                      side_effect=HTTPDownloaderSession.download_range) \
+            as download_range:
+        downloader.download(furl, tempfile)
+    assert_equal(download_range.call_args[0][2], 3000)
+    ok_file_has_content(tempfile, '0123456789' * 1000)
+    assert_false(os.path.exists(temp_filepath))
+    assert_false(os.path.exists(temp_filepath + '.resume'))
+
+    # content changed since the partial download -- start from scratch
+    with open(temp_filepath, 'w') as f:
+        f.write('0123')
+    with open(temp_filepath + '.resume', 'w') as f:
+        f.write('{"url": "%s", "validator": "old", "size": 10000}' % furl)
+    with swallow_logs(new_level=logging.WARNING) as cml:
+        downloader.download(furl, tempfile, overwrite=True)
+        cml.assert_logged("Temporary file .* will be overriden", regex=True)
+    ok_file_has_content(tempfile, '0123456789' * 1000)
+    assert_false(os.path.exists(temp_filepath + '.resume'))
+
+
+@with_tree(tree={'file.dat': '0123456789' * 1000})
+@serve_path_via_http
+@with_tempfile
+def test_download_segments(path, url, tempfile):
+    furl = url + 'file.dat'
+    downloader = HTTPDownloader()
+    with patch_config({'datalad.download.segments': '4'}), \
+            patch.object(BaseDownloader, '_DOWNLOAD_MIN_SEGMENT_SIZE', 1000), \
+            patch.object(HTTPDownloaderSession, 'download_range',
+                         autospec=True,
+                         side_effect=HTTPDownloaderSession.download_range) \
+            as download_range:
+        downloader.download(furl, tempfile)
+        eq_(sorted(c[0][2:4] for c in download_range.call_args_list),
+            [(0, 2499), (2500, 4999), (5000, 7499), (7500, 9999)])
+    ok_file_has_content(tempfile, '0123456789' * 1000)
+
+    # files which are too small are not split
+    with patch_config({'datalad.download.segments': '4'}), \
+            patch.object(HTTPDownloaderSession, 'download_range') \
+            as download_range:
+        downloader.download(furl, tempfile, overwrite=True)
+        assert_false(download_range.called)
+    ok_file_has_content(tempfile, '0123456789' * 1000)
+
+
+@with_tree(tree={'file.dat': 'abc'})
+@serve_path_via_http
+def test_http_sessions(path, url):
+    furl = url + 'file.dat'
+    registry = HTTPSessionRegistry()
+    with patch('datalad.downloaders.http.http_sessions', registry):
+        downloaders = [HTTPDownloader() for i in range(3)]
+        for d in downloaders:
+            assert_equal(d.fetch(furl), 'abc')
+            assert_equal(d.fetch(furl), 'abc')
+        # all share the same session
+        assert_equal(len(set(id(d._session) for d in downloaders)), 1)
+        # but not with a different credential
+        downloader = HTTPDownloader(credential='some')
+        downloader._establish_session(furl)
+        assert_false(downloader._session is downloaders[0]._session)
+        # nor with an authenticator, which authenticates its own session
+        with patch.object(NoneAuthenticator, 'authenticate') as authenticate:
+            authenticated = [
+                HTTPDownloader(authenticator=NoneAuthenticator())
+                for i in range(2)]
+            for d in authenticated:
+                d._establish_session(furl)
+            assert_equal(authenticate.call_count, 1)
+        assert_false(authenticated[0]._session is downloaders[0]._session)
+        # but shares it with an equally configured one
+        assert_true(authenticated[1]._session is authenticated[0]._session)
+        # differently configured authenticators do not share sessions
+        assert_not_equal(
+            registry._get_key(furl, authenticator=HTMLFormAuthenticator(
+                dict(username='{user}'))),
+            registry._get_key(furl, authenticator=HTMLFormAuthenticator(
+                dict(username='{user}', submit='Login'))))
+    netloc = url.split('/')[2]
+    stats = registry.get_stats()[netloc]
+    assert_equal(stats['sessions'], 3)
+    assert_equal(stats['shared'], 3)
+    assert_equal(stats['requests'], 6)
+    # all the requests went through a single pooled connection
+    assert_equal(stats['connections'], 1)
+    registry.clear()
+    assert_equal(registry.get_stats(), {})
+
+
 def test_get_status_from_headers():
     # function doesn't do any value transformation ATM
     headers = {
@@ -301,7 +301,7 @@ class AddArchiveContent(Interface):
         annexarchive = ArchiveAnnexCustomRemote(path=annex_path, persistent_cache=True)
         # We will move extracted content so it must not exist prior running
         annexarchive.cache.allow_existing = True
-        earchive = annexarchive.cache[key_rpath]
+        earchive = annexarchive.cache.get_archive(key_rpath, key=key)
 
         # TODO: check if may be it was already added
         if ARCHIVES_SPECIAL_REMOTE not in annex.get_remotes():
@@ -336,11 +336,14 @@ class AddArchiveContent(Interface):
             outside_stats = stats
             stats = ActivityStats()
 
-            for extracted_file in earchive.get_extracted_files():
+            # with an index of the archive there is no need to extract it, the
+            # special remote extracts the files one by one while adding urls
+            aindex = earchive.index
+            for extracted_file in earchive.get_archived_files():
                 stats.files += 1
                 extracted_path = opj(earchive.path, extracted_file)
 
-                if islink(extracted_path):
+                if aindex is None and islink(extracted_path):
                     link_path = realpath(extracted_path)
                     if not exists(link_path):  # TODO: config  addarchive.symlink-broken='skip'
                         lgr.warning("Path %s points to non-existing file %s" % (extracted_path, link_path))
@@ -379,7 +382,10 @@ class AddArchiveContent(Interface):
 
                 target_file_path_orig = opj(annex.path, target_file_orig)
 
-                url = annexarchive.get_file_url(archive_key=key, file=extracted_file, size=os.stat(extracted_path).st_size)
+                extracted_size = aindex[extracted_file]['size'] \
+                    if aindex is not None \
+                    else os.stat(extracted_path).st_size
+                url = annexarchive.get_file_url(archive_key=key, file=extracted_file, size=extracted_size)
 
                 # lgr.debug("mv {extracted_path} {target_file}. URL: {url}".format(**locals()))
 
@@ -390,7 +396,12 @@ class AddArchiveContent(Interface):
 
                 if lexists(target_file_path):
                     handle_existing = True
-                    if md5sum(target_file_path) == md5sum(extracted_path):
+                    extracted_md5 = aindex[extracted_file]['md5'] \
+                        if aindex is not None \
+                        else md5sum(extracted_path)
+                    if md5sum(target_file_path) == extracted_md5:
+                        extracted_path = earchive.get_extracted_file(
+                            extracted_file)
                         if not annex.is_under_annex(extracted_path):
                             # if under annex -- must be having the same content,
                             # we should just add possibly a new extra URL
@@ -15,6 +15,7 @@ __docformat__ = 'restructuredtext'
 from appdirs import AppDirs
 from os.path import join as opj, expanduser
 from datalad.support.constraints import EnsureBool
+from datalad.support.constraints import EnsureFloat
 from datalad.support.constraints import EnsureInt
 from datalad.support.constraints import EnsureNone
 from datalad.support.constraints import EnsureChoice
@@ -31,6 +32,48 @@ definitions = {
         'destination': 'local',
         'type': bool,
     },
+    'datalad.archives.cache-maxsize': {
+        'ui': ('question', {
+               'title': 'Size limit of the cache of extracted archives',
+               'text': 'Size (in MB) the content extracted from archives (e.g. by the datalad-archives special remote) may occupy before least recently used archives are removed. 0 -- no limit'}),
+        'default': 5000,
+        'type': EnsureInt(),
+    },
+    'datalad.customremotes.async': {
+        'ui': ('yesno', {
+               'title': 'Concurrent jobs in special remotes',
+               'text': 'Should DataLad special remotes accept the ASYNC protocol extension of git-annex, to process multiple jobs (e.g. of `git annex get -J`) concurrently within a single process?'}),
+        'default': True,
+        'type': EnsureBool(),
+    },
+    'datalad.download.http.keep-alive': {
+        'ui': ('yesno', {
+               'title': 'Keep HTTP connections alive',
+               'text': 'Should HTTP connections be kept open to be reused by subsequent requests to the same host?'}),
+        'default': True,
+        'type': EnsureBool(),
+    },
+    'datalad.download.http.pool-connections': {
+        'ui': ('question', {
+               'title': 'Number of HTTP connection pools',
+               'text': 'Number of hosts for which a shared HTTP session keeps a pool of connections'}),
+        'default': 10,
+        'type': EnsureInt(),
+    },
+    'datalad.download.http.pool-maxsize': {
+        'ui': ('question', {
+               'title': 'Size of HTTP connection pools',
+               'text': 'Maximal number of connections to a single host to keep for reuse. It is increased to datalad.download.segments if that is larger'}),
+        'default': 10,
+        'type': EnsureInt(),
+    },
+    'datalad.download.segments': {
+        'ui': ('question', {
+               'title': 'Number of concurrent download segments',
+               'text': 'Number of byte ranges of a large file to download concurrently, if the server supports range requests. 1 disables segmented downloads'}),
+        'default': 1,
+        'type': EnsureInt(),
+    },
     'datalad.externals.nda.dbserver': {
         'ui': ('question', {
                'title': 'NDA database server',
@@ -218,6 +261,12 @@ definitions = {
         'ui': ('question', {
                'title': 'Runs TraceBack function with collide set to True, if this flag is set to "collide". This replaces any common prefix between current traceback log and previous invocation with "..."'}),
     },
+    'datalad.log.progress-interval': {
+        'ui': ('question', {
+               'title': 'Minimal time (in seconds) between two updates of a progress bar, updates reported in between are aggregated'}),
+        'default': 0.1,
+        'type': EnsureFloat(),
+    },
     'datalad.cmd.protocol': {
         'ui': ('question', {
                'title': 'Specifies the protocol number used by the Runner to note shell command or python function call times and allows for dry runs. "externals-time" for ExecutionTimeExternalsProtocol, "time" for ExecutionTimeProtocol and "null" for NullProtocol. Any new DATALAD_CMD_PROTOCOL has to implement datalad.support.protocol.ProtocolInterface'}),
@@ -252,6 +301,27 @@ definitions = {
         'type': EnsureInt(),
         'default': 5,
     },
+    'datalad.ls.jobs': {
+        'ui': ('question', {
+               'title': 'Number of `ls` threads',
+               'text': 'Number of threads `ls` formats the listed datasets with, and (for the web UI) gathers the information on the files of a directory with. Every directory is still traversed; only the inspection of its content is spread over the threads'}),
+        'default': 4,
+        'type': EnsureInt(),
+    },
+    'datalad.status.jobs': {
+        'ui': ('question', {
+               'title': 'Number of parallel subdataset state evaluations',
+               'text': 'Number of subdatasets `status` inspects for modifications at the same time, each with its own Git processes. With 1, subdatasets are inspected one after another'}),
+        'default': 4,
+        'type': EnsureInt(),
+    },
+    'datalad.save.add-shards': {
+        'ui': ('question', {
+               'title': 'Number of annex add shards',
+               'text': 'Number of groups of similar total size that the files `save` adds to an annex are split into. Each group is added by a separate `git annex add` with its own temporary index, merged into the index of the repository afterwards. With 1, all files are added by a single `git annex add`, which reports progress'}),
+        'default': 1,
+        'type': EnsureInt(),
+    },
     'datalad.metadata.maxfieldsize': {
         'ui': ('question', {
                'title': 'Maximum metadata field size',
@@ -259,6 +329,13 @@ definitions = {
         'default': 100000,
         'type': EnsureInt(),
     },
+    'datalad.metadata.extractor-jobs': {
+        'ui': ('question', {
+               'title': 'Number of metadata extraction threads',
+               'text': 'Number of threads content metadata extractors (e.g. image, exif, xmp, audio) read the files of a dataset with. With 1, files are read one after another'}),
+        'default': 4,
+        'type': EnsureInt(),
+    },
     'datalad.metadata.nativetype': {
         'ui': ('question', {
                'title': 'Native dataset metadata scheme',
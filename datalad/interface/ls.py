@@ -19,6 +19,7 @@ from os.path import exists, lexists, join as opj, abspath, isabs
 from os.path import curdir, isfile, islink, isdir, realpath
 from os.path import relpath
 from os import lstat
+from multiprocessing.pool import ThreadPool
 
 from six.moves.urllib.request import urlopen, Request
 from six.moves.urllib.error import HTTPError
@@ -203,12 +204,13 @@ class AbsentRepoModel(object):
 class GitModel(object):
     """A base class for models which have some .repo available"""
 
-    __slots__ = ['_branch', 'repo', '_path']
+    __slots__ = ['_branch', 'repo', '_path', '_date']
 
     def __init__(self, repo):
         self.repo = repo
         # lazy evaluation variables
         self._branch = None
+        self._date = None
         self._path = None
 
     @property
@@ -222,10 +224,19 @@ class GitModel(object):
     @property
     def branch(self):
         if self._branch is None:
+            # read HEAD directly, neither git nor GitPython need to be called
             try:
-                self._branch = self.repo.get_active_branch()
-            except:  # MIH: InvalidGitRepositoryError?
+                with open(opj(self.repo.path, GitRepo.get_git_dir(self.repo),
+                              'HEAD')) as f:
+                    head = f.read().strip()
+            except Exception as exc:  # MIH: InvalidGitRepositoryError?
+                lgr.debug("Failed to read HEAD of %s: %s",
+                          self.repo, exc_str(exc))
                 return None
+            if not head.startswith('ref: refs/heads/'):
+                # detached HEAD
+                return None
+            self._branch = head[len('ref: refs/heads/'):]
         return self._branch
 
     @property
@@ -240,7 +251,20 @@ class GitModel(object):
     def date(self):
         """Date of the last commit
         """
-        return self.repo.get_commit_date()
+        if self._date is None:
+            # unlike get_commit_date(), does not start GitPython's
+            # persistent `git cat-file` processes
+            try:
+                date = self.repo.format_commit('%at')
+            except Exception as exc:
+                lgr.debug("Got exception while trying to get last commit: %s",
+                          exc_str(exc))
+                return None
+            if date is None:
+                # no commits
+                return None
+            self._date = int(date)
+        return self._date
 
     @property
     def count_objects(self):
@@ -287,12 +311,25 @@ class AnnexModel(GitModel):
 
 @auto_repr
 class FsModel(AnnexModel):
+    """Model of a filesystem node within a repository
+
+    Parameters
+    ----------
+    path : str
+    repo : GitRepo
+    annexrec : dict, optional
+      Annex properties of the node (with 'key' and 'has_content') as reported
+      by `AnnexRepo.get_content_annexinfo`, or an empty dict if the node is
+      not annexed.  If not given, git-annex is asked about the node.
+    """
 
-    __slots__ = AnnexModel.__slots__
+    __slots__ = ['_annexrec'] + AnnexModel.__slots__
 
     def __init__(self, path, *args, **kwargs):
+        annexrec = kwargs.pop('annexrec', None)
         super(FsModel, self).__init__(*args, **kwargs)
         self._path = path
+        self._annexrec = annexrec
 
     @property
     def path(self):
@@ -326,8 +363,14 @@ class FsModel(AnnexModel):
                  'annex_worktree': 0.0}
 
         if type_ in ['file', 'link', 'link-broken']:
+            annexrec = self._annexrec
+            if annexrec:
+                # size is unknown (None) if the key does not carry it
+                size = AnnexRepo.get_size_from_key(annexrec['key'])
+                ondisk_size = size if annexrec.get('has_content') else 0
             # if node is under annex, ask annex for node size, ondisk_size
-            if isinstance(self.repo, AnnexRepo) and self.repo.is_under_annex(self._path):
+            elif annexrec is None and isinstance(self.repo, AnnexRepo) \
+                    and self.repo.is_under_annex(self._path):
                 size = self.repo.info(self._path, batch=True)['size']
                 ondisk_size = size \
                     if self.repo.file_has_content(self._path) \
@@ -442,7 +485,30 @@ def format_ds_model(formatter, ds_model, format_str, format_exc):
     except Exception as exc:
         return formatter.format(format_exc, ds=ds_model, msg=exc_str(exc))
 
-# from joblib import Parallel, delayed
+
+def _get_ds_model(ds):
+    if not ds.is_installed():
+        return AbsentRepoModel(ds.path)
+    elif isinstance(ds.repo, AnnexRepo):
+        return AnnexModel(ds.repo)
+    elif isinstance(ds.repo, GitRepo):
+        return GitModel(ds.repo)
+    raise RuntimeError("Got some dataset which don't know how to handle %s"
+                       % ds)
+
+
+def _format_ds(ds, path, formatter, fmts, format_exc):
+    """Build the model of a dataset and format it, possibly in a thread"""
+    dsm = _get_ds_model(ds)
+    dsm.path = path
+    try:
+        return format_ds_model(formatter, dsm, fmts[dsm.__class__], format_exc)
+    finally:
+        # workaround for explosion of git cat-file --batch processes
+        # https://github.com/datalad/datalad/issues/1888
+        # The models do not use GitPython, but someone else might have
+        if dsm.repo is not None and dsm.repo._repo is not None:
+            dsm.repo.repo.close()
 
 
 def _ls_dataset(loc, fast=False, recursive=False, all_=False, long_=False):
@@ -455,29 +521,15 @@ def _ls_dataset(loc, fast=False, recursive=False, all_=False, long_=False):
          for sm in topds.subdatasets(recursive=recursive, result_xfm='relpaths')]
         if recursive else [])
 
-    dsms = []
+    # adjust path strings
+    paths = []
     for ds in dss:
-        if not ds.is_installed():
-            dsm = AbsentRepoModel(ds.path)
-        elif isinstance(ds.repo, AnnexRepo):
-            dsm = AnnexModel(ds.repo)
-        elif isinstance(ds.repo, GitRepo):
-            dsm = GitModel(ds.repo)
-        else:
-            raise RuntimeError("Got some dataset which don't know how to handle %s"
-                               % ds)
-        dsms.append(dsm)
+        #path = ds.path[len(topdir) + 1 if topdir else 0:]
+        path = relpath(ds.path, topdir) if topdir else ds.path
+        paths.append(path or '.')
+    dss = sorted(zip(paths, dss), key=lambda p_ds: p_ds[0])
 
-    # adjust path strings
-    for ds_model in dsms:
-        #path = ds_model.path[len(topdir) + 1 if topdir else 0:]
-        path = relpath(ds_model.path, topdir) if topdir else ds_model.path
-        if not path:
-            path = '.'
-        ds_model.path = path
-    dsms = sorted(dsms, key=lambda m: m.path)
-
-    maxpath = max(len(ds_model.path) for ds_model in dsms)
+    maxpath = max(len(path) for path in paths)
     path_fmt = u"{ds.path!U:<%d}" % (maxpath + (11 if is_interactive() else 0))  # + to accommodate ansi codes
     pathtype_fmt = path_fmt + u"  [{ds.type}]"
     full_fmt = pathtype_fmt + u"  {ds.branch!N}  {ds.describe!N} {ds.date!D}"
@@ -493,21 +545,27 @@ def _ls_dataset(loc, fast=False, recursive=False, all_=False, long_=False):
         fmts[AnnexModel] += u"  {ds.annex_local_size!S}/{ds.annex_worktree_size!S}"
 
     formatter = LsFormatter()
-    # weird problems happen in the parallel run -- TODO - figure it out
-    # for out in Parallel(n_jobs=1)(
-    #         delayed(format_ds_model)(formatter, dsm, full_fmt, format_exc=path_fmt + "  {msg!R}")
-    #         for dsm in dss):
-    #     print(out)
-    for dsm in dsms:
-        fmt = fmts[dsm.__class__]
-        ds_str = format_ds_model(formatter, dsm, fmt, format_exc=path_fmt + u"  {msg!R}")
-        safe_print(ds_str)
-        # workaround for explosion of git cat-file --batch processes
-        # https://github.com/datalad/datalad/issues/1888
-        if dsm.repo is not None:
-            dsm.repo.repo.close()
-            del dsm.repo
-            dsm.repo = None
+
+    def format_ds(path_ds):
+        return _format_ds(path_ds[1], path_ds[0], formatter, fmts,
+                          format_exc=path_fmt + u"  {msg!R}")
+
+    # Datasets are modeled and formatted by a bounded pool of threads.  Each
+    # runs a single git (or git-annex) process at a time, so there are no
+    # more processes than jobs.  Rows are printed in order, as soon as all
+    # preceding ones are done.
+    jobs = min(topds.config.obtain('datalad.ls.jobs'), len(dss))
+    if jobs <= 1:
+        for path_ds in dss:
+            safe_print(format_ds(path_ds))
+        return
+    pool = ThreadPool(jobs)
+    try:
+        for ds_str in pool.imap(format_ds, dss):
+            safe_print(ds_str)
+    finally:
+        pool.terminate()
+        pool.join()
 
 
 #
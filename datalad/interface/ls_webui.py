@@ -15,14 +15,19 @@ import numbers
 import humanize
 import json as js
 import time
+from contextlib import contextmanager
 from genericpath import isdir, exists, getmtime
+from multiprocessing.pool import ThreadPool
 from os import makedirs, remove, listdir
 from os.path import split, abspath, basename, join as opj, realpath, relpath, \
-    isabs, dirname
+    isabs, dirname, normpath
+
+from six import string_types, text_type
 
 from datalad.consts import OLDMETADATA_DIR, OLDMETADATA_FILENAME
 from datalad.distribution.dataset import Dataset
 from datalad.interface.ls import FsModel, lgr, GitModel
+from datalad.support.annexrepo import AnnexRepo
 from datalad.support.network import is_datalad_compat_ri
 from datalad.utils import safe_print, with_pathsep
 
@@ -106,24 +111,76 @@ def metadata_locator(fs_metadata=None, path=None, ds_path=None, metadata_path=No
     return metadata_file
 
 
-def fs_extract(nodepath, repo, basepath='/'):
-    """extract required info of nodepath with its associated parent repository and returns it as a dictionary
+def _numeric_size(size):
+    """Return a size as a number
+
+    Sizes are kept numeric during a traversal, but those loaded from the
+    metadata files of an earlier run are human-readable strings.
+    """
+    if size is None:
+        return 0
+    if isinstance(size, numbers.Number):
+        return size
+    return machinesize(size)
+
+
+def _humanize_sizes(sizes):
+    """Convert numeric sizes to human-readable strings, as presented in web UI
+    """
+    return {
+        stype: humanize.naturalsize(svalue)
+        if isinstance(svalue, numbers.Number)
+        else svalue if isinstance(svalue, string_types)
+        else UNKNOWN_SIZE
+        for stype, svalue in sizes.items()
+    }
+
+
+def _humanize_record(rec):
+    """Return a copy of a node record with all its sizes made human-readable
+    """
+    rec = dict(rec)
+    if 'size' in rec:
+        rec['size'] = _humanize_sizes(rec['size'])
+    if 'nodes' in rec:
+        rec['nodes'] = [_humanize_record(node) for node in rec['nodes']]
+    return rec
+
+
+def _get_annexinfo(repo, paths=None):
+    """Return annex properties of the annexed files of `repo`
+
+    A single query to git-annex replaces queries per file.
 
     Parameters
     ----------
-    nodepath : str
-        Full path to the location we are exploring (must be a directory within
-        `repo`)
     repo : GitRepo
-        Is the repository nodepath belongs to
+    paths : list, optional
+      Limit the query to these paths (directories are queried recursively).
+
+    Returns
+    -------
+    dict
+      Records as reported by `AnnexRepo.get_content_annexinfo`, under the
+      path of a file relative to the repository root.
     """
+    if not isinstance(repo, AnnexRepo) or paths == []:
+        return {}
+    info = repo.get_content_annexinfo(
+        paths=paths, init=None, eval_availability=True)
+    return {text_type(p.relative_to(repo.pathobj)): r
+            for p, r in info.items()}
+
+
+def _map(pool, func, items):
+    return pool.map(func, items, chunksize=16) if pool else \
+        [func(item) for item in items]
+
+
+def _fs_extract(nodepath, repo, basepath='/', annexrec=None):
+    """Like `fs_extract`, but the sizes of the record are kept numeric"""
     # Create FsModel from filesystem nodepath and its associated parent repository
-    node = FsModel(nodepath, repo)
-    pretty_size = {
-        stype: humanize.naturalsize(svalue)
-            if isinstance(svalue, numbers.Number) else UNKNOWN_SIZE
-        for stype, svalue in node.size.items()
-    }
+    node = FsModel(nodepath, repo, annexrec=annexrec)
     pretty_date = time.strftime(u"%Y-%m-%d %H:%M:%S", time.localtime(node.date))
     name = leaf_name(node._path) \
         if leaf_name(node._path) != "" \
@@ -132,7 +189,7 @@ def fs_extract(nodepath, repo, basepath='/'):
         "name": name,
         "path": relpath(node._path, basepath),
         "type": node.type_,
-        "size": pretty_size,
+        "size": node.size,
         "date": pretty_date,
     }
     # if there is meta-data for the dataset (done by aggregate-metadata)
@@ -156,9 +213,29 @@ def fs_extract(nodepath, repo, basepath='/'):
     return rec
 
 
+def fs_extract(nodepath, repo, basepath='/', annexrec=None):
+    """extract required info of nodepath with its associated parent repository and returns it as a dictionary
+
+    Parameters
+    ----------
+    nodepath : str
+        Full path to the location we are exploring (must be a directory within
+        `repo`)
+    repo : GitRepo
+        Is the repository nodepath belongs to
+    annexrec : dict, optional
+        Annex properties of nodepath, see `FsModel`
+    """
+    return _humanize_record(
+        _fs_extract(nodepath, repo, basepath=basepath, annexrec=annexrec))
+
+
 def fs_render(fs_metadata, json=None, **kwargs):
     """render node based on json option passed renders to file, stdout or deletes json at root
 
+    A metadata file is only (re)written if its content changed, so unchanged
+    directories keep their files (and modification times) from earlier runs.
+
     Parameters
     ----------
     fs_metadata: dict
@@ -170,13 +247,19 @@ def fs_render(fs_metadata, json=None, **kwargs):
     metadata_file = metadata_locator(fs_metadata, **kwargs)
 
     if json == 'file':
+        content = js.dumps(_humanize_record(fs_metadata))
+        if exists(metadata_file):
+            with open(metadata_file) as f:
+                if f.read() == content:
+                    lgr.debug('Metadata in %s is up to date', metadata_file)
+                    return
         # create metadata_root directory if it doesn't exist
         metadata_dir = dirname(metadata_file)
         if not exists(metadata_dir):
             makedirs(metadata_dir)
         # write directory metadata to json
         with open(metadata_file, 'w') as f:
-            js.dump(fs_metadata, f)
+            f.write(content)
 
     # else if json flag set to delete, remove .dir.json of current directory
     elif json == 'delete' and exists(metadata_file):
@@ -184,7 +267,7 @@ def fs_render(fs_metadata, json=None, **kwargs):
 
     # else dump json to stdout
     elif json == 'display':
-        safe_print(js.dumps(fs_metadata) + '\n')
+        safe_print(js.dumps(_humanize_record(fs_metadata)) + '\n')
 
 
 def fs_traverse(path, repo, parent=None,
@@ -192,7 +275,7 @@ def fs_traverse(path, repo, parent=None,
                 render=True,
                 recurse_datasets=False,
                 recurse_directories=False,
-                json=None, basepath=None):
+                json=None, basepath=None, jobs=None):
     """Traverse path through its nodes and returns a dictionary of relevant
     attributes attached to each node
 
@@ -209,6 +292,9 @@ def fs_traverse(path, repo, parent=None,
     render: bool
        To render from within function or not. Set to false if results to be
        manipulated before final render
+    jobs: int, optional
+      Number of threads to extract the info about files of a directory with.
+      Defaults to the 'datalad.ls.jobs' configuration
 
     Returns
     -------
@@ -216,8 +302,48 @@ def fs_traverse(path, repo, parent=None,
       extracts and returns a (recursive) list of directory info at path
       does not traverse into annex, git or hidden directories
     """
+    with _get_pool(repo, jobs) as pool:
+        return _humanize_record(_fs_traverse(
+            path, repo, parent=parent, subdatasets=subdatasets,
+            render=render, recurse_datasets=recurse_datasets,
+            recurse_directories=recurse_directories, json=json,
+            basepath=basepath, pool=pool))
+
+
+@contextmanager
+def _get_pool(repo, jobs=None):
+    """Provide a pool of `jobs` threads, or None for serial processing"""
+    if jobs is None:
+        jobs = repo.config.obtain('datalad.ls.jobs')
+    if jobs <= 1:
+        yield None
+        return
+    pool = ThreadPool(jobs)
+    try:
+        yield pool
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _fs_traverse(path, repo, parent=None,
+                 subdatasets=None,
+                 render=True,
+                 recurse_datasets=False,
+                 recurse_directories=False,
+                 json=None, basepath=None, pool=None, annexinfo=None):
+    """Implementation of `fs_traverse`, which keeps sizes numeric
+
+    Parameters
+    ----------
+    pool: ThreadPool, optional
+      Pool to extract the info about files with
+    annexinfo: dict, optional
+      Annex properties of the files in `repo`, as returned by
+      `_get_annexinfo`, to be used instead of querying git-annex
+    """
     subdatasets = subdatasets or []
-    fs = fs_extract(path, repo, basepath=basepath or path)
+    fs = _fs_extract(path, repo, basepath=basepath or path)
     dataset = Dataset(repo.path)
     submodules = {sm.path: sm
                   for sm in repo.get_submodules()}
@@ -230,14 +356,28 @@ def fs_traverse(path, repo, parent=None,
         children = [fs.copy()]          # store its info in its children dict too  (Yarik is not sure why, but I guess for .?)
         # ATM seems some pieces still rely on having this duplication, so left as is
         # TODO: strip away
-        for node in listdir(path):
+        # repo.path is real, so we are doomed (for now at least)
+        # to resolve path as well to get relpaths within the repo
+        path_relpath = relpath(realpath(path), repo.path)
+        nodes = sorted(listdir(path))
+        if annexinfo is None:
+            # with recursion, a single query covers all the subdirectories
+            annexinfo = _get_annexinfo(
+                repo,
+                [path_relpath] if recurse_directories else
+                [normpath(opj(path_relpath, node)) for node in nodes
+                 if not isdir(opj(path, node))])
+        # files get extracted in parallel, once all directories are done
+        files = []
+        for node in nodes:
             nodepath = opj(path, node)
 
             # Might contain subdatasets, so we should analyze and prepare entries
             # to pass down... in theory we could just pass full paths may be? strip
             node_subdatasets = []
             is_subdataset = False
-            if isdir(nodepath):
+            is_dir = isdir(nodepath)
+            if is_dir:
                 node_sep = with_pathsep(node)
                 for subds in subdatasets:
                     if subds == node:
@@ -251,59 +391,75 @@ def fs_traverse(path, repo, parent=None,
             # TODO:  it might be a subdir which is non-initialized submodule!
             # if not ignored, append child node info to current nodes dictionary
             if is_subdataset:
-                # repo.path is real, so we are doomed (for now at least)
-                # to resolve nodepath as well to get relpath for it
-                node_relpath = relpath(realpath(nodepath), repo.path)
+                node_relpath = normpath(opj(path_relpath, node))
                 subds = _traverse_handle_subds(
                     node_relpath,
                     dataset,
                     recurse_datasets=recurse_datasets,
                     recurse_directories=recurse_directories,
-                    json=json
+                    json=json,
+                    pool=pool
                 )
                 # Enhance it with external url if available
                 submod_url = submodules[node_relpath].url
                 if submod_url and is_datalad_compat_ri(submod_url):
                     subds['url'] = submod_url
                 children.append(subds)
-            elif not ignored(nodepath):
-                # if recursive, create info dictionary (within) each child node too
-                if recurse_directories:
-                    subdir = fs_traverse(nodepath,
+            elif ignored(nodepath):
+                continue
+            elif not is_dir:
+                files.append((len(children), nodepath,
+                              annexinfo.get(
+                                  normpath(opj(path_relpath, node)), {})))
+                children.append(None)
+            # if recursive, create info dictionary (within) each child node too
+            elif recurse_directories:
+                subdir = _fs_traverse(nodepath,
+                                      repo,
+                                      subdatasets=node_subdatasets,
+                                      parent=None,  # children[0],
+                                      recurse_datasets=recurse_datasets,
+                                      recurse_directories=recurse_directories,
+                                      json=json,
+                                      basepath=basepath or path,
+                                      pool=pool,
+                                      annexinfo=annexinfo)
+                subdir.pop('nodes', None)
+                children.append(subdir)
+            else:
+                # read child metadata from its metadata file if it exists
+                subdir_json = metadata_locator(path=node, ds_path=basepath or path)
+                if exists(subdir_json):
+                    with open(subdir_json) as data_file:
+                        subdir = js.load(data_file)
+                        subdir.pop('nodes', None)
+                # else extract whatever information you can about the child
+                else:
+                    # Yarik: this one is way too lean...
+                    subdir = _fs_extract(nodepath,
                                          repo,
-                                         subdatasets=node_subdatasets,
-                                         parent=None,  # children[0],
-                                         recurse_datasets=recurse_datasets,
-                                         recurse_directories=recurse_directories,
-                                         json=json,
                                          basepath=basepath or path)
-                    subdir.pop('nodes', None)
-                else:
-                    # read child metadata from its metadata file if it exists
-                    subdir_json = metadata_locator(path=node, ds_path=basepath or path)
-                    if exists(subdir_json):
-                        with open(subdir_json) as data_file:
-                            subdir = js.load(data_file)
-                            subdir.pop('nodes', None)
-                    # else extract whatever information you can about the child
-                    else:
-                        # Yarik: this one is way too lean...
-                        subdir = fs_extract(nodepath,
-                                            repo,
-                                            basepath=basepath or path)
                 # append child metadata to list
-                children.extend([subdir])
+                children.append(subdir)
+
+        for (i, _, _), rec in zip(
+                files,
+                _map(pool,
+                     lambda f: _fs_extract(f[1], repo,
+                                           basepath=basepath or path,
+                                           annexrec=f[2]),
+                     files)):
+            children[i] = rec
 
         # sum sizes of all 1st level children
         children_size = {}
         for node in children[1:]:
             for size_type, child_size in node['size'].items():
-                children_size[size_type] = children_size.get(size_type, 0) + machinesize(child_size)
+                children_size[size_type] = \
+                    children_size.get(size_type, 0) + _numeric_size(child_size)
 
-        # update current node sizes to the humanized aggregate children size
-        fs['size'] = children[0]['size'] = \
-            {size_type: humanize.naturalsize(child_size)
-             for size_type, child_size in children_size.items()}
+        # update current node sizes to the aggregate children size
+        fs['size'] = children[0]['size'] = children_size
 
         children[0]['name'] = '.'       # replace current node name with '.' to emulate unix syntax
         if parent:
@@ -320,7 +476,7 @@ def fs_traverse(path, repo, parent=None,
 
 def ds_traverse(rootds, parent=None, json=None,
                 recurse_datasets=False, recurse_directories=False,
-                long_=False):
+                long_=False, jobs=None):
     """Hierarchical dataset traverser
 
     Parameters
@@ -335,18 +491,33 @@ def ds_traverse(rootds, parent=None, json=None,
       Recurse into subdirectories of the current dataset
       In both of above cases, if False, they will not be explicitly
       recursed but data would be loaded from their meta-data files
+    jobs: int, optional
+      Number of threads to extract the info about files with.
+      Defaults to the 'datalad.ls.jobs' configuration
 
     Returns
     -------
     list of dict
       extracts and returns a (recursive) list of dataset(s) info at path
     """
+    with _get_pool(rootds.repo, jobs) as pool:
+        return _humanize_record(_ds_traverse(
+            rootds, parent=parent, json=json,
+            recurse_datasets=recurse_datasets,
+            recurse_directories=recurse_directories,
+            pool=pool))
+
+
+def _ds_traverse(rootds, parent=None, json=None,
+                 recurse_datasets=False, recurse_directories=False,
+                 pool=None):
+    """Implementation of `ds_traverse`, which keeps sizes numeric"""
     # extract parent info to pass to traverser
-    fsparent = fs_extract(parent.path, parent.repo, basepath=rootds.path) \
+    fsparent = _fs_extract(parent.path, parent.repo, basepath=rootds.path) \
         if parent else None
 
     # (recursively) traverse file tree of current dataset
-    fs = fs_traverse(
+    fs = _fs_traverse(
         rootds.path, rootds.repo,
         subdatasets=list(rootds.subdatasets(result_xfm='relpaths')),
         render=False,
@@ -354,7 +525,8 @@ def ds_traverse(rootds, parent=None, json=None,
         # XXX note that here I kinda flipped the notions!
         recurse_datasets=recurse_datasets,
         recurse_directories=recurse_directories,
-        json=json
+        json=json,
+        pool=pool
     )
 
     # BUT if we are recurse_datasets but not recurse_directories
@@ -380,7 +552,7 @@ def ds_traverse(rootds, parent=None, json=None,
 
 def _traverse_handle_subds(
         subds_rpath, rootds,
-        recurse_datasets, recurse_directories, json):
+        recurse_datasets, recurse_directories, json, pool=None):
     """A helper to deal with the subdataset node - recurse or just pick up
     may be alrady collected in it web meta
     """
@@ -391,7 +563,7 @@ def _traverse_handle_subds(
     def handle_not_installed():
         # for now just traverse as fs
         lgr.warning("%s is either not installed or lacks meta-data", subds)
-        subfs = fs_extract(subds_path, rootds, basepath=rootds.path)
+        subfs = _fs_extract(subds_path, rootds, basepath=rootds.path)
         # but add a custom type that it is a not installed subds
         subfs['type'] = 'uninitialized'
         # we need to kick it out from 'children'
@@ -404,11 +576,12 @@ def _traverse_handle_subds(
     if not subds.is_installed():
         subfs = handle_not_installed()
     elif recurse_datasets:
-        subfs = ds_traverse(subds,
-                            json=json,
-                            recurse_datasets=recurse_datasets,
-                            recurse_directories=recurse_directories,
-                            parent=rootds)
+        subfs = _ds_traverse(subds,
+                             json=json,
+                             recurse_datasets=recurse_datasets,
+                             recurse_directories=recurse_directories,
+                             parent=rootds,
+                             pool=pool)
         subfs.pop('nodes', None)
         #size_list.append(subfs['size'])
     # else just pick the data from metadata_file of each subdataset
@@ -0,0 +1,252 @@
+# emacs: -*- mode: python; py-indent-offset: 4; tab-width: 4; indent-tabs-mode: nil -*-
+# ex: set sts=4 ts=4 sw=4 noet:
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the datalad package for the
+#   copyright and license terms.
+#
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""On-disk registry of available commands
+
+Listing all commands with their short descriptions (e.g. for `datalad --help`
+or the docstring of `datalad.api`) requires importing every interface module
+and plugin. The registry records the outcome once per DataLad version (and
+set of plugins) in the cache directory, such that only the interface of
+a command that is actually used needs to be imported.
+"""
+
+__docformat__ = 'restructuredtext'
+
+import hashlib
+import logging
+import os
+import os.path as op
+import re
+
+from six import text_type
+
+from datalad import cfg
+from datalad.dochelpers import exc_str
+
+lgr = logging.getLogger('datalad.interface.registry')
+
+# bump whenever the structure of the registry changes
+REGISTRY_FORMAT_VERSION = 1
+
+_camel = re.compile(r'([a-z])([A-Z])')
+
+
+def _get_registry_key(groups):
+    """Return a key identifying the set of commands in `groups`"""
+    import datalad
+    key = hashlib.md5()
+    key.update(
+        text_type('{} {}'.format(
+            REGISTRY_FORMAT_VERSION, datalad.__version__)).encode('utf-8'))
+    for grp_name, grp_descr, specs in groups:
+        key.update(text_type(grp_name).encode('utf-8'))
+        for spec in specs:
+            if isinstance(spec[1], dict):
+                # plugins can change without a new datalad version
+                fpath = spec[1]['file']
+                try:
+                    mtime = os.stat(fpath).st_mtime
+                except OSError:
+                    mtime = None
+                spec = (fpath, mtime)
+            key.update(text_type(repr(spec)).encode('utf-8'))
+    return key.hexdigest()
+
+
+def _get_command_record(spec):
+    """Import an interface and describe it
+
+    Returns
+    -------
+    dict or None
+      None if the interface cannot be loaded.
+    """
+    from datalad.interface.base import (
+        alter_interface_docs_for_api,
+        alter_interface_docs_for_cmdline,
+        get_api_name,
+        get_cmd_doc,
+        get_cmdline_command_name,
+        load_interface,
+    )
+    intf = load_interface(spec)
+    if intf is None:
+        return None
+    intf_doc = get_cmd_doc(intf)
+    if isinstance(spec[1], dict):
+        # plugins are exposed in the API under their class name
+        api_name = _camel.sub('\\1_\\2', intf.__name__).lower()
+    else:
+        api_name = get_api_name(spec)
+    if hasattr(intf, 'parser_args'):
+        cmd_descr = intf.parser_args['description']
+    else:
+        cmd_descr = alter_interface_docs_for_cmdline(intf_doc)
+    return dict(
+        spec=list(spec),
+        cmd_name=get_cmdline_command_name(spec),
+        api_name=api_name,
+        api_description=getattr(intf, 'short_description', None) or
+        alter_interface_docs_for_api(intf_doc).split('\n')[0],
+        cmd_description=getattr(intf, 'short_description',
+                                cmd_descr.split('\n')[0]),
+    )
+
+
+def _get_registry_path():
+    return op.join(cfg.obtain('datalad.locations.cache'),
+                   'command_registry.json')
+
+
+def get_command_registry():
+    """Return the registry of all core commands and plugins
+
+    The registry is loaded from the cache directory, or is (re)generated
+    and stored, if it does not match the present DataLad version and
+    plugins. Commands provided by extensions are not included.
+
+    Returns
+    -------
+    list
+      A list of tuples with the form (GROUP_NAME, GROUP_DESCRIPTION, COMMANDS),
+      ordered like the output of `get_interface_groups()`. Each command is
+      a dict with the keys 'spec' (interface specification), 'cmd_name',
+      'api_name', 'api_description' and 'cmd_description'.
+    """
+    from datalad.interface.base import get_interface_groups
+    from datalad.support.json_py import (
+        dump,
+        load,
+    )
+
+    groups = get_interface_groups(include_plugins=True)
+    key = _get_registry_key(groups)
+    fpath = _get_registry_path()
+    if op.exists(fpath):
+        try:
+            registry = load(fpath, fixup=False)
+            if registry.get('key') == key:
+                return [tuple(g) for g in registry['groups']]
+            lgr.debug('Command registry at %s is outdated', fpath)
+        except Exception as e:
+            lgr.debug('Failed to load command registry from %s: %s',
+                      fpath, exc_str(e))
+
+    lgr.debug('Generating command registry')
+    registry_groups = []
+    for grp_name, grp_descr, specs in groups:
+        records = [_get_command_record(spec) for spec in specs]
+        registry_groups.append(
+            (grp_name, grp_descr, [r for r in records if r is not None]))
+    try:
+        dump(dict(key=key, groups=registry_groups), fpath)
+    except Exception as e:
+        # no cache for us, but no reason to fail either
+        lgr.debug('Failed to store command registry at %s: %s',
+                  fpath, exc_str(e))
+    return registry_groups
+
+
+def get_extension_api_specs():
+    """Return the API names and interface specs of all installed extensions
+
+    Entry points are loaded, but no interface is imported.
+
+    Returns
+    -------
+    list
+      A list of (API_NAME, SPEC) tuples in the order of the entry points.
+    """
+    from pkg_resources import iter_entry_points  # delay expensive import
+    from datalad.interface.base import get_api_name
+
+    specs = []
+    for entry_point in iter_entry_points('datalad.extensions'):
+        try:
+            lgr.debug(
+                'Loading entrypoint %s from datalad.extensions for API building',
+                entry_point.name)
+            grp_descr, interfaces = entry_point.load()
+            lgr.debug(
+                'Loaded entrypoint %s from datalad.extensions',
+                entry_point.name)
+        except Exception as e:
+            lgr.warning('Failed to load entrypoint %s: %s',
+                        entry_point.name, exc_str(e))
+            continue
+        specs.extend((get_api_name(spec), spec) for spec in interfaces)
+    return specs
+
+
+def setup_api(namespace, get_specs, names=None, lazy=True):
+    """Expose the commands of an API module
+
+    Parameters
+    ----------
+    namespace : dict
+      `globals()` of the API module.
+    get_specs : callable
+      Returns a list of (API_NAME, SPEC) tuples. Later items take precedence
+      over earlier ones with the same API name. With `lazy`, it is only called
+      once a command is requested.
+    names : callable, optional
+      Returns the API names to list in the `__all__` of the `namespace`,
+      together with its other public names. It should not need to import any
+      interface. By default, the names are taken from `get_specs`.
+    lazy : bool, optional
+      If True, and supported by the running Python (3.7+), an interface is only
+      imported once its command is accessed, by means of a module-level
+      `__getattr__` and `__dir__` that are placed into the `namespace`.
+      Otherwise all interfaces are imported immediately.
+    """
+    import sys
+    from datalad.interface.base import load_interface
+
+    specs = {}
+
+    def _get_specs():
+        if not specs:
+            specs.update(get_specs())
+        return specs
+
+    def _get_command(name):
+        intf = load_interface(_get_specs()[name])
+        return None if intf is None else intf.__call__
+
+    def _get_public(names):
+        return sorted(
+            set(n for n in namespace if not n.startswith('_')).union(names))
+
+    if not lazy or sys.version_info < (3, 7):
+        for name in _get_specs():
+            func = _get_command(name)
+            if func is not None:
+                namespace[name] = func
+        namespace['__all__'] = _get_public([])
+        return
+
+    modname = namespace['__name__']
+
+    def __getattr__(name):
+        # do not bother (and load entry points) for private attributes
+        # looked up by Python or tools
+        func = None if name.startswith('_') or name not in _get_specs() \
+            else _get_command(name)
+        if func is None:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(modname, name))
+        namespace[name] = func
+        return func
+
+    def __dir__():
+        return sorted(set(namespace).union(_get_specs()))
+
+    namespace['__getattr__'] = __getattr__
+    namespace['__dir__'] = __dir__
+    namespace['__all__'] = _get_public(
+        names() if names is not None else _get_specs())
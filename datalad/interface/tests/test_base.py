@@ -11,7 +11,15 @@
 """
 
 import mock
+from os.path import exists
 from datalad.tests.utils import *
+from datalad.tests.utils import (
+    assert_false,
+    assert_in,
+    assert_true,
+    eq_,
+    with_tempfile,
+)
 from datalad.utils import updated
 from ..base import (
     Interface,
@@ -151,4 +159,28 @@ def test_nagen():
 def test_nadict():
     d = nadict({1: 2})
     eq_(d[1], 2)
-    eq_(str(d[2]), NA_STRING)
\ No newline at end of file
+    eq_(str(d[2]), NA_STRING)
+
+
+@with_tempfile
+def test_command_registry(path):
+    from datalad.interface import registry
+    from datalad.support.json_py import load
+    with mock.patch.object(registry, '_get_registry_path', lambda: path):
+        groups = registry.get_command_registry()
+        assert_true(exists(path))
+        cmds = {c['api_name']: c for _, _, cs in groups for c in cs}
+        eq_(cmds['create']['cmd_name'], 'create')
+        eq_(cmds['create_sibling_github']['cmd_name'],
+            'create-sibling-github')
+        # plugins are named after their class
+        assert_in('wtf', cmds)
+        # reloaded from disk, no interface imported
+        with mock.patch.object(registry, '_get_command_record') as rec:
+            eq_(registry.get_command_registry(), groups)
+            assert_false(rec.called)
+        # a different key causes regeneration
+        with mock.patch.object(registry, '_get_registry_key',
+                               lambda groups: 'other'):
+            eq_(registry.get_command_registry(), groups)
+        eq_(load(path)['key'], 'other')
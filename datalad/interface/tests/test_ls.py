@@ -29,7 +29,7 @@ from ...tests.utils import use_cassette
 from ...tests.utils import with_tempfile
 from ...tests.utils import skip_if_no_network
 from ..ls import LsFormatter
-from os.path import relpath
+from os.path import join as opj, relpath
 from os import mkdir
 
 from datalad.downloaders.tests.utils import get_test_providers
@@ -125,3 +125,34 @@ def test_ls_formatter():
             formatter = LsFormatter()
             assert_equal(formatter.OK, OK)
             assert_in(OK, formatter.convert_field(True, 'X'))
+
+
+@with_tempfile
+def test_ls_recursive_parallel(path):
+    ds = Dataset(path).create(no_annex=True)
+    subs = ['sub%d' % i for i in range(5)]
+    for sub in subs:
+        ds.create(sub, no_annex=True)
+    ds.repo.tag('v1')
+    sub = Dataset(opj(path, 'sub2'))
+    sub.repo.checkout('HEAD', options=['--detach'])
+    with open(opj(sub.path, 'untracked'), 'w') as f:
+        f.write('dirty')
+
+    outs = []
+    for jobs in (1, 3):
+        ds.config.set('datalad.ls.jobs', str(jobs), where='local')
+        with swallow_outputs() as cmo:
+            ls(path, recursive=True)
+            outs.append(cmo.out)
+    # the same rows, in the same order, regardless of parallelism
+    assert_equal(outs[0], outs[1])
+    rows = outs[0].splitlines()
+    assert_equal([r.split()[0] for r in rows], [path] + [opj(path, s) for s in subs])
+    top = rows[0].split()
+    assert_equal(top[2:4], ['master', 'v1'])
+    sub2 = rows[3].split()
+    # detached HEAD has no branch, and the untracked file makes it dirty
+    assert_equal(sub2[2], '-')
+    assert_equal(sub2[-1], 'X')
+    assert_equal(rows[1].split()[-1], 'OK')
@@ -10,17 +10,18 @@
 import hashlib
 import json as js
 import logging
+import os
 from genericpath import exists
 from datalad.tests.utils import (
     assert_equal, assert_raises, assert_in, assert_false,
-    assert_not_in, ok_startswith,
+    assert_not_in, ok_, ok_startswith,
     serve_path_via_http,
 )
 from os.path import join as opj
 
 from datalad.distribution.dataset import Dataset
 from datalad.interface.ls_webui import machinesize, ignored, fs_traverse, \
-    _ls_json, UNKNOWN_SIZE
+    metadata_locator, _ls_json, UNKNOWN_SIZE, _get_annexinfo
 from datalad.support.annexrepo import AnnexRepo
 from datalad.support.gitrepo import GitRepo
 from datalad.tests.utils import with_tree
@@ -271,3 +272,73 @@ def test_ls_json(topdir, topurl):
                 assert_equal(
                     topds_nodes['fromweb']['size']['total'], UNKNOWN_SIZE
                 )
+
+
+@with_tree(
+    tree={'dir': {'subdir': {'file1.txt': '1' * 1500,
+                             'file2.txt': '2' * 1500}},
+          'topfile.txt': '123'})
+def test_fs_traverse_incremental(topdir):
+    repo = GitRepo(topdir, create=True)
+    repo.add('.')
+    repo.commit('add')
+
+    fs = fs_traverse(topdir, repo, recurse_directories=True, json='file',
+                     jobs=1)
+    # sizes are summed up as numbers, and humanized only in the end
+    assert_equal(fs['size']['total'], '3.0 kB')
+    child = [item for item in fs['nodes'] if item['name'] == 'dir'][0]
+    assert_equal(child['size']['total'], '3.0 kB')
+    # parallel traversal leads to the same
+    assert_equal(
+        fs_traverse(topdir, repo, recurse_directories=True, json='file',
+                    jobs=3),
+        fs)
+
+    metapaths = {
+        p: metadata_locator(path=p, ds_path=topdir)
+        for p in ('.', 'dir', opj('dir', 'subdir'))}
+    # make sure a rewrite would be detected
+    for metapath in metapaths.values():
+        os.utime(metapath, (0, 0))
+    fs_traverse(topdir, repo, recurse_directories=True, json='file')
+    # nothing changed, nothing rewritten
+    for metapath in metapaths.values():
+        assert_equal(os.stat(metapath).st_mtime, 0)
+
+    with open(opj(topdir, 'dir', 'subdir', 'file3.txt'), 'w') as f:
+        f.write('3' * 1000)
+    fs_traverse(topdir, repo, recurse_directories=True, json='file')
+    for metapath in metapaths.values():
+        ok_(os.stat(metapath).st_mtime > 0)
+    with open(metapaths['.']) as f:
+        assert_equal(js.load(f)['size']['total'], '4.0 kB')
+
+
+@with_tree(
+    tree={'dir': {'annexed.dat': '1' * 1500,
+                  'dropped.dat': '2' * 1000},
+          'ingit.txt': '123'})
+def test_fs_traverse_annexed(topdir):
+    repo = AnnexRepo(topdir, create=True)
+    repo.add('dir', git=False)
+    repo.add('ingit.txt', git=True)
+    repo.commit('add')
+    repo.drop(opj('dir', 'dropped.dat'), options=['--force'])
+
+    # a single query reports all annexed files, but nothing else
+    info = _get_annexinfo(repo, ['.'])
+    assert_equal(sorted(info),
+                 [opj('dir', 'annexed.dat'), opj('dir', 'dropped.dat')])
+    ok_(info[opj('dir', 'annexed.dat')]['has_content'])
+    assert_false(info[opj('dir', 'dropped.dat')]['has_content'])
+    assert_equal(_get_annexinfo(repo, ['ingit.txt']), {})
+
+    for jobs in (1, 3):
+        fs = fs_traverse(topdir, repo, recurse_directories=True,
+                         json='file', jobs=jobs)
+        assert_equal(fs['size']['total'], '2.5 kB')
+        assert_equal(fs['size']['ondisk'], '1.5 kB')
+        child = [item for item in fs['nodes'] if item['name'] == 'dir'][0]
+        assert_equal(child['size']['total'], '2.5 kB')
+        assert_equal(child['size']['ondisk'], '1.5 kB')
@@ -11,6 +11,7 @@ import logging
 import os
 import sys
 import platform
+import time
 import logging.handlers
 
 from os.path import basename, dirname
@@ -269,6 +270,45 @@ def log_progress(lgrcall, pid, *args, **kwargs):
     increment : bool
       If set, `update` is interpreted as an incremental value, not absolute.
     """
+    logger = getattr(lgrcall, '__self__', None)
+    if not isinstance(logger, logging.Logger):
+        # some custom callable, cannot know where it is going
+        _log_progress(lgrcall, pid, args, kwargs)
+        return
+    level = _LOGGER_CALL_LEVELS.get(lgrcall.__name__)
+    if level is not None and not logger.isEnabledFor(level):
+        # no record would be logged anyway, do not even create it
+        return
+    state = _progress_states.get(pid)
+    update = kwargs.get('update')
+    if update is None:
+        # start or end of a process
+        if state is None:
+            _progress_states[pid] = _ProgressState(logger)
+        else:
+            # the last update needs to go out first
+            state.flush(pid)
+            _progress_states.pop(pid, None)
+        _log_progress(lgrcall, pid, args, kwargs)
+        return
+    if state is None:
+        state = _progress_states[pid] = _ProgressState(logger)
+    if not state.aggregate:
+        _log_progress(lgrcall, pid, args, kwargs)
+        return
+    if state.call is None or not kwargs.get('increment'):
+        state.update = update
+        state.increment = kwargs.get('increment', False)
+    else:
+        state.update += update
+    state.call = lgrcall, args, kwargs
+    now = time.time()
+    if now - state.last >= state.interval:
+        state.flush(pid)
+        state.last = now
+
+
+def _log_progress(lgrcall, pid, args, kwargs):
     d = dict(
         {'dlm_progress_{}'.format(n): v for n, v in kwargs.items()
          if v},
@@ -276,6 +316,70 @@ def log_progress(lgrcall, pid, *args, **kwargs):
     lgrcall(*args, extra=d)
 
 
+_LOGGER_CALL_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
+
+
+class _ProgressState(object):
+    """Aggregation of the updates of a process reported by log_progress
+
+    Updates are only aggregated when nothing but progress bars would
+    receive them, so no message that would be logged otherwise is lost.
+    An aggregated update is reported with the message and other arguments
+    of the last `log_progress` call it comprises.
+    """
+
+    __slots__ = ['aggregate', 'interval', 'last', 'call', 'update',
+                 'increment']
+
+    def __init__(self, logger):
+        from datalad import cfg
+        self.aggregate = _has_progress_handler(logger)
+        self.interval = cfg.obtain('datalad.log.progress-interval')
+        # time of the last update that was passed on
+        self.last = 0
+        # the last log_progress call, and the update which was not passed
+        # on yet
+        self.call = None
+        self.update = None
+        self.increment = False
+
+    def flush(self, pid):
+        if self.call is None:
+            return
+        lgrcall, args, kwargs = self.call
+        self.call = None
+        _log_progress(
+            lgrcall, pid, args,
+            dict(kwargs, update=self.update, increment=self.increment))
+
+
+# pid -> _ProgressState of processes that report their progress
+_progress_states = {}
+
+
+def _has_progress_handler(logger):
+    """Whether progress records of a logger are only routed to progress bars
+    """
+    progress = False
+    while logger:
+        for h in logger.handlers:
+            if not isinstance(h, ProgressHandler) and not any(
+                    isinstance(f, NoProgressLog) for f in h.filters):
+                # the record would be logged as is
+                return False
+            progress = progress or isinstance(h, ProgressHandler)
+        if not logger.propagate:
+            break
+        logger = logger.parent
+    return progress
+
+
 @optional_args
 def with_result_progress(fn, label="Total", unit=" Files"):
     """Wrap a progress bar, with status counts, around a function.
@@ -8,6 +8,72 @@
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 """Metadata extractor base class"""
 
+from collections import deque
+from multiprocessing.pool import ThreadPool
+from os.path import join as opj
+
+
+def _process_chunk(func, root, chunk):
+    return [(f, func(opj(root, f))) for f in chunk]
+
+
+def iter_paths_parallel(func, root, paths, jobs=1, chunksize=16):
+    """Apply `func` to files underneath `root`, possibly in parallel
+
+    Files are processed in chunks on a pool of worker threads (content
+    extraction is typically bound by per-file I/O latency, not CPU).
+    Results are yielded in the order of `paths` as soon as they become
+    available, and only a bounded number of chunks is in flight at any
+    time, so memory consumption does not grow with the number of paths.
+
+    Parameters
+    ----------
+    func : callable
+      Called with the absolute path of a file. Any exception it raises
+      is propagated to the consumer of the generator.
+    root : str
+      Path the (relative) `paths` are anchored at.
+    paths : iterable
+      Relative paths to process.
+    jobs : int
+      Number of worker threads. With 1 (or less) all files are processed
+      serially in the calling thread.
+    chunksize : int
+      Number of files handed to a worker at once.
+
+    Returns
+    -------
+    generator((path, result))
+    """
+    if jobs is None or jobs <= 1:
+        for f in paths:
+            yield f, func(opj(root, f))
+        return
+
+    pool = ThreadPool(jobs)
+    try:
+        pending = deque()
+        chunk = []
+        for f in paths:
+            chunk.append(f)
+            if len(chunk) < chunksize:
+                continue
+            pending.append(pool.apply_async(_process_chunk, (func, root, chunk)))
+            chunk = []
+            if len(pending) >= 2 * jobs:
+                # keep the workers busy, but do not run ahead of the consumer
+                for res in pending.popleft().get():
+                    yield res
+        if chunk:
+            pending.append(pool.apply_async(_process_chunk, (func, root, chunk)))
+        while pending:
+            for res in pending.popleft().get():
+                yield res
+    finally:
+        # also reached when the consumer stops iterating early
+        pool.terminate()
+        pool.join()
+
 
 class BaseMetadataExtractor(object):
 
@@ -26,6 +92,19 @@ class BaseMetadataExtractor(object):
         self.ds = ds
         self.paths = paths
 
+    def _iter_paths(self, func, paths=None):
+        """Yield `(path, func(abspath))` for all paths of the extractor
+
+        Files are processed in parallel, according to the
+        'datalad.metadata.extractor-jobs' configuration of the dataset.
+        If `paths` is given, it is processed instead of `self.paths`.
+        """
+        return iter_paths_parallel(
+            func,
+            self.ds.path,
+            self.paths if paths is None else paths,
+            jobs=self.ds.config.obtain('datalad.metadata.extractor-jobs'))
+
     def get_metadata(self, dataset=True, content=True):
         """
         Returns
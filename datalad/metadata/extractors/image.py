@@ -8,7 +8,6 @@
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 """generic image metadata extractor"""
 
-from os.path import join as opj
 import logging
 lgr = logging.getLogger('datalad.metadata.extractors.image')
 from datalad.log import log_progress
@@ -57,7 +56,12 @@ class MetadataExtractor(BaseMetadataExtractor):
     def get_metadata(self, dataset, content):
         if not content:
             return {}, []
-        contentmeta = []
+        return {
+            '@context': vocabulary,
+        }, \
+            self._get_content_metadata()
+
+    def _get_content_metadata(self):
         log_progress(
             lgr.info,
             'extractorimage',
@@ -66,37 +70,37 @@ class MetadataExtractor(BaseMetadataExtractor):
             label='image metadata extraction',
             unit=' Files',
         )
-        for f in self.paths:
-            absfp = opj(self.ds.path, f)
+        for f, meta in self._iter_paths(self._get_file_metadata):
             log_progress(
                 lgr.info,
                 'extractorimage',
-                'Extract image metadata from %s', absfp,
+                'Extracted image metadata from %s', f,
                 update=1,
                 increment=True)
-            try:
-                img = Image.open(absfp)
-            except Exception as e:
-                lgr.debug("Image metadata extractor failed to load %s: %s",
-                          absfp, exc_str(e))
-                continue
-            meta = {
-                'type': 'dctype:Image',
-            }
-
-            # run all extractors
-            meta.update({k: v(img) for k, v in self._extractors.items()})
-            # filter useless fields (empty strings and NaNs)
-            meta = {k: v for k, v in meta.items()
-                    if not (hasattr(v, '__len__') and not len(v))}
-            contentmeta.append((f, meta))
+            if meta is not None:
+                yield f, meta
 
         log_progress(
             lgr.info,
             'extractorimage',
             'Finished image metadata extraction from %s', self.ds
         )
-        return {
-            '@context': vocabulary,
-        }, \
-            contentmeta
+
+    def _get_file_metadata(self, absfp):
+        try:
+            # opening is lazy, only the image header is read
+            img = Image.open(absfp)
+        except Exception as e:
+            lgr.debug("Image metadata extractor failed to load %s: %s",
+                      absfp, exc_str(e))
+            return None
+        with img:
+            meta = {
+                'type': 'dctype:Image',
+            }
+
+            # run all extractors
+            meta.update({k: v(img) for k, v in self._extractors.items()})
+        # filter useless fields (empty strings and NaNs)
+        return {k: v for k, v in meta.items()
+                if not (hasattr(v, '__len__') and not len(v))}
@@ -10,10 +10,13 @@
 
 from pkg_resources import iter_entry_points
 from inspect import isgenerator
+from os.path import join as opj
 from datalad.api import Dataset
 from datalad.utils import on_osx
+from datalad.metadata.extractors.base import iter_paths_parallel
 from datalad.tests.utils import with_tree
 from datalad.tests.utils import ok_clean_git
+from datalad.tests.utils import assert_raises
 
 from nose import SkipTest
 from nose.tools import assert_equal
@@ -79,3 +82,28 @@ def test_api_git():
 
 def test_api_annex():
     yield check_api, False
+
+
+def test_iter_paths_parallel():
+    paths = ['f%i' % i for i in range(100)]
+    target = [(p, opj('root', p)) for p in paths]
+    for jobs in (1, 2, 5):
+        for chunksize in (1, 3, 200):
+            res = iter_paths_parallel(
+                lambda x: x, 'root', paths, jobs=jobs, chunksize=chunksize)
+            assert isgenerator(res)
+            # order of the input is preserved
+            assert_equal(list(res), target)
+    # stopping early does not blow
+    res = iter_paths_parallel(lambda x: x, 'root', paths, jobs=4, chunksize=2)
+    assert_equal(next(res), target[0])
+    res.close()
+
+    # errors come through to the consumer
+    def fail(p):
+        if p.endswith('f42'):
+            raise ValueError(p)
+        return p
+    for jobs in (1, 3):
+        with assert_raises(ValueError):
+            list(iter_paths_parallel(fail, 'root', paths, jobs=jobs))
@@ -429,6 +429,62 @@ def _ok_metadata(meta, mtype, ds, loc):
     return False
 
 
+def _iter_content_metadata(contentmeta, mtype, ds, failures):
+    """Yield the content metadata of an extractor, until it fails
+
+    Extractors can produce their content metadata lazily, so errors can
+    also come up while it is consumed.  These are handled like errors of
+    the `get_metadata()` call: unless `datalad.runtime.raiseonerror` is
+    set, the error is logged and appended to `failures`, and the metadata
+    reported so far is kept.
+    """
+    try:
+        for loc, meta in contentmeta or {}:
+            yield loc, meta
+    except Exception as e:
+        lgr.error('Failed to get content metadata ({}): {}'.format(
+            mtype, exc_str(e)))
+        if cfg.get('datalad.runtime.raiseonerror'):
+            log_progress(
+                lgr.error,
+                'metadataextractors',
+                'Failed %s metadata extraction from %s', mtype, ds,
+            )
+            raise
+        failures.append(e)
+
+
+def _get_paths_without_content(repo, paths):
+    """Determine which annexed files among `paths` have no content present
+
+    Parameters
+    ----------
+    repo : AnnexRepo
+    paths : list
+      Paths relative to the repository root.
+
+    Returns
+    -------
+    set
+      Subset of `paths`.
+    """
+    if repo.is_direct_mode():
+        # content location needs to be inspected by git-annex itself
+        # Ugly? Jep: #2055
+        return set(
+            p for p, c, a in zip(paths,
+                                 repo.file_has_content(paths),
+                                 repo.is_under_annex(paths))
+            if a and not c)
+    # a single query tells which files are annexed (those that come with
+    # a record) and whether their content is present
+    info = repo.get_content_annexinfo(
+        paths=paths, init=None, eval_availability=True)
+    return set(
+        p for p in paths
+        if not info.get(repo.pathobj / p, {}).get('has_content', True))
+
+
 def _get_metadata(ds, types, global_meta=None, content_meta=None, paths=None):
     """Make a direct query of a dataset to extract its metadata.
 
@@ -452,18 +508,16 @@ def _get_metadata(ds, types, global_meta=None, content_meta=None, paths=None):
 
     fullpathlist = paths
     if paths and isinstance(ds.repo, AnnexRepo):
-        # Ugly? Jep: #2055
-        content_info = zip(paths, ds.repo.file_has_content(paths), ds.repo.is_under_annex(paths))
-        paths = [p for p, c, a in content_info if not a or c]
-        nocontent = len(fullpathlist) - len(paths)
+        nocontent = _get_paths_without_content(ds.repo, paths)
         if nocontent:
+            paths = [p for p in paths if p not in nocontent]
             # TODO better fail, or support incremental and label this file as no present
             lgr.warn(
                 '{} files have no content present, '
                 'some extractors will not operate on {}'.format(
-                    nocontent,
-                    'them' if nocontent > 10
-                           else [p for p, c, a in content_info if not c and a])
+                    len(nocontent),
+                    'them' if len(nocontent) > 10
+                           else sorted(nocontent))
             )
 
     # pull out potential metadata field blacklist config settings
@@ -567,7 +621,9 @@ def _get_metadata(ds, types, global_meta=None, content_meta=None, paths=None):
         #     label='Metadata extraction per location',
         #     unit=' locations',
         # )
-        for loc, meta in contentmeta_t or {}:
+        failures = []
+        for loc, meta in _iter_content_metadata(
+                contentmeta_t, mtype, ds, failures):
             lgr.log(5, "Analyzing metadata for %s", loc)
             # log_progress(
             #     lgr.debug,
@@ -636,6 +692,8 @@ def _get_metadata(ds, types, global_meta=None, content_meta=None, paths=None):
                     vset.add(_val2hashable(v))
                     unique_cm[k] = vset
 
+        if failures:
+            errored = True
         # log_progress(
         #     lgr.debug,
         #     'metadataextractors_loc',
@@ -23,6 +23,8 @@ from datalad.metadata.metadata import (
     get_metadata_type,
     query_aggregated_metadata,
     _get_containingds_from_agginfo,
+    _get_paths_without_content,
+    _iter_content_metadata,
 )
 from datalad.utils import chpwd
 from datalad.utils import assure_unicode
@@ -38,6 +40,7 @@ from datalad.tests.utils import ok_file_has_content
 from datalad.tests.utils import ok_
 from datalad.tests.utils import swallow_logs
 from datalad.tests.utils import assert_re_in
+from datalad.tests.utils import patch_config
 from datalad.support.exceptions import InsufficientArgumentsError
 from datalad.support.exceptions import NoDatasetArgumentFound
 from datalad.support.gitrepo import GitRepo
@@ -248,6 +251,38 @@ def test_bf2458(src, dst):
     eq_(clone.repo.whereis('dummy'), [ds.config.get('annex.uuid')])
 
 
+@with_tree({'dummy': 'content', 'dropped': 'more', 'ingit': 'text'})
+def test_get_paths_without_content(path):
+    ds = Dataset(path).create(force=True)
+    ds.save(['dummy', 'dropped'], to_git=False)
+    ds.save('ingit', to_git=True)
+    ds.drop('dropped', check=False)
+    eq_(_get_paths_without_content(ds.repo, ['dummy', 'dropped', 'ingit']),
+        {'dropped'})
+    eq_(_get_paths_without_content(ds.repo, ['dummy', 'ingit']), set())
+
+
+def test_iter_content_metadata():
+    def lazy_meta():
+        yield 'good', {'some': 'meta'}
+        raise IOError('corrupt file')
+
+    failures = []
+    with swallow_logs(new_level=logging.ERROR) as cml, \
+            patch_config({'datalad.runtime.raiseonerror': ''}):
+        eq_(list(_iter_content_metadata(lazy_meta(), 'dummy', None, failures)),
+            [('good', {'some': 'meta'})])
+        assert_in('corrupt file', cml.out)
+    eq_(len(failures), 1)
+
+    with swallow_logs(new_level=logging.ERROR), \
+            patch_config({'datalad.runtime.raiseonerror': 'yes'}):
+        assert_raises(
+            IOError, list,
+            _iter_content_metadata(lazy_meta(), 'dummy', None, []))
+    eq_(list(_iter_content_metadata(None, 'dummy', None, failures)), [])
+
+
 def test_get_containingds_from_agginfo():
     eq_(None, _get_containingds_from_agginfo({}, 'any'))
     # direct hit returns itself
@@ -69,7 +69,8 @@ class CheckDates(Interface):
     from datalad.distribution.dataset import datasetmethod
     from datalad.interface.utils import eval_results
     import datalad.support.ansi_colors as ac
-    from datalad.support.constraints import EnsureChoice, EnsureNone, EnsureStr
+    from datalad.support.constraints import EnsureChoice, EnsureInt, \
+        EnsureNone, EnsureStr
     from datalad.support.param import Parameter
 
     result_renderer = "tailored"
@@ -138,6 +139,13 @@ class CheckDates(Interface):
             action="store_true",
             doc="""Find dates which are older than the reference date rather
             than newer."""),
+        jobs=Parameter(
+            args=("-J", "--jobs"),
+            metavar="NJOBS",
+            doc="""number of worker processes to search the content of
+            "git-annex" blobs for dates with. By default, they are searched
+            in the main process.""",
+            constraints=EnsureInt() | EnsureNone()),
     )
 
     @staticmethod
@@ -147,7 +155,8 @@ class CheckDates(Interface):
                  revs=None,
                  annex="all",
                  no_tags=False,
-                 older=False):
+                 older=False,
+                 jobs=None):
         from datalad.support.repodates import check_dates
 
         which = "older" if older else "newer"
@@ -177,7 +186,8 @@ class CheckDates(Interface):
                                      annex={"all": True,
                                             "none": False,
                                             "tree": "tree"}[annex],
-                                     tags=not no_tags)
+                                     tags=not no_tags,
+                                     jobs=jobs)
             except InvalidGitRepositoryError as exc:
                 lgr.warning("Skipping invalid Git repo: %s", repo)
                 continue
@@ -10,15 +10,252 @@
 
 __docformat__ = 'restructuredtext'
 
+from contextlib import contextmanager
+
 from datalad.interface.base import Interface
 from datalad.interface.base import build_doc
 from datalad.support import path
 
+
+@contextmanager
+def _open_archive(filename, archivetype, compression, jobs, mtime):
+    """Open an archive for writing
+
+    TAR archives are compressed in parallel blocks by `jobs` threads.
+    """
+    import tarfile
+    import zipfile
+    from datalad.support.compression import BlockCompressor
+
+    if archivetype == 'zip':
+        with zipfile.ZipFile(
+                filename, 'w',
+                zipfile.ZIP_STORED if not compression else zipfile.ZIP_DEFLATED) \
+                as archive:
+            yield archive
+        return
+    with open(filename, 'wb') as f:
+        if not compression:
+            with tarfile.open(fileobj=f, mode='w|') as archive:
+                yield archive
+            return
+        with BlockCompressor(f, compression, jobs=jobs, mtime=mtime) as cf, \
+                tarfile.open(fileobj=cf, mode='w|') as archive:
+            yield archive
+
+
+def _get_content_availability(repo, files):
+    """Return whether `files` are annexed and whether their content is present
+    """
+    from datalad.support.annexrepo import AnnexRepo
+
+    if not isinstance(repo, AnnexRepo):
+        return [False] * len(files), [True] * len(files)
+    if repo.is_direct_mode():
+        annexed = repo.is_under_annex(
+            files, allow_quick=True, batch=True)
+        # remember: returns False for files in Git!
+        has_content = repo.file_has_content(
+            files, allow_quick=True, batch=True)
+        return annexed, has_content
+    # a single query tells which files are annexed (those that come with
+    # a record) and whether their content is present
+    info = repo.get_content_annexinfo(init=None, eval_availability=True)
+    info = [info.get(repo.pathobj / f, {}) for f in files]
+    return ['key' in r for r in info], [r.get('has_content', False) for r in info]
+
+
+def _get_tree(repo, ref):
+    """Yield (MODE, TYPE, SHA, SIZE, PATH) of all entries in the tree of `ref`
+    """
+    from six import text_type
+    from datalad.support.exceptions import (
+        CommandError,
+        InvalidGitReferenceError,
+    )
+    try:
+        stdout, stderr = repo._git_custom_command(
+            None,
+            ['git', 'ls-tree', '-r', '-z', '-l', '--full-tree', ref],
+            expect_fail=True)
+    except CommandError as exc:
+        if "Not a valid object name" in text_type(exc):
+            raise InvalidGitReferenceError(ref)
+        raise
+    for line in stdout.split('\0'):
+        if not line:
+            continue
+        props, path = line.split('\t', 1)
+        mode, type_, sha, size = props.split()
+        yield mode, type_, sha, None if size == '-' else int(size), path
+
+
+def _get_last_commit_dates(repo, ref, paths):
+    """Return the authored dates of the last commits changing the `paths`
+
+    The history of `ref` is walked by a single `git log` process, only until
+    all `paths` are found.  Only the first-parent history is considered, and
+    a merge commit changes all paths that differ from its first parent, so
+    changes brought in by a merge get the date of the merge.
+
+    Returns
+    -------
+    dict
+      Dates under the paths.
+    """
+    import subprocess
+    from datalad.cmd import GitRunner
+    from datalad.utils import assure_unicode
+
+    todo = set(paths)
+    dates = {}
+    # with -z every commit starts with an empty item, followed by the date
+    # and the paths, the first one after a newline
+    process = subprocess.Popen(
+        ['git', 'log', '--format=%x00%at', '--name-only', '-z',
+         '--no-renames', '--first-parent', '-m', ref, '--'],
+        stdout=subprocess.PIPE,
+        cwd=repo.path,
+        env=GitRunner.get_git_environ_adjusted())
+    try:
+        date = None
+        expect = None
+        rest = b''
+        for chunk in iter(lambda: process.stdout.read(65536), b''):
+            items = (rest + chunk).split(b'\0')
+            rest = items.pop()
+            for item in items:
+                if not item:
+                    expect = 'date'
+                elif expect == 'date':
+                    date = int(item)
+                    expect = 'first path'
+                else:
+                    if expect == 'first path':
+                        item = item[1:] if item.startswith(b'\n') else item
+                        expect = None
+                    path = assure_unicode(item)
+                    if path in todo:
+                        todo.discard(path)
+                        dates[path] = date
+            if not todo:
+                break
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.terminate()
+        process.wait()
+    return dates
+
+
+def _add_stream(archive, archivetype, name, fileobj, size, mode, mtime,
+                linkname=None):
+    """Add a file (or a symlink) with the content read from `fileobj`"""
+    import shutil
+    import stat
+    import tarfile
+    import time
+    import zipfile
+
+    if archivetype == 'tar':
+        ti = tarfile.TarInfo(name)
+        ti.mode = mode
+        ti.mtime = mtime
+        if linkname is not None:
+            ti.type = tarfile.SYMTYPE
+            ti.linkname = linkname
+            archive.addfile(ti)
+        else:
+            ti.size = size
+            archive.addfile(ti, fileobj)
+        return
+    zi = zipfile.ZipInfo(name, time.localtime(mtime)[:6])
+    zi.compress_type = archive.compression
+    if linkname is not None:
+        # the way Info-ZIP stores symlinks
+        zi.external_attr = (stat.S_IFLNK | mode) << 16
+        archive.writestr(zi, linkname)
+        return
+    zi.external_attr = (stat.S_IFREG | mode) << 16
+    zi.file_size = size
+    try:
+        dst = archive.open(zi, 'w')
+    except (TypeError, ValueError, RuntimeError):
+        # no streaming before Python 3.6
+        archive.writestr(zi, fileobj.read())
+        return
+    with dst:
+        shutil.copyfileobj(fileobj, dst, 1024 ** 2)
+
+
+def _add_ref_content(archive, archivetype, repo, ref, leading_dir,
+                     missing_content, lgr):
+    """Add the content of the tree of `ref` without using the worktree
+
+    Blobs are streamed from Git, annexed content is read from the local
+    annex.  Files get the date of the last commit that changed them.  Unlike
+    files added from the worktree, TAR members are owned by uid/gid 0 without
+    user/group names, as there are no files to take these from.
+    """
+    import os
+    import posixpath
+    import tarfile
+    from datalad.support.annexrepo import AnnexRepo
+    from datalad.support.gitrepo import BatchedCatFile
+
+    tree = sorted(_get_tree(repo, ref), key=lambda e: e[4])
+    annexinfo = repo.get_content_annexinfo(
+        ref=ref, init=None, eval_availability=True) \
+        if isinstance(repo, AnnexRepo) else {}
+    dates = _get_last_commit_dates(repo, ref, [e[4] for e in tree])
+    cat_file = BatchedCatFile(repo.path)
+    try:
+        for mode, type_, sha, size, rpath in tree:
+            aname = posixpath.normpath(posixpath.join(leading_dir, rpath))
+            mtime = dates.get(rpath, 0)
+            if type_ == 'commit':
+                # subdataset, only its mount point
+                if archivetype == 'tar':
+                    ti = tarfile.TarInfo(aname)
+                    ti.type = tarfile.DIRTYPE
+                    ti.mode = 0o755
+                    ti.mtime = mtime
+                    archive.addfile(ti)
+                continue
+            info = annexinfo.get(repo.pathobj / rpath, {})
+            if 'key' in info:
+                if not info.get('has_content'):
+                    if missing_content in ('ignore', 'continue'):
+                        (lgr.warning if missing_content == 'continue' else lgr.debug)(
+                            'File %s has no content available, skipped', rpath)
+                        continue
+                    else:
+                        raise IOError('File %s has no content available' % rpath)
+                objloc = info['objloc']
+                with open(objloc, 'rb') as f:
+                    _add_stream(
+                        archive, archivetype, aname, f,
+                        os.fstat(f.fileno()).st_size,
+                        os.fstat(f.fileno()).st_mode & 0o777,
+                        mtime)
+                continue
+            _, _, size, content = cat_file(sha)
+            if mode == '120000':
+                _add_stream(archive, archivetype, aname, None, 0, 0o777, mtime,
+                            linkname=content.read().decode('utf-8'))
+            else:
+                _add_stream(archive, archivetype, aname, content, size,
+                            0o755 if mode == '100755' else 0o644, mtime)
+    finally:
+        cat_file.close()
+
+
 @build_doc
 class ExportArchive(Interface):
     """Export the content of a dataset as a TAR/ZIP archive.
     """
     from datalad.support.param import Parameter
+    from datalad.interface.common_opts import jobs_opt
     from datalad.distribution.dataset import datasetmethod
     from datalad.interface.utils import eval_results
     from datalad.distribution.dataset import EnsureDataset
@@ -51,10 +288,13 @@ class ExportArchive(Interface):
             constraints=EnsureChoice("tar", "zip")),
         compression=Parameter(
             args=("-c", "--compression"),
-            doc="""Compression method to use.  'bz2' is not supported for ZIP
-            archives.  No compression is used when an empty string is
-            given.""",
-            constraints=EnsureChoice("gz", "bz2", "")),
+            doc="""Compression method to use.  'bz2' and 'xz' are not
+            supported for ZIP archives.  No compression is used when an empty
+            string is given.  TAR archives are compressed in parallel (see
+            [CMD: --jobs CMD][PY: `jobs` PY]) into standard files, e.g. a
+            'gz' compressed archive is a single gzip stream as produced by
+            `pigz`.""",
+            constraints=EnsureChoice("gz", "bz2", "xz", "")),
         missing_content=Parameter(
             args=("--missing-content",),
             doc="""By default, any discovered file with missing content will
@@ -65,23 +305,34 @@ class ExportArchive(Interface):
             from a dataset where some file content is not available
             locally.""",
             constraints=EnsureChoice("error", "continue", "ignore")),
+        ref=Parameter(
+            args=("--ref",),
+            metavar="COMMITISH",
+            doc="""export the state of the dataset at this commit (or any
+            other reference to it), instead of its present state.  No
+            checkout is needed: file content tracked by Git is read from the
+            repository, and annexed content from the local annex.  Files get
+            the date of the last commit that changed them (on the
+            first-parent history, so changes brought in by a merge get the
+            date of the merge) rather than the date of the commit, and
+            in TAR archives they are owned by uid/gid 0 rather than by the
+            owner of the files in the worktree.""",
+            constraints=EnsureStr() | EnsureNone()),
+        jobs=jobs_opt,
     )
 
     @staticmethod
     @datasetmethod(name='export_archive')
     @eval_results
     def __call__(dataset, filename=None, archivetype='tar', compression='gz',
-                 missing_content='error'):
+                 missing_content='error', ref=None, jobs='auto'):
         import os
-        import tarfile
-        import zipfile
         from mock import patch
         from os.path import join as opj, dirname, normpath, isabs
         import os.path as op
 
         from datalad.distribution.dataset import require_dataset
         from datalad.utils import file_basename
-        from datalad.support.annexrepo import AnnexRepo
         from datalad.dochelpers import exc_str
 
         import logging
@@ -91,7 +342,13 @@ class ExportArchive(Interface):
                                   purpose='export archive')
 
         repo = dataset.repo
-        committed_date = repo.get_commit_date()
+        if ref:
+            if not repo.commit_exists(ref):
+                raise ValueError(
+                    "Cannot export %s: no such commit in %s" % (ref, dataset))
+            committed_date = int(repo.format_commit('%at', ref))
+        else:
+            committed_date = repo.get_commit_date()
 
         # could be used later on to filter files by some criterion
         def _filter_tarinfo(ti):
@@ -126,23 +383,19 @@ class ExportArchive(Interface):
 
         # workaround for inability to pass down the time stamp
         with patch('time.time', return_value=committed_date), \
-                tarfile.open(filename, "w:{}".format(compression)) \
-                if archivetype == 'tar' \
-                else zipfile.ZipFile(
-                    filename, 'w',
-                    zipfile.ZIP_STORED if not compression else zipfile.ZIP_DEFLATED) \
-                as archive:
+                _open_archive(filename, archivetype, compression,
+                              None if jobs == 'auto' else jobs,
+                              committed_date) as archive:
             add_method = archive.add if archivetype == 'tar' else archive.write
-            repo_files = sorted(repo.get_indexed_files())
-            if isinstance(repo, AnnexRepo):
-                annexed = repo.is_under_annex(
-                    repo_files, allow_quick=True, batch=True)
-                # remember: returns False for files in Git!
-                has_content = repo.file_has_content(
-                    repo_files, allow_quick=True, batch=True)
+            if ref:
+                _add_ref_content(archive, archivetype, repo, ref, leading_dir,
+                                 missing_content, lgr)
+                # nothing is taken from the worktree
+                repo_files = []
             else:
-                annexed = [False] * len(repo_files)
-                has_content = [True] * len(repo_files)
+                repo_files = sorted(repo.get_indexed_files())
+                annexed, has_content = _get_content_availability(
+                    repo, repo_files)
             for i, rpath in enumerate(repo_files):
                 fpath = opj(root, rpath)
                 if annexed[i]:
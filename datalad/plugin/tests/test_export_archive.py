@@ -15,8 +15,12 @@ from os.path import join as opj
 from os.path import isabs
 import tarfile
 
+from six import PY2
+
 from datalad.api import Dataset
 from datalad.api import export_archive
+from datalad.plugin.export_archive import _get_last_commit_dates
+from datalad.support.gitrepo import GitRepo
 from datalad.utils import chpwd
 from datalad.utils import md5sum
 
@@ -109,3 +113,136 @@ def test_zip_archive(path):
     ds.export_archive(filename=ds.path, archivetype='zip')
     default_name = 'datalad_{}.zip'.format(ds.id)
     assert_true(os.path.exists(os.path.join(ds.path, default_name)))
+
+
+@with_tree(_dataset_template)
+def test_tar_compressions(path):
+    ds = Dataset(opj(path, 'ds')).create(force=True, no_annex=True)
+    ds.save()
+    for compression in ('bz2', 'xz', ''):
+        if compression == 'xz' and PY2:
+            # no lzma module
+            continue
+        outname = opj(path, 'my.tar' + ('.' if compression else '') +
+                      compression)
+        ds.export_archive(filename=opj(path, 'my'), compression=compression)
+        md5 = md5sum(outname)
+        with tarfile.open(outname) as tf:
+            assert_equal(
+                tf.extractfile('my/dir/file1_down').read(), b'one')
+        # the same archive, whatever the number of jobs
+        ds.export_archive(filename=opj(path, 'my'), compression=compression,
+                          jobs=2)
+        assert_equal(md5sum(outname), md5)
+
+
+@with_tree(_dataset_template)
+def test_archive_annexed(path):
+    ds = Dataset(opj(path, 'ds')).create(force=True)
+    ds.save(to_git=False)
+    assert_true(ds.repo.is_under_annex('file_up'))
+    outname = opj(path, 'my.tar.gz')
+    for jobs in (1, 2):
+        ds.export_archive(filename=opj(path, 'my'), jobs=jobs)
+        with tarfile.open(outname) as tf:
+            # content of annexed files, not the links
+            assert_false(tf.getmember('my/file_up').issym())
+            assert_equal(tf.extractfile('my/file_up').read(), b'some_content')
+            assert_equal(
+                tf.extractfile('my/dir/file1_down').read(), b'one')
+
+    ds.drop('file_up', check=False)
+    assert_raises(IOError, ds.export_archive, filename=opj(path, 'my'))
+    ds.export_archive(filename=opj(path, 'my'), missing_content='ignore')
+    with tarfile.open(outname) as tf:
+        assert_false('my/file_up' in tf.getnames())
+        assert_equal(tf.extractfile('my/dir/file2_down').read(), b'two')
+
+
+@with_tree(_dataset_template)
+def test_export_ref(path):
+    ds = Dataset(opj(path, 'ds')).create(force=True, no_annex=True)
+    ds.save()
+    first = ds.repo.get_hexsha()
+    first_date = ds.repo.get_commit_date()
+    time.sleep(1.1)
+    with open(opj(ds.path, 'file_up'), 'w') as f:
+        f.write('changed')
+    ds.save()
+    # the worktree does not matter
+    os.unlink(opj(ds.path, 'dir', 'file1_down'))
+
+    for archivetype in ('tar', 'zip'):
+        ds.export_archive(filename=opj(path, 'my'), ref=first,
+                          archivetype=archivetype)
+    with tarfile.open(opj(path, 'my.tar.gz')) as tf:
+        assert_equal(tf.extractfile('my/file_up').read(), b'some_content')
+        assert_equal(tf.extractfile('my/dir/file1_down').read(), b'one')
+        assert_equal(tf.getmember('my/file_up').mtime, first_date)
+
+    ds.export_archive(filename=opj(path, 'my'), ref='HEAD')
+    with tarfile.open(opj(path, 'my.tar.gz')) as tf:
+        assert_equal(tf.extractfile('my/file_up').read(), b'changed')
+        # files carry the date of the last commit changing them
+        assert_not_equal(tf.getmember('my/file_up').mtime, first_date)
+        assert_equal(tf.getmember('my/dir/file2_down').mtime, first_date)
+
+    assert_raises(ValueError, ds.export_archive, filename=opj(path, 'my'),
+                  ref='nonexistent')
+
+
+@with_tree({'a': 'a', 'b': 'b', 'c': 'c'})
+def test_last_commit_dates_merge(path):
+    repo = GitRepo(path, create=True)
+
+    def commit(f, date):
+        repo.add(f)
+        repo._git_custom_command(
+            None, ['git', 'commit', '-m', f, '--date=@%d' % date])
+
+    commit('a', 1000000000)
+    branch = repo.get_active_branch()
+    repo.checkout('side', options=['-b'])
+    commit('b', 1100000000)
+    repo.checkout(branch)
+    commit('c', 1200000000)
+    repo._git_custom_command(
+        None, ['git', 'merge', '--no-ff', '-m', 'merge', 'side'],
+        env=dict(os.environ, GIT_AUTHOR_DATE='@1300000000'))
+    # a change brought in by a merge gets the date of the merge
+    assert_equal(
+        _get_last_commit_dates(repo, 'HEAD', ['a', 'b', 'c']),
+        {'a': 1000000000, 'b': 1300000000, 'c': 1200000000})
+
+
+@with_tree(_dataset_template)
+def test_export_ref_annexed(path):
+    ds = Dataset(opj(path, 'ds')).create(force=True)
+    ds.save(to_git=False)
+    assert_true(ds.repo.is_under_annex('file_up'))
+    first = ds.repo.get_hexsha()
+    os.unlink(opj(ds.path, 'file_up'))
+    with open(opj(ds.path, 'file_up'), 'w') as f:
+        f.write('changed')
+    ds.save(to_git=False)
+
+    # the content of the old version is still in the local annex
+    for archivetype in ('tar', 'zip'):
+        ds.export_archive(filename=opj(path, 'my'), ref=first,
+                          archivetype=archivetype)
+    with tarfile.open(opj(path, 'my.tar.gz')) as tf:
+        assert_false(tf.getmember('my/file_up').issym())
+        assert_equal(tf.extractfile('my/file_up').read(), b'some_content')
+        assert_equal(tf.extractfile('my/dir/file1_down').read(), b'one')
+    ds.export_archive(filename=opj(path, 'my'), ref='HEAD')
+    with tarfile.open(opj(path, 'my.tar.gz')) as tf:
+        assert_equal(tf.extractfile('my/file_up').read(), b'changed')
+
+    ds.repo.drop('file_up', options=['--force'])
+    assert_raises(IOError, ds.export_archive, filename=opj(path, 'my'),
+                  ref='HEAD')
+    ds.export_archive(filename=opj(path, 'my'), ref='HEAD',
+                      missing_content='ignore')
+    with tarfile.open(opj(path, 'my.tar.gz')) as tf:
+        assert_false('my/file_up' in tf.getnames())
+        assert_equal(tf.extractfile('my/dir/file2_down').read(), b'two')
@@ -13,6 +13,7 @@ For further information on git-annex see https://git-annex.branchable.com/.
 """
 
 from collections import OrderedDict
+import hashlib
 import json
 import logging
 import math
@@ -20,7 +21,9 @@ import os
 import os.path as op
 import re
 import shlex
+import shutil
 import tempfile
+import threading
 import time
 
 from itertools import chain
@@ -35,6 +38,7 @@ from os.path import isdir
 from os.path import isabs
 from os.path import relpath
 from os.path import normpath
+from os.path import sep
 from subprocess import Popen, PIPE
 from multiprocessing import cpu_count
 from weakref import WeakValueDictionary
@@ -43,6 +47,11 @@ from six import string_types, PY2
 from six import iteritems
 from six import text_type
 from six.moves import filter
+from six.moves.queue import (
+    Empty,
+    Full,
+    Queue,
+)
 from git import InvalidGitRepositoryError
 
 from datalad import ssh_manager
@@ -68,6 +77,7 @@ from datalad.cmd import BatchedCommand
 
 # imports from same module:
 from .repo import RepoInterface
+from .gitrepo import BatchedCatFile
 from .gitrepo import GitRepo
 from .gitrepo import NoSuchPathError
 from .gitrepo import _normalize_path
@@ -84,6 +94,7 @@ from .exceptions import FileInGitError
 from .exceptions import FileNotInRepositoryError
 from .exceptions import AnnexBatchCommandError
 from .exceptions import InsufficientArgumentsError
+from .exceptions import InvalidGitReferenceError
 from .exceptions import OutOfSpaceError
 from .exceptions import RemoteNotAvailableError
 from .exceptions import OutdatedExternalDependency
@@ -99,6 +110,109 @@ lgr = logging.getLogger('datalad.annex')
 # Limit to # of CPUs and up to 8, but at least 3 to start with
 N_AUTO_JOBS = min(8, max(3, cpu_count()))
 
+# Max number of parsed --json results buffered for their consumer, before
+# the output of a git-annex command is no longer read
+_JSON_RESULTS_BUFFER = 1000
+# Seconds between checks whether the other side of a --json result stream
+# is still there
+_JSON_RESULTS_POLL = 0.1
+
+# git-annex does not consider larger files to be pointer files
+_MAX_POINTER_SIZE = 81920
+
+# characters escaped with '&' in the file names of keys
+_KEY_FILE_UNESCAPES = {'a': '&', 's': '%', 'c': ':'}
+
+
+def _get_annex_key_from_link(target):
+    """Return the annex key a symlink target or pointer file points to
+
+    Parameters
+    ----------
+    target : str
+      Target of a symlink, or the first line of a file.
+
+    Returns
+    -------
+    str or None
+    """
+    if target.startswith('/annex/objects/'):
+        # pointer file
+        key = target[len('/annex/objects/'):]
+    elif 'annex/objects/' in target:
+        # symlink into the object tree, the key is the name of the file
+        key = target.rsplit('/', 1)[-1]
+    else:
+        return None
+    if not key or '/' in key:
+        return None
+    # undo git-annex's keyFile escaping, e.g. of the paths in (old) WORM keys
+    return '/'.join(
+        re.sub(r'&(.?)',
+               lambda m: _KEY_FILE_UNESCAPES.get(m.group(1), m.group(1)),
+               part)
+        for part in key.split('%'))
+
+
+def _get_annex_hashdirs(key):
+    """Return the mixed and the lower case hash directory of a key
+
+    Reimplementation of git-annex's hashDirMixed and hashDirLower with the
+    default of two levels.
+    """
+    digest = hashlib.md5(assure_bytes(key))
+    hexdigest = digest.hexdigest()
+    b = bytearray(digest.digest())
+    word = b[0] | b[1] << 8 | b[2] << 16 | b[3] << 24
+    chars = '0123456789zqjxkmvwgpfZQJXKMVWGPF'
+    # characters are used in swapped pairs
+    mixed = ''.join(
+        chars[(word >> (6 * (i ^ 1))) & 31] for i in range(4))
+    return (op.join(mixed[:2], mixed[2:], ''),
+            op.join(hexdigest[:3], hexdigest[3:6], ''))
+
+
+def _get_annex_key_props(key):
+    """Return the properties git-annex reports for a key with --json"""
+    head, keyname = key.split('--', 1) if '--' in key else (key, '')
+    fields = head.split('-')
+    size = [f[1:] for f in fields[1:] if f.startswith('s')]
+    hashdirmixed, hashdirlower = _get_annex_hashdirs(key)
+    return {
+        'key': key,
+        'backend': fields[0],
+        'keyname': keyname,
+        'bytesize': size[0] if size else 'unknown',
+        'hashdirmixed': hashdirmixed,
+        'hashdirlower': hashdirlower,
+    }
+
+
+def _split_by_size(sizes, nshards):
+    """Split paths into at most `nshards` groups of similar total size
+
+    Paths are assigned largest first, each to the group with the smallest
+    total size so far.
+
+    Parameters
+    ----------
+    sizes : dict
+      `path: size` mapping.
+    nshards : int
+
+    Returns
+    -------
+    list of list
+      Non-empty groups of paths, in the order of their total size
+      (largest first).
+    """
+    groups = [[0, []] for _ in range(max(1, min(nshards, len(sizes))))]
+    for path in sorted(sizes, key=lambda p: (-sizes[p], p)):
+        group = min(groups, key=lambda g: g[0])
+        group[0] += sizes[path]
+        group[1].append(path)
+    return [g[1] for g in sorted(groups, key=lambda g: -g[0]) if g[1]]
+
 
 class AnnexRepo(GitRepo, RepoInterface):
     """Representation of an git-annex repository.
@@ -1065,6 +1179,19 @@ class AnnexRepo(GitRepo, RepoInterface):
         -------
         files : list of dict
         """
+        # TODO:  should we here compare fetch_files against result_list
+        # and vomit an exception of incomplete download????
+        return list(self._get(
+            files, remote=remote, options=options, jobs=jobs, key=key))
+
+    @normalize_paths(match_return_type=False)
+    def iter_get(self, files, remote=None, options=None, jobs=None,
+                 key=False):
+        """Like `get`, but yield the results as the files are obtained"""
+        return self._get(
+            files, remote=remote, options=options, jobs=jobs, key=key)
+
+    def _get(self, files, remote=None, options=None, jobs=None, key=False):
         options = options[:] if options else []
 
         if remote:
@@ -1092,7 +1219,7 @@ class AnnexRepo(GitRepo, RepoInterface):
 
         if not fetch_files:
             lgr.debug("No files found needing fetching.")
-            return []
+            return
 
         if len(fetch_files) != len(files):
             lgr.debug("Actually getting %d files", len(fetch_files))
@@ -1106,18 +1233,14 @@ class AnnexRepo(GitRepo, RepoInterface):
             kwargs = {'opts': options + ['--key'] + files}
         else:
             kwargs = {'opts': options, 'files': files}
-        results = self._run_annex_command_json(
-            'get',
-            # TODO: eventually make use of --batch mode
-            jobs=jobs,
-            expected_entries=expected_downloads,
-            progress=True,
-            **kwargs
-        )
-        results_list = list(results)
-        # TODO:  should we here compare fetch_files against result_list
-        # and vomit an exception of incomplete download????
-        return results_list
+        for res in self._iter_annex_command_json(
+                'get',
+                # TODO: eventually make use of --batch mode
+                jobs=jobs,
+                expected_entries=expected_downloads,
+                progress=True,
+                **kwargs):
+            yield res
 
     def _get_expected_files(self, files, expr, merge_annex_branches=True):
         """Given a list of files, figure out what to be downloaded
@@ -1142,7 +1265,7 @@ class AnnexRepo(GitRepo, RepoInterface):
         keys_seen = set()
         unknown_sizes = []  # unused atm
         # for now just record total size, and
-        for j in self._run_annex_command_json(
+        for j in self._iter_annex_command_json(
                 'find', opts=expr, files=files,
                 merge_annex_branches=merge_annex_branches
         ):
@@ -1289,15 +1412,12 @@ class AnnexRepo(GitRepo, RepoInterface):
                 yield r
 
         else:
-            for r in self._run_annex_command_json(
-                    'add',
-                    opts=options,
-                    files=files,
+            for r in self._iter_annex_add(
+                    files,
+                    options,
                     backend=backend,
-                    expect_fail=True,
                     jobs=jobs,
-                    expected_entries=expected_additions,
-                    expect_stderr=True):
+                    expected_entries=expected_additions):
                 yield r
 
     @normalize_paths
@@ -1330,52 +1450,117 @@ class AnnexRepo(GitRepo, RepoInterface):
              If running in non-batch mode and a file is not under git at all
         """
 
+        # keys are read from the index, no git-annex call is needed
+        keys = {
+            normpath(f): key
+            for f, key in self._iter_annex_keys(None, paths=files)}
         if batch or (batch is None and len(files) > 1):
-            return self._batched.get('lookupkey', path=self.path)(files)
+            return [keys.get(normpath(f)) or '' for f in files]
         else:
             files = files[0]
-            # single file
-            # keep current implementation
-            # TODO: This should change, but involves more RF'ing and an
-            # alternative regarding FileNotInAnnexError
+            key = keys.get(normpath(files))
+            if key:
+                return key
             cmd_str = 'git annex lookupkey %s' % files  # have a string for messages
+            if not exists(opj(self.path, files)):
+                raise IOError(1, "File not found.", files)
+            elif normpath(files) in keys:
+                # the file is present and in git, but not in the annex
+                raise FileInGitError(cmd=cmd_str,
+                                     msg="File not in annex, but git: %s"
+                                         % files,
+                                     filename=files)
+            else:
+                raise FileNotInAnnexError(cmd=cmd_str,
+                                          msg="File not in annex: %s"
+                                              % files,
+                                          filename=files)
 
-            try:
-                out, err = self._run_annex_command(
-                    'lookupkey',
-                    files=[files],
-                    expect_fail=True
-                )
-            except CommandError as e:
-                if e.code == 1:
-                    if not exists(opj(self.path, files)):
-                        raise IOError(e.code, "File not found.", files)
-                    # XXX you don't like me because I can be real slow!
-                    elif files in self.get_indexed_files():
-                        # if we got here, the file is present and in git,
-                        # but not in the annex
-                        raise FileInGitError(cmd=cmd_str,
-                                             msg="File not in annex, but git: %s"
-                                                 % files,
-                                             filename=files)
-                    else:
-                        raise FileNotInAnnexError(cmd=cmd_str,
-                                                  msg="File not in annex: %s"
-                                                      % files,
-                                                  filename=files)
+    def _iter_annex_keys(self, ref, paths=None):
+        """Yield the annex keys of files in a Git reference or the index
+
+        Keys are read from the targets of symlinks (locked files) and from
+        pointer files (unlocked files in v6+ repositories) through a single
+        `git cat-file --batch` process. Files too large to be pointer files
+        are not read; for the index, which has no sizes, they are found by a
+        `git cat-file --batch-check` process. No git-annex process is
+        involved.
+
+        Parameters
+        ----------
+        ref : str or None
+          Git reference, or None for the index.
+        paths : list, optional
+          Paths (relative to the repository root) to limit the report to.
+
+        Yields
+        ------
+        tuple
+          (path, key) for each file, with the POSIX path relative to the
+          repository root, and None for the key if the file is not annexed.
+        """
+        if ref:
+            cmd = ['git', 'ls-tree', '-r', '-z', '-l', '--full-tree', ref]
+            props_re = re.compile(
+                r'(?P<mode>[0-9]+) [a-z]+ (?P<sha>[^ ]+) +(?P<size>[0-9-]+)'
+                r'\t(?P<path>.*)$', re.DOTALL)
+        else:
+            cmd = ['git', 'ls-files', '-s', '-z']
+            props_re = re.compile(
+                r'(?P<mode>[0-9]+) (?P<sha>[^ ]+) [0-9]+\t(?P<path>.*)$',
+                re.DOTALL)
+        try:
+            stdout, _ = self._git_custom_command(
+                [text_type(p) for p in paths] if paths else None,
+                cmd, expect_fail=True)
+        except CommandError as e:
+            if "fatal: Not a valid object name" in e.stderr:
+                raise InvalidGitReferenceError(ref)
+            raise
+
+        candidates = []
+        unsized = []
+        for line in stdout.split('\0'):
+            props = props_re.match(line)
+            if not props:
+                continue
+            mode, sha, path = props.group('mode', 'sha', 'path')
+            if mode == '120000' or mode.startswith('100') and (
+                    ref and int(props.group('size')) <= _MAX_POINTER_SIZE):
+                candidates.append((path, sha))
+            elif mode.startswith('100') and not ref:
+                # no sizes are reported for the index
+                unsized.append((path, sha))
+            elif mode != '160000':
+                yield path, None
+        if unsized:
+            # ask for the sizes first, instead of sending the content of
+            # large files through the pipe only to skip it
+            catfile = BatchedCatFile(self.path, check=True)
+            sizes = {
+                sha: res[2] if res else None
+                for sha, res in catfile.iter_objects(
+                    set(sha for _, sha in unsized))}
+            for path, sha in unsized:
+                size = sizes[sha]
+                if size is not None and size <= _MAX_POINTER_SIZE:
+                    candidates.append((path, sha))
                 else:
-                    # Not sure, whether or not this can actually happen
-                    raise e
-
-            entries = out.rstrip(linesep).splitlines()
-            # filter out the ones which start with (: http://git-annex.branchable.com/bugs/lookupkey_started_to_spit_out___34__debug__34___messages_to_stdout/?updated
-            entries = list(filter(lambda x: not x.startswith('('), entries))
-            if len(entries) > 1:
-                lgr.warning("Got multiple entries in reply asking for a key of a file: %s"
-                            % (str(entries)))
-            elif not entries:
-                raise FileNotInAnnexError("Could not get a key for a file(s) %s -- empty output" % files)
-            return entries[0]
+                    yield path, None
+        if not candidates:
+            return
+
+        paths = iter(candidates)
+        catfile = BatchedCatFile(self.path)
+        for _, res in catfile.iter_objects(sha for _, sha in candidates):
+            path = next(paths)[0]
+            if res is None:
+                # not in the object store, cannot be known
+                yield path, None
+                continue
+            target = res[3].read(min(res[2], _MAX_POINTER_SIZE))
+            yield path, _get_annex_key_from_link(
+                assure_unicode(target.split(b'\n', 1)[0]))
 
     @normalize_paths
     def unlock(self, files):
@@ -1483,19 +1668,29 @@ class AnnexRepo(GitRepo, RepoInterface):
             )
             objects = {f: json_out.get("file", "")
                        for f, json_out in zip(files, find(files))}
-        else:
-            for f in files:
-                try:
-                    obj, er = self._run_annex_command(
-                        'find', files=[f],
-                        annex_options=["--print0"],
+        elif files:
+            # a single call for all files, git-annex expands directories
+            try:
+                found = [
+                    normpath(r['file'])
+                    for r in self._iter_annex_command_json(
+                        'find', files=files,
                         expect_fail=True,
-                        merge_annex_branches=False
-                    )
-                    items = obj.rstrip("\0").split("\0")
-                    objects[f] = items[0] if len(items) == 1 else items
-                except CommandError:
-                    objects[f] = ''
+                        merge_annex_branches=False)
+                    # no records on files which were not found
+                    if 'key' in r]
+            except CommandError as e:
+                lgr.debug("Failed to find %d files: %s", len(files), exc_str(e))
+                found = []
+            found_files = set(found)
+            for f in files:
+                nf = normpath(f)
+                if not isdir(opj(self.path, f)):
+                    objects[f] = f if nf in found_files else ''
+                    continue
+                items = found if nf == curdir else \
+                    [i for i in found if i.startswith(nf + sep)]
+                objects[f] = items[0] if len(items) == 1 else items or ''
 
         return objects
 
@@ -1507,7 +1702,7 @@ class AnnexRepo(GitRepo, RepoInterface):
         if pointers or batch or not allow_quick:
             # We're only concerned about modified files in V6+ mode. In V5
             # `find` returns an empty string for unlocked files.
-            modified = self.get_changed_files() if pointers else []
+            modified = set(self.get_changed_files()) if pointers else set()
             annex_res = fn(files, normalize_paths=False, batch=batch)
             return [bool(annex_res.get(f) and
                          not (pointers and normpath(f) in modified))
@@ -1970,14 +2165,29 @@ class AnnexRepo(GitRepo, RepoInterface):
             assert(remotes[self.WEB_UUID]['description'] == 'web')
         return remotes
 
-    def _run_annex_command_json(self, command,
-                                opts=None,
-                                jobs=None,
-                                files=None,
-                                expected_entries=None,
-                                progress=False,
-                                **kwargs):
-        """Run an annex command with --json and load output results into a tuple of dicts
+    def _run_annex_command_json(self, command, **kwargs):
+        """Run an annex command with --json and load output results into a list of dicts
+
+        Takes the same arguments as `_iter_annex_command_json`.
+        """
+        return list(self._iter_annex_command_json(command, **kwargs))
+
+    def _iter_annex_command_json(self, command,
+                                 opts=None,
+                                 jobs=None,
+                                 files=None,
+                                 expected_entries=None,
+                                 progress=False,
+                                 **kwargs):
+        """Run an annex command with --json and yield its results as they come
+
+        The command runs in a thread, which parses the output lines as they
+        arrive, so results are yielded while the command is still running.
+        At most `_JSON_RESULTS_BUFFER` results are buffered, beyond that the
+        output of the command is not read until the consumer catches up.
+        Errors which are detected only once the command exits (e.g.
+        `OutOfSpaceError`) are raised after all results it produced were
+        yielded.  If the generator is closed early, the command is aborted.
 
         Parameters
         ----------
@@ -1994,12 +2204,6 @@ class AnnexRepo(GitRepo, RepoInterface):
             progress_indicators = ProcessAnnexProgressIndicators(
                 expected=expected_entries
             )
-            kwargs = kwargs.copy()
-            kwargs.update(dict(
-                log_stdout=progress_indicators,
-                log_stderr='offline',  # False, # to avoid lock down
-                log_online=True
-            ))
         # TODO: refactor to account for possible --batch ones
         annex_options = ['--json']
         if progress:
@@ -2013,118 +2217,204 @@ class AnnexRepo(GitRepo, RepoInterface):
             # opts might be the '--key' which should go last
             annex_options += opts
 
-        interrupted = True
-        try:
-            out, err = self._run_annex_command(
+        records = Queue(maxsize=_JSON_RESULTS_BUFFER)
+        end = object()
+        # set once the consumer is gone
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    records.put(item, timeout=_JSON_RESULTS_POLL)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def process_stdout(line):
+            if progress_indicators:
+                line = progress_indicators(line)
+                if line is None:
+                    return None
+            if not line.startswith('{'):
+                # keep it in the output for the analysis of failures
+                return line
+            if '"byte-progress":' in line:
+                # protect against progress leakage, without parsing it
+                return None
+            if not put(json_loads(line)):
+                # abort the command, nobody is interested in it anymore
+                raise RuntimeError(
+                    "Results of 'annex %s' are no longer consumed" % command)
+            return None
+
+        kwargs = dict(
+            kwargs,
+            log_stdout=process_stdout,
+            log_stderr='offline',  # False, # to avoid lock down
+            log_online=True)
+        outcome = {}
+
+        def run():
+            try:
+                outcome['out'], _ = self._run_annex_command(
                     command,
                     files=files,
                     annex_options=annex_options,
                     **kwargs)
-            interrupted = False
-        except CommandError as e:
-            # Note: A call might result in several 'failures', that can be or
-            # cannot be handled here. Detection of something, we can deal with,
-            # doesn't mean there's nothing else to deal with.
-
-            # OutOfSpaceError:
-            # Note:
-            # doesn't depend on anything in stdout. Therefore check this before
-            # dealing with stdout
-            out_of_space_re = re.search(
-                "not enough free space, need (.*) more", e.stderr
-            )
-            if out_of_space_re:
-                raise OutOfSpaceError(cmd="annex %s" % command,
-                                      sizemore_msg=out_of_space_re.groups()[0])
-
-            # RemoteNotAvailableError:
-            remote_na_re = re.search(
-                "there is no available git remote named \"(.*)\"", e.stderr
-            )
-            if remote_na_re:
-                raise RemoteNotAvailableError(cmd="annex %s" % command,
-                                              remote=remote_na_re.groups()[0])
-
-            # TEMP: Workaround for git-annex bug, where it reports success=True
-            # for annex add, while simultaneously complaining, that it is in
-            # a submodule:
-            # TODO: For now just reraise. But independently on this bug, it
-            # makes sense to have an exception for that case
-            in_subm_re = re.search(
-                "fatal: Pathspec '(.*)' is in submodule '(.*)'", e.stderr
-            )
-            if in_subm_re:
-                raise e
-
-            # Note: try to approach the covering of potential annex failures
-            # in a more general way:
-            # first check stdout:
-            if all([line.startswith('{') and line.endswith('}')
-                    for line in e.stdout.splitlines()]):
-                # we have the usual json output on stdout. Therefore we can
-                # probably return and don't need to raise; so get stdout
-                # for json loading:
-                out = e.stdout
+            except Exception as e:
+                outcome['exc'] = e
+            finally:
+                put(end)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        nrecords = 0
+        interrupted = True
+        try:
+            while True:
+                alive = thread.is_alive()
+                try:
+                    j = records.get(timeout=_JSON_RESULTS_POLL)
+                except Empty:
+                    if alive:
+                        continue
+                    # the end must have been queued before the thread ended
+                    raise RuntimeError(
+                        "Thread running 'annex %s' is gone" % command)
+                if j is end:
+                    break
+                nrecords += 1
+                yield j
+            exc = outcome.get('exc', None)
+            if exc is None:
+                out = outcome['out']
+                interrupted = False
+            elif isinstance(exc, CommandError):
+                out, not_found = self._analyze_annex_json_failure(
+                    command, exc, nrecords)
             else:
-                out = None
-
-            # Note: Workaround for not existing files as long as annex doesn't
-            # report it within JSON response:
-            # see http://git-annex.branchable.com/bugs/copy_does_not_reflect_some_failed_copies_in_--json_output/
-            not_existing = [
-                # cut the file path from the middle, no useful delimiter
-                # need to deal with spaces too!
-                line[11:-10] for line in e.stderr.splitlines()
-                if line.startswith('git-annex:') and
-                line.endswith(' not found')
-            ]
-            if not_existing:
-                if out is None:
-                    # we create the error reporting herein. If all files were
-                    # not found, there is nothing on stdout and we don't need
-                    # anything
-                    out = ""
-                if not out.endswith(linesep):
-                    out += linesep
-                out += linesep.join(
-                    ['{{"command": "{cmd}", "file": "{path}", '
-                     '"note": "{note}",'
-                     '"success": false}}'.format(
-                         cmd=command,
-                         # gotta quote backslashes that have taken over...
-                         # ... or the outcome is not valid JSON
-                         path=f.replace('\\', '\\\\'),
-                         note="not found")
-                     for f in not_existing])
-
-            # Note: insert additional code here to analyse failure and possibly
-            # raise a custom exception
-
-            # if we didn't raise before, just depend on whether or not we seem
-            # to have some json to return. It should contain information on
-            # failure in keys 'success' and 'note'
-            # TODO: This is not entirely true. 'annex status' may return empty,
-            # while there was a 'fatal:...' in stderr, which should be a
-            # failure/exception
-            # Or if we had empty stdout but there was stderr
-            if out is None or (not out and e.stderr):
-                raise e
-            if e.stderr:
-                # else just warn about present errors
-                shorten = lambda x: x[:1000] + '...' if len(x) > 1000 else x
-                lgr.warning(
-                    "Running %s resulted in stderr output: %s",
-                    command, shorten(e.stderr)
-                )
+                raise exc
+            # whatever did not pass through process_stdout, e.g. if the
+            # runner was not calling it
+            for line in (out or '').splitlines():
+                if line.startswith('{'):
+                    j = json_loads(line)
+                    if 'byte-progress' not in j:
+                        yield j
+            if exc is not None:
+                for j in not_found:
+                    yield j
         finally:
+            # make the thread finish, also if the consumer stopped early
+            stop.set()
+            thread.join(10 * _JSON_RESULTS_POLL)
+            if thread.is_alive():
+                lgr.debug("Thread running 'annex %s' did not finish yet",
+                          command)
             if progress_indicators:
                 progress_indicators.finish(partial=interrupted)
 
-        json_objects = (json_loads(line)
-                        for line in out.splitlines() if line.startswith('{'))
-        # protect against progress leakage
-        json_objects = [j for j in json_objects if 'byte-progress' not in j]
-        return json_objects
+    def _analyze_annex_json_failure(self, command, e, nrecords):
+        """Decide how to proceed after a failed annex command with --json
+
+        Parameters
+        ----------
+        command : str
+        e : CommandError
+        nrecords : int
+          Number of results parsed from the output while the command was
+          running.
+
+        Returns
+        -------
+        str, list
+          Remaining output of the command, and results about files which
+          were not found.
+
+        Raises
+        ------
+        CommandError or an exception for a more specific failure
+        """
+        # Note: A call might result in several 'failures', that can be or
+        # cannot be handled here. Detection of something, we can deal with,
+        # doesn't mean there's nothing else to deal with.
+
+        # OutOfSpaceError:
+        # Note:
+        # doesn't depend on anything in stdout. Therefore check this before
+        # dealing with stdout
+        out_of_space_re = re.search(
+            "not enough free space, need (.*) more", e.stderr
+        )
+        if out_of_space_re:
+            raise OutOfSpaceError(cmd="annex %s" % command,
+                                  sizemore_msg=out_of_space_re.groups()[0])
+
+        # RemoteNotAvailableError:
+        remote_na_re = re.search(
+            "there is no available git remote named \"(.*)\"", e.stderr
+        )
+        if remote_na_re:
+            raise RemoteNotAvailableError(cmd="annex %s" % command,
+                                          remote=remote_na_re.groups()[0])
+
+        # TEMP: Workaround for git-annex bug, where it reports success=True
+        # for annex add, while simultaneously complaining, that it is in
+        # a submodule:
+        # TODO: For now just reraise. But independently on this bug, it
+        # makes sense to have an exception for that case
+        in_subm_re = re.search(
+            "fatal: Pathspec '(.*)' is in submodule '(.*)'", e.stderr
+        )
+        if in_subm_re:
+            raise e
+
+        # Note: try to approach the covering of potential annex failures
+        # in a more general way:
+        # first check stdout (what is left of it, after results were parsed):
+        out = e.stdout or ''
+        if not all([line.startswith('{') and line.endswith('}')
+                    for line in out.splitlines()]):
+            out = None
+
+        # Note: Workaround for not existing files as long as annex doesn't
+        # report it within JSON response:
+        # see http://git-annex.branchable.com/bugs/copy_does_not_reflect_some_failed_copies_in_--json_output/
+        not_found = [
+            {"command": command,
+             # cut the file path from the middle, no useful delimiter
+             # need to deal with spaces too!
+             "file": line[11:-10],
+             "note": "not found",
+             "success": False}
+            for line in e.stderr.splitlines()
+            if line.startswith('git-annex:') and
+            line.endswith(' not found')
+        ]
+
+        # Note: insert additional code here to analyse failure and possibly
+        # raise a custom exception
+
+        # if we didn't raise before, just depend on whether or not we seem
+        # to have some json to return. It should contain information on
+        # failure in keys 'success' and 'note'
+        # TODO: This is not entirely true. 'annex status' may return empty,
+        # while there was a 'fatal:...' in stderr, which should be a
+        # failure/exception
+        # Or if we had empty stdout but there was stderr
+        if not not_found and (
+                out is None or (not out and not nrecords and e.stderr)):
+            raise e
+        if e.stderr:
+            # else just warn about present errors
+            shorten = lambda x: x[:1000] + '...' if len(x) > 1000 else x
+            lgr.warning(
+                "Running %s resulted in stderr output: %s",
+                command, shorten(e.stderr)
+            )
+        return out, not_found
 
     # TODO: reconsider having any magic at all and maybe just return a list/dict always
     @normalize_paths
@@ -2181,7 +2471,7 @@ class AnnexRepo(GitRepo, RepoInterface):
         else:
             kwargs = {'files': files}
 
-        json_objects = self._run_annex_command_json('whereis', **kwargs)
+        json_objects = self._iter_annex_command_json('whereis', **kwargs)
         if output in {'descriptions', 'uuids'}:
             return [
                 [remote.get(output[:-1]) for remote in j.get('whereis')]
@@ -2929,7 +3219,7 @@ class AnnexRepo(GitRepo, RepoInterface):
                 files = [files]
             # anything else is assumed to be an iterable (e.g. a generator)
         if batch is False:
-            for res in self._run_annex_command_json(
+            for res in self._iter_annex_command_json(
                     'metadata', opts=['--json'], files=files):
                 yield _format_response(res)
         else:
@@ -3014,7 +3304,7 @@ class AnnexRepo(GitRepo, RepoInterface):
         # operate on files that were just added.
         self.precommit()
 
-        for jsn in self._run_annex_command_json(
+        for jsn in self._iter_annex_command_json(
                 'metadata',
                 args,
                 files=files):
@@ -3115,35 +3405,47 @@ class AnnexRepo(GitRepo, RepoInterface):
                 paths=paths, ref=ref, **kwargs)
         else:
             info = init
-        # use this funny-looking option with both find and findref
-        # it takes care of git-annex reporting on any known key, regardless
-        # of whether or not it actually (did) exist in the local annex
-        opts = ['--copies', '0']
         if ref:
-            cmd = 'findref'
-            opts.append(ref)
+            # keys are stored in the tree, no git-annex call needed
+            records = (
+                dict(_get_annex_key_props(key), file=path)
+                for path, key in self._iter_annex_keys(ref)
+                if key)
         else:
-            cmd = 'find'
-            # stringify any pathobjs
-            opts.extend([text_type(p) for p in paths]
-                        if paths else ['--include', '*'])
-        for j in self._run_annex_command_json(cmd, opts=opts):
+            # use this funny-looking option with find
+            # it takes care of git-annex reporting on any known key,
+            # regardless of whether or not it actually (did) exist in the
+            # local annex
+            opts = ['--copies', '0']
+            files = None
+            if paths:
+                # stringify any pathobjs, and pass them as files to
+                # make sure that long lists get split into chunks
+                files = [text_type(p) for p in paths]
+            else:
+                opts.extend(['--include', '*'])
+            records = self._iter_annex_command_json(
+                'find', opts=opts, files=files)
+        for j in records:
             path = self.pathobj.joinpath(ut.PurePosixPath(j['file']))
             rec = info.get(path, None)
-            if init is not None and rec is None:
-                # init constraint knows nothing about this path -> skip
-                continue
+            if rec is None:
+                if init is not None:
+                    # init constraint knows nothing about this path -> skip
+                    continue
+                rec = {}
             rec.update({'{}{}'.format(key_prefix, k): j[k]
                        for k in j if k != 'file'})
             if 'bytesize' in rec:
                 # it makes sense to make this an int that one can calculate with
                 # with
-                rec['bytesize'] = int(rec['bytesize'])
+                if rec['bytesize'].isdigit():
+                    rec['bytesize'] = int(rec['bytesize'])
+                else:
+                    # "unknown" for keys without size, e.g. of relaxed URLs
+                    del rec['bytesize']
             info[path] = rec
-            # TODO make annex availability checks optional and move in here
-            if not eval_availability:
-                # not desired, or not annexed
-                continue
+        if eval_availability:
             self._mark_content_availability(info)
         return info
 
@@ -3163,6 +3465,139 @@ class AnnexRepo(GitRepo, RepoInterface):
         self._mark_content_availability(info)
         return info
 
+    def _iter_annex_add(self, files, options, backend=None, jobs=None,
+                        expected_entries=None, shards=None):
+        """Run `git annex add` and yield its results as they come
+
+        With more than one shard, the files are split into groups of similar
+        total size, and every group is added by a separate git-annex process,
+        which stages into its own copy of the index.  Results of all processes
+        are yielded as they arrive, and the staged entries are merged into
+        the main index once all processes are done.
+
+        Parameters
+        ----------
+        files : list
+          Paths relative to the root of the repository.
+        options : list
+          Options for `git annex add`.
+        backend : str, optional
+        jobs : int, optional
+          Passed to every git-annex process.
+        expected_entries : dict, optional
+          `filename: size` dictionary for progress reporting.  Only used,
+          when a single git-annex process is running.
+        shards : int, optional
+          Number of parallel git-annex processes.  If None, the value of
+          the `datalad.save.add-shards` configuration is used.
+        """
+        if shards is None:
+            shards = self.config.obtain('datalad.save.add-shards')
+        groups = [files]
+        if shards > 1 and len(files) > 1:
+            groups = _split_by_size(
+                {f: self.get_file_size(f) for f in files}, shards)
+        if len(groups) < 2:
+            for r in self._iter_annex_command_json(
+                    'add',
+                    opts=options,
+                    files=files,
+                    backend=backend,
+                    expect_fail=True,
+                    jobs=jobs,
+                    expected_entries=expected_entries,
+                    expect_stderr=True):
+                yield r
+            return
+
+        lgr.debug("Adding %i files to %s in %i parallel shards",
+                  len(files), self, len(groups))
+        git_dir = opj(self.path, self.get_git_dir(self))
+        index = opj(git_dir, 'index')
+        records = Queue()
+        end = object()
+        errors = []
+
+        def add(group, index_file):
+            try:
+                for r in self._iter_annex_command_json(
+                        'add',
+                        opts=options,
+                        files=group,
+                        backend=backend,
+                        expect_fail=True,
+                        jobs=jobs,
+                        expect_stderr=True,
+                        env=dict(os.environ, GIT_INDEX_FILE=index_file)):
+                    records.put(r)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                records.put(end)
+
+        started = []
+        threads = []
+        try:
+            for group in groups:
+                fd, index_file = tempfile.mkstemp(
+                    dir=git_dir, prefix='datalad-', suffix='.index')
+                os.close(fd)
+                if exists(index):
+                    shutil.copyfile(index, index_file)
+                else:
+                    # git does not accept an empty file as an index
+                    unlink(index_file)
+                started.append((group, index_file))
+                thread = threading.Thread(target=add, args=(group, index_file))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+            running = len(threads)
+            while running:
+                r = records.get()
+                if r is end:
+                    running -= 1
+                else:
+                    yield r
+        finally:
+            # the processes run to their completion even if the consumer
+            # stopped early, whatever they staged must not get lost
+            for thread in threads:
+                thread.join()
+            try:
+                self._merge_index_entries(started)
+            finally:
+                for _, index_file in started:
+                    if exists(index_file):
+                        unlink(index_file)
+        if errors:
+            raise errors[0]
+
+    def _merge_index_entries(self, shards):
+        """Stage the entries of other index files in the main index
+
+        Parameters
+        ----------
+        shards : list
+          `(paths, index_file)` tuples, the entries of the paths in the
+          index file are staged.
+        """
+        with tempfile.TemporaryFile() as entries:
+            for paths, index_file in shards:
+                if not exists(index_file):
+                    continue
+                out, _ = self._git_custom_command(
+                    paths,
+                    ['git', 'ls-files', '--stage', '-z'],
+                    index_file=index_file)
+                entries.write(assure_bytes(out))
+            if not entries.tell():
+                return
+            entries.seek(0)
+            self.cmd_call_wrapper.run(
+                ['git', 'update-index', '-z', '--index-info'],
+                stdin=entries)
+
     def _save_add(self, files, git=None, git_opts=None):
         """Simple helper to add files in save()"""
         # alter default behavior of git-annex by considering dotfiles
@@ -3204,16 +3639,12 @@ class AnnexRepo(GitRepo, RepoInterface):
             # progressbar info, hence save the stat calls
             expected_additions = {p: self.get_file_size(p) for p in files}
 
-        for r in self._run_annex_command_json(
-                'add',
-                opts=options,
-                files=list(files.keys()),
-                backend=None,
-                expect_fail=True,
+        for r in self._iter_annex_add(
+                list(files.keys()),
+                options,
                 # TODO
                 jobs=None,
-                expected_entries=expected_additions,
-                expect_stderr=True):
+                expected_entries=expected_additions):
             yield r
 
 
@@ -3321,6 +3752,10 @@ class BatchedAnnex(BatchedCommand):
             output_proc=output_proc)
 
 
+# key of the action in a --json-progress record, unless it needs escaping
+_PROGRESS_KEY_REGEX = re.compile(r'"key": *"([^"\\]*)"')
+
+
 def _get_size_from_perc_complete(count, perc):
     """A helper to get full size if know % and corresponding size"""
 
@@ -3339,6 +3774,10 @@ class ProcessAnnexProgressIndicators(object):
     for git-annex commands runner
     """
 
+    # minimal time (in seconds) between two updates of the progress
+    # bar of a key, or between repaints of the total progress bar
+    update_interval = 0.1
+
     def __init__(self, expected=None):
         """
 
@@ -3354,6 +3793,12 @@ class ProcessAnnexProgressIndicators(object):
         self.only_one_expected = expected and len(self.expected) == 1
         self._failed = 0
         self._succeeded = 0
+        # keys with a progress bar, and the last of their progress
+        # records which was not processed yet
+        self._keys = set()
+        self._pending = OrderedDict()
+        self._last_flush = 0
+        self._last_refresh = 0
         self.start()
 
     def start(self):
@@ -3406,7 +3851,27 @@ class ProcessAnnexProgressIndicators(object):
             pbar.clear()
         lgr.info(msg)
 
+    def _flush(self, now=None):
+        """Process the last pending progress record of every key"""
+        pending, self._pending = self._pending, OrderedDict()
+        for line in pending.values():
+            self._update_progress(json_loads(line))
+        self._last_flush = time.time() if now is None else now
+
     def __call__(self, line):
+        if '"byte-progress":' in line:
+            # with many parallel transfers, git-annex reports progress
+            # much more often than it could be shown.  Only the last
+            # update of a key with a progress bar within an update
+            # interval is parsed and shown
+            match = _PROGRESS_KEY_REGEX.search(line)
+            key = match.group(1) if match else None
+            if key in self._keys:
+                self._pending[key] = line
+                now = time.time()
+                if now - self._last_flush >= self.update_interval:
+                    self._flush(now)
+                return None
         try:
             j = json.loads(line)
         except:
@@ -3432,6 +3897,10 @@ class ProcessAnnexProgressIndicators(object):
             # might be the finish line message
             action_item = j.get('key') or j.get('file')
             j_action_id = (j['command'], action_item)
+            if 'key' in j:
+                # no need to show progress of what is done already
+                self._pending.pop(j['key'], None)
+                self._keys.discard(j['key'])
             pbar = self.pbars.pop(j_action_id, None)
             if pbar is None and len(self.pbars) == 1 and self.only_one_expected:
                 # it is the only one left - take it!
@@ -3467,8 +3936,11 @@ class ProcessAnnexProgressIndicators(object):
                         len(self.expected)
                         if self.expected
                         else self._succeeded + self._failed))
-                # seems to be of no effect to force it repaint
-                self.total_pbar.refresh()
+                now = time.time()
+                if now - self._last_refresh >= self.update_interval:
+                    # seems to be of no effect to force it repaint
+                    self.total_pbar.refresh()
+                    self._last_refresh = now
 
             if pbar:
                 pbar.finish()
@@ -3478,6 +3950,12 @@ class ProcessAnnexProgressIndicators(object):
             return line
 
         # so we have a progress indicator, let's deal with it
+        self._update_progress(j)
+        if j['action'].get('key'):
+            self._keys.add(j['action']['key'])
+
+    def _update_progress(self, j):
+        """Update the progress bar of the action of a --json-progress record"""
         action = j['action']
         action_item = action.get('key') or action.get('file')
         action_id = (action['command'], action_item)
@@ -3490,14 +3968,13 @@ class ProcessAnnexProgressIndicators(object):
             # for now deduce from key or approx from '%'
             # TODO: unittest etc to check when we have a relaxed
             # URL without any size known in advance
-            if not target_size:
-                target_size = \
-                    AnnexRepo.get_size_from_key(action.get('key')) or \
-                    _get_size_from_perc_complete(
-                        j['byte-progress'],
-                        j.get('percent-progress', '').rstrip('%')
-                    ) or \
-                    0
+            target_size = \
+                AnnexRepo.get_size_from_key(action.get('key')) or \
+                _get_size_from_perc_complete(
+                    j['byte-progress'],
+                    j.get('percent-progress', '').rstrip('%')
+                ) or \
+                0
             w = ui_utils.get_console_width()
 
             if not action_item and self.only_one_expected:
@@ -3523,6 +4000,9 @@ class ProcessAnnexProgressIndicators(object):
         )
 
     def finish(self, partial=False):
+        if self._pending:
+            self._flush()
+        self._keys = set()
         if self.pbars:
             lgr.warning("Still have %d active progress bars when stopping",
                         len(self.pbars))
@@ -12,6 +12,13 @@
 
 import hashlib
 import patoolib
+import stat
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
 from .external_versions import external_versions
 # There were issues, so let's stay consistently with recent version
 assert(external_versions["patoolib"] >= "1.7")
@@ -21,18 +28,28 @@ import tempfile
 from .exceptions import MissingExternalDependency
 from .path import (
     basename,
+    dirname,
     join as opj,
     exists, abspath, isabs, normpath, relpath, pardir, isdir,
+    lexists,
     realpath,
     sep as opsep,
 )
 from six import next, PY2
 from six.moves.urllib.parse import unquote as urlunquote
 
+import posixpath
 import string
 import random
 
+import fasteners
+
+from .json_py import (
+    dump as jsondump,
+    load as jsonload,
+)
 from .locking import lock_if_check_fails
+from ..dochelpers import exc_str
 from ..utils import (
     any_re_search,
     assure_bytes,
@@ -71,7 +88,10 @@ from ..support.exceptions import CommandError
 from ..utils import swallow_outputs
 from ..utils import rmtemp
 from ..cmd import Runner
-from ..consts import ARCHIVES_TEMP_DIR
+from ..consts import (
+    ARCHIVES_INDEX_DIR,
+    ARCHIVES_TEMP_DIR,
+)
 from ..utils import rmtree
 from ..utils import get_tempfile_kwargs
 from ..utils import assure_unicode
@@ -274,6 +294,282 @@ def _get_random_id(size=6, chars=string.ascii_uppercase + string.digits):
     return ''.join(random.choice(chars) for _ in range(size))
 
 
+def _normalize_member_name(name):
+    """Return the path of an archive member as it would be extracted"""
+    return posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+
+
+# size of chunks to read archived content in
+_CHUNK_SIZE = 1024 ** 2
+
+
+def _get_compression(path):
+    """Return the compression ('gz', 'bz2' or 'xz') of a file by its magic"""
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+    if magic.startswith(b'\x1f\x8b'):
+        return 'gz'
+    if magic.startswith(b'BZh'):
+        return 'bz2'
+    if magic == b'\xfd7zXZ\x00':
+        return 'xz'
+    return None
+
+
+class _GzipReader(object):
+    """Access to a range of the uncompressed content of a gzip file
+
+    Decompression starts from the closest preceding seek point, instead of
+    the beginning of the file.  Seek points get recorded every
+    SEEK_POINT_SPAN bytes of the uncompressed content while reading.  Since
+    the state of a zlib decompressor cannot be stored, seek points are only
+    kept in memory.
+    """
+
+    SEEK_POINT_SPAN = 16 * 1024 ** 2
+    CHUNK_SIZE = 1024 ** 2
+
+    def __init__(self):
+        # list of (uncompressed offset, compressed offset, decompressor)
+        self._seek_points = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_decompressor():
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def _add_seek_point(self, upos, cpos, decompressor):
+        with self._lock:
+            last = self._seek_points[-1][0] if self._seek_points else 0
+            if upos >= last + self.SEEK_POINT_SPAN:
+                self._seek_points.append((upos, cpos, decompressor.copy()))
+
+    def iter_range(self, path, start, size):
+        """Yield chunks of `size` bytes of uncompressed content from `start`"""
+        with self._lock:
+            points = [p for p in self._seek_points if p[0] <= start]
+        if points:
+            upos, cpos, decompressor = points[-1]
+            decompressor = decompressor.copy()
+        else:
+            upos, cpos, decompressor = 0, 0, self._get_decompressor()
+        end = start + size
+        with open(path, 'rb') as f:
+            f.seek(cpos)
+            while upos < end:
+                data = f.read(self.CHUNK_SIZE)
+                if not data:
+                    raise IOError(
+                        "Unexpected end of %s at %d" % (path, upos))
+                cpos += len(data)
+                out = decompressor.decompress(data)
+                # gzip files could be a concatenation of multiple streams,
+                # possibly padded with zeros
+                while decompressor.unused_data.lstrip(b'\x00'):
+                    data = decompressor.unused_data
+                    decompressor = self._get_decompressor()
+                    out += decompressor.decompress(data)
+                if upos + len(out) > start:
+                    yield out[max(start - upos, 0):end - upos]
+                upos += len(out)
+                self._add_seek_point(upos, cpos, decompressor)
+
+
+class ArchiveIndex(object):
+    """Index of the files within a tar or zip archive
+
+    For every regular file it records the size, the offset of its content
+    (within the uncompressed tar stream, or of the local header within a zip
+    archive), md5 checksum, mode and modification time.  This is sufficient
+    to tell which files an archive contains, and to extract any of them
+    without scanning the archive.  Since annexed archives are addressed by
+    their content, an index could be stored and reused for as long as the
+    key is around.
+    """
+
+    # bump whenever the stored structure changes
+    FORMAT_VERSION = 1
+
+    def __init__(self, kind, compression, members):
+        """
+        Parameters
+        ----------
+        kind: {'tar', 'zip'}
+        compression: {None, 'gz', 'bz2', 'xz'}
+          Compression of a tar archive
+        members: OrderedDict
+          Records (dicts) of the files under their paths within the archive
+        """
+        self.kind = kind
+        self.compression = compression
+        self.members = members
+        self._gzip_reader = _GzipReader() if compression == 'gz' else None
+
+    def __repr__(self):
+        return "%s(%r, %r, <%d files>)" % (
+            self.__class__.__name__, self.kind, self.compression,
+            len(self.members))
+
+    def __len__(self):
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __contains__(self, name):
+        return _normalize_member_name(name) in self.members
+
+    def __getitem__(self, name):
+        return self.members[_normalize_member_name(name)]
+
+    @classmethod
+    def from_archive(cls, archive):
+        """Index the archive, reading it once
+
+        Returns
+        -------
+        ArchiveIndex or None
+          None if the archive is neither a tar nor a zip archive, or contains
+          links or files pointing outside of it, which would require an actual
+          extraction to be handled
+        """
+        archive = assure_unicode(archive) if not PY2 else archive
+        members = OrderedDict()
+        try:
+            if zipfile.is_zipfile(archive):
+                kind, compression = 'zip', None
+                with zipfile.ZipFile(archive) as zf:
+                    for m in zf.infolist():
+                        if m.filename.endswith('/'):
+                            continue
+                        mode = m.external_attr >> 16
+                        if mode and not stat.S_ISREG(mode):
+                            return None
+                        with zf.open(m) as f:
+                            md5 = _get_md5(f)
+                        members[_normalize_member_name(m.filename)] = dict(
+                            name=m.filename,
+                            size=m.file_size,
+                            offset=m.header_offset,
+                            md5=md5,
+                            mode=mode & 0o777,
+                            mtime=time.mktime(m.date_time + (0, 0, -1)),
+                        )
+            else:
+                kind, compression = 'tar', _get_compression(archive)
+                # stream mode to read (and decompress) the archive only once
+                with tarfile.open(archive, 'r|*') as tf:
+                    for m in tf:
+                        if m.isdir():
+                            continue
+                        if not m.isfile():
+                            return None
+                        members[_normalize_member_name(m.name)] = dict(
+                            size=m.size,
+                            offset=m.offset_data,
+                            md5=_get_md5(tf.extractfile(m)),
+                            mode=m.mode & 0o777,
+                            mtime=m.mtime,
+                        )
+        except Exception as e:
+            lgr.debug("Failed to index %s: %s", archive, exc_str(e))
+            return None
+        if any(n.startswith('../') for n in members):
+            return None
+        return cls(kind, compression, members)
+
+    @classmethod
+    def load(cls, fname):
+        """Load a stored index, None if it is not usable"""
+        try:
+            rec = jsonload(fname, fixup=False)
+            if rec.get('version') == cls.FORMAT_VERSION:
+                return cls(rec['kind'], rec['compression'],
+                           OrderedDict(rec['members']))
+        except Exception as e:
+            lgr.debug("Failed to load archive index from %s: %s",
+                      fname, exc_str(e))
+        return None
+
+    def save(self, fname):
+        jsondump(
+            dict(version=self.FORMAT_VERSION,
+                 kind=self.kind,
+                 compression=self.compression,
+                 members=list(self.members.items())),
+            fname)
+
+    def _iter_content(self, archive, name):
+        member = self[name]
+        size = member['size']
+        if self.kind == 'zip':
+            with zipfile.ZipFile(archive) as zf, zf.open(member['name']) as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                    yield chunk
+            return
+        if self.compression == 'gz':
+            for chunk in self._gzip_reader.iter_range(
+                    archive, member['offset'], size):
+                yield chunk
+            return
+        if self.compression == 'bz2':
+            import bz2
+            f = bz2.BZ2File(archive)
+        elif self.compression == 'xz':
+            import lzma
+            f = lzma.LZMAFile(archive)
+        else:
+            f = open(archive, 'rb')
+        with f:
+            f.seek(member['offset'])
+            while size:
+                chunk = f.read(min(size, _CHUNK_SIZE))
+                if not chunk:
+                    break
+                size -= len(chunk)
+                yield chunk
+
+    def extract(self, archive, name, f):
+        """Write the content of the file `name` within `archive` into `f`
+
+        Raises
+        ------
+        IOError
+          If the content does not match the index
+        """
+        member = self[name]
+        md5 = hashlib.md5()
+        size = 0
+        for chunk in self._iter_content(archive, name):
+            md5.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+        if size != member['size'] or md5.hexdigest() != member['md5']:
+            raise IOError(
+                "Content of %s within %s does not match the index"
+                % (name, archive))
+
+
+def _get_md5(f):
+    md5 = hashlib.md5()
+    for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+        md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _get_tree_size(path):
+    """Return the total size of all files under the `path`"""
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            try:
+                size += os.lstat(opj(root, f)).st_size
+            except OSError:
+                # could have been removed meanwhile
+                pass
+    return size
+
+
 class ArchivesCache(object):
     """Cache to maintain extracted archives
 
@@ -281,16 +577,25 @@ class ArchivesCache(object):
     ----------
     toppath : str
       Top directory under .git/ of which temp directory would be created.
-      If not provided -- random tempdir is used
+      If not provided -- random tempdir is used.  Indexes of archives given
+      with their annex keys are also stored under its .git/
     persistent : bool, optional
       Passed over into generated ExtractedArchives
+    size_limit : int, optional
+      Number of bytes the extracted content is allowed to occupy.  Once
+      exceeded, least recently used extracted archives get removed.  If not
+      provided, datalad.archives.cache-maxsize (in MB) is used.  0 -- no limit
     """
-    # TODO: make caching persistent across sessions/runs, with cleanup
+    # extracted archives accessed more recently (in seconds) are not evicted,
+    # since they might still be in use, e.g. by another process
+    EVICTION_GRACE = 60
+
     # IDEA: extract under .git/annex/tmp so later on annex unused could clean it
     #       all up
-    def __init__(self, toppath=None, persistent=False):
+    def __init__(self, toppath=None, persistent=False, size_limit=None):
 
         self._toppath = toppath
+        self._index_dir = opj(toppath, ARCHIVES_INDEX_DIR) if toppath else None
         if toppath:
             path = opj(toppath, ARCHIVES_TEMP_DIR)
             if not persistent:
@@ -304,10 +609,18 @@ class ArchivesCache(object):
             path = tempfile.mktemp(**get_tempfile_kwargs())
         self._path = path
         self.persistent = persistent
+        if size_limit is None:
+            from .. import cfg
+            size_limit = cfg.obtain('datalad.archives.cache-maxsize') * 1024 ** 2
+        self.size_limit = size_limit
+        # bytes extracted since the last check of the size of the cache
+        self._extracted_size = 0
         # TODO?  assure that it is absent or we should allow for it to persist a bit?
         #if exists(path):
         #    self._clean_cache()
         self._archives = {}
+        # stored indexes of archives which were not requested by path
+        self._indexes = {}
 
         # TODO: begging for a race condition
         if not exists(path):
@@ -357,16 +670,97 @@ class ArchivesCache(object):
             return out
         return archive
 
-    def get_archive(self, archive):
+    def _get_index_path(self, key):
+        return opj(self._index_dir, key + '.json') \
+            if key and self._index_dir else None
+
+    def get_archive(self, archive, key=None):
+        """Return ExtractedArchive for the archive
+
+        Parameters
+        ----------
+        key: str, optional
+          Annex key of the archive.  If provided, and the cache has a toppath,
+          the index of the archive is stored and reused across sessions
+        """
         archive = self._get_normalized_archive_path(archive)
 
         if archive not in self._archives:
             self._archives[archive] = \
                 ExtractedArchive(archive,
                                  opj(self.path, _get_cached_filename(archive)),
-                                 persistent=self.persistent)
+                                 persistent=self.persistent,
+                                 on_extracted=self._on_extracted,
+                                 index_path=self._get_index_path(key))
+        earchive = self._archives[archive]
+        if key and not earchive.index_path:
+            earchive.index_path = self._get_index_path(key)
+        return earchive
 
-        return self._archives[archive]
+    def get_index(self, key):
+        """Return a stored ArchiveIndex for the archive with the annex `key`
+
+        Returns
+        -------
+        ArchiveIndex or None
+          None if no index was stored for the key
+        """
+        if key not in self._indexes:
+            index_path = self._get_index_path(key)
+            if not (index_path and exists(index_path)):
+                return None
+            # keys are addressing the content, so an index never changes
+            self._indexes[key] = ArchiveIndex.load(index_path)
+        return self._indexes[key]
+
+    def _on_extracted(self, size):
+        self._extracted_size += size
+        # do not walk the entire cache after every extracted file
+        if self.size_limit and self._extracted_size > self.size_limit // 10:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used extracted archives exceeding the size limit
+
+        Extracted archives which are being extracted (i.e. locked) or were
+        used within EVICTION_GRACE seconds (possibly by other processes) are
+        not removed.
+        """
+        self._extracted_size = 0
+        if not self.size_limit or not exists(self.path):
+            return
+        entries = []
+        for name in os.listdir(self.path):
+            path = opj(self.path, name)
+            # temporary directories of ongoing extractions are not entries
+            if isdir(path) and not name.endswith('.tmp'):
+                entries.append(
+                    (ExtractedArchive.get_last_access(path),
+                     _get_tree_size(path),
+                     path))
+        total = sum(e[1] for e in entries)
+        now = time.time()
+        for last_access, size, path in sorted(entries):
+            if total <= self.size_limit:
+                break
+            if now - last_access < self.EVICTION_GRACE:
+                continue
+            lock_path = ExtractedArchive.get_lock_path(path)
+            lock = fasteners.InterProcessLock(lock_path)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                lgr.debug("Evicting extracted archive %s of size %d", path, size)
+                rmtree(path)
+                for suffix in (ExtractedArchive.STAMP_SUFFIX,
+                               ExtractedArchive.ACCESS_SUFFIX):
+                    if exists(path + suffix):
+                        unlink(path + suffix)
+                total -= size
+            finally:
+                # the lock file stays, as for lock_if_check_fails(): removing
+                # it would let another process lock a file no one else sees
+                lock.release()
 
     def __getitem__(self, archive):
         return self.get_archive(archive)
@@ -391,9 +785,27 @@ class ExtractedArchive(object):
 
     # suffix to use for a stamp so we could guarantee that extracted archive is
     STAMP_SUFFIX = '.stamp'
+    # suffix of a file which mtime reflects the last access to extracted content
+    ACCESS_SUFFIX = '.access'
 
-    def __init__(self, archive, path=None, persistent=False):
+    def __init__(self, archive, path=None, persistent=False, on_extracted=None,
+                 index_path=None):
+        """
+        Parameters
+        ----------
+        on_extracted: callable, optional
+          To be called with the number of bytes extracted, whenever the
+          entire archive or a single file from it gets extracted
+        index_path: str, optional
+          File to store the ArchiveIndex of the archive in, and to load it
+          from.  If not provided, the index is only kept in memory
+        """
         self._archive = archive
+        self._on_extracted = on_extracted
+        self.index_path = index_path
+        # ArchiveIndex, to be read on first use. False if cannot be indexed
+        self._index = None
+        self._index_lock = threading.Lock()
         # TODO: bad location for extracted archive -- use tempfile
         if not path:
             path = tempfile.mktemp(**get_tempfile_kwargs(prefix=_get_cached_filename(archive)))
@@ -416,7 +828,8 @@ class ExtractedArchive(object):
 
         for path, name in [
             (self._path, 'cache'),
-            (self.stamp_path, 'stamp file')
+            (self.stamp_path, 'stamp file'),
+            (self._path + self.ACCESS_SUFFIX, 'access marker'),
         ]:
             if exists(path):
                 if (not self._persistent) or force:
@@ -435,6 +848,47 @@ class ExtractedArchive(object):
     def stamp_path(self):
         return self._path + self.STAMP_SUFFIX
 
+    @property
+    def index(self):
+        """ArchiveIndex of the archive, or None if it cannot be indexed
+
+        A stored index is used even if the archive itself is not present.
+        """
+        with self._index_lock:
+            if self._index is None:
+                index = None
+                if self.index_path and exists(self.index_path):
+                    index = ArchiveIndex.load(self.index_path)
+                if index is None:
+                    if not exists(self._archive):
+                        # might still be fetched
+                        return None
+                    lgr.debug("Indexing %s", self._archive)
+                    index = ArchiveIndex.from_archive(self._archive)
+                    if index is not None and self.index_path:
+                        index.save(self.index_path)
+                self._index = index or False
+            return self._index or None
+
+    @staticmethod
+    def get_lock_path(path):
+        """Return path of the lock held while extracting into `path`"""
+        return path + '.extract-lck'
+
+    @classmethod
+    def get_last_access(cls, path):
+        """Return time of the last access to the content extracted under `path`
+        """
+        for p in (path + cls.ACCESS_SUFFIX, path + cls.STAMP_SUFFIX, path):
+            if exists(p):
+                return os.stat(p).st_mtime
+        return 0
+
+    def _mark_accessed(self):
+        access_path = self.path + self.ACCESS_SUFFIX
+        with open(access_path, 'a'):
+            os.utime(access_path, None)
+
     @property
     def is_extracted(self):
         return exists(self.path) and exists(self.stamp_path) \
@@ -452,36 +906,101 @@ class ExtractedArchive(object):
         ) as (check, lock):
             if lock:
                 assert not check
-                self._extract_archive(path)
+                size = self._extract_archive(path)
+                if self._on_extracted:
+                    self._on_extracted(size)
         return path
 
+    def _extract_member(self, afile):
+        """Extract a single file from a tar or zip archive into its location
+
+        Returns
+        -------
+        bool
+          False if the archive could not be indexed, or the file is not
+          a regular file within it, so the entire archive must be extracted
+        """
+        index = self.index
+        name = urlunquote(afile)
+        if index is None or name not in index:
+            return False
+        member = index[name]
+
+        path = self.get_extracted_filename(afile)
+        lgr.debug(u"Extracting {name} from {self._archive}".format(**locals()))
+        if not exists(dirname(path)):
+            os.makedirs(dirname(path))
+        # extract under a temporary name so no incomplete file is ever visible
+        temp_path = '%s.%s.tmp' % (path, _get_random_id())
+        try:
+            with open(temp_path, 'wb') as f:
+                index.extract(self._archive, name, f)
+            if member['mode']:
+                os.chmod(temp_path, member['mode'])
+            os.utime(temp_path, (time.time(), member['mtime']))
+            os.rename(temp_path, path)
+        finally:
+            if exists(temp_path):
+                unlink(temp_path)
+        if self._on_extracted:
+            self._on_extracted(member['size'])
+        return True
+
     def _extract_archive(self, path):
-        # we need to extract the archive
-        # TODO: extract to _tmp and then move in a single command so we
-        # don't end up picking up broken pieces
+        """Extract the entire archive under `path`
+
+        The archive is extracted into a temporary directory first, and its
+        files are then renamed into `path`, so no incomplete file is ever
+        visible there. Files already present under `path` (e.g. members that
+        were extracted individually, and might be in use) are kept.
+
+        Returns
+        -------
+        int
+          Total size of the files that were added under `path`
+        """
         lgr.debug(u"Extracting {self._archive} under {path}".format(**locals()))
-        if exists(path):
-            lgr.debug(
-                "Previous extracted (but probably not fully) cached archive "
-                "found. Removing %s",
-                path)
-            rmtree(path)
-        os.makedirs(path)
-        assert (exists(path))
         # remove old stamp
         if exists(self.stamp_path):
             rmtree(self.stamp_path)
-        decompress_file(self._archive, path, leading_directories=None)
-        # TODO: must optional since we might to use this content, move it
-        # into the tree etc
-        # lgr.debug("Adjusting permissions to R/O for the extracted content")
-        # rotree(path)
+        temp_path = '%s.%s.tmp' % (path, _get_random_id())
+        os.makedirs(temp_path)
+        try:
+            decompress_file(self._archive, temp_path, leading_directories=None)
+            # TODO: must optional since we might to use this content, move it
+            # into the tree etc
+            # lgr.debug("Adjusting permissions to R/O for the extracted content")
+            # rotree(path)
+            if not exists(path):
+                os.rename(temp_path, path)
+                size = _get_tree_size(path)
+            else:
+                lgr.debug(
+                    "Previous extracted (but probably not fully) cached "
+                    "archive found. Completing %s",
+                    path)
+                size = 0
+                for root, dirs, files in os.walk(temp_path):
+                    target_dir = opj(path, relpath(root, temp_path))
+                    if not exists(target_dir):
+                        os.makedirs(target_dir)
+                    for f in files:
+                        target = opj(target_dir, f)
+                        if lexists(target):
+                            continue
+                        source = opj(root, f)
+                        size += os.lstat(source).st_size
+                        os.rename(source, target)
+        finally:
+            if exists(temp_path):
+                rmtree(temp_path)
         assert (exists(path))
         # create a stamp
         with open(self.stamp_path, 'wb') as f:
             f.write(assure_bytes(self._archive))
         # assert that stamp mtime is not older than archive's directory
         assert (self.is_extracted)
+        return size
 
     # TODO: remove?
     #def has_file_ready(self, afile):
@@ -504,6 +1023,16 @@ class ExtractedArchive(object):
             for name in files:
                 yield assure_unicode(opj(root, name)[path_len:])
 
+    def get_archived_files(self):
+        """Return names of the files within the archive
+
+        If the archive could be indexed, it does not get extracted.
+        """
+        index = self.index
+        if index is None:
+            return self.get_extracted_files()
+        return (n.replace('/', opsep) for n in index)
+
     def get_leading_directory(self, depth=None, consider=None, exclude=None):
         """Return leading directory of the content within archive
 
@@ -526,7 +1055,7 @@ class ExtractedArchive(object):
         """
         leading = None
         # returns only files, so no need to check if a dir or not
-        for fpath in self.get_extracted_files():
+        for fpath in self.get_archived_files():
             if consider and not any_re_search(consider, fpath):
                 continue
             if exclude and any_re_search(exclude, fpath):
@@ -557,8 +1086,21 @@ class ExtractedArchive(object):
         # filenames within archive are too obscure for local file system.
         # We could somehow adjust them while extracting and here channel back
         # "fixed" up names since they are only to point to the load
-        self.assure_extracted()
         path = self.get_extracted_filename(afile)
+        if not (exists(path) or self.is_extracted):
+            # the same lock as for the extraction of the entire archive
+            with lock_if_check_fails(
+                check=(exists, (path,)),
+                lock_path=self.path,
+                operation="extract"
+            ) as (check, lock):
+                # tar and zip archive members could be extracted individually
+                if lock and not self._extract_member(afile) \
+                        and not self.is_extracted:
+                    size = self._extract_archive(self.path)
+                    if self._on_extracted:
+                        self._on_extracted(size)
+        self._mark_accessed()
         # TODO: make robust
         lgr.log(2, "Verifying that %s exists" % abspath(path))
         assert exists(path), "%s must exist" % path
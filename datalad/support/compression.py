@@ -0,0 +1,214 @@
+# emacs: -*- mode: python; py-indent-offset: 4; tab-width: 4; indent-tabs-mode: nil -*-
+# ex: set sts=4 ts=4 sw=4 noet:
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the datalad package for the
+#   copyright and license terms.
+#
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""Compression of a stream of data in parallel blocks
+
+The stream is cut into blocks which get compressed by a pool of threads
+(zlib, bz2 and lzma release the GIL while compressing), while the next blocks
+are being written.  The output is a standard compressed file:
+
+- gz: a single gzip member, as produced by `pigz`.  Every block is a raw
+  deflate stream primed with the last 32KB of the preceding block, and flushed
+  to a byte boundary, so the blocks could be simply concatenated
+- bz2, xz: a concatenation of independent streams, one per block, as produced
+  by `pbzip2` or `xz -T`.  Python 2 only reads the first stream of a bz2 file,
+  hence bz2 is compressed into a single stream, without threads, on Python 2
+
+The output does not depend on the number of jobs.
+"""
+
+__docformat__ = 'restructuredtext'
+
+import logging
+import struct
+import zlib
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+from six import PY2
+
+lgr = logging.getLogger('datalad.support.compression')
+
+# size of the deflate window, to prime the compression of the next block with
+_GZIP_WINDOW = 32 * 1024
+
+COMPRESSIONS = ('gz', 'bz2', 'xz')
+
+
+def _compress_gz_block(data, level, dictionary):
+    if dictionary and not PY2:
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL,
+            zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _compress_bz2_block(data, level, dictionary):
+    import bz2
+    return bz2.compress(data, level)
+
+
+def _compress_xz_block(data, level, dictionary):
+    import lzma
+    return lzma.compress(data, preset=level)
+
+
+class BlockCompressor(object):
+    """Write-only file object compressing the written data in parallel blocks
+
+    Parameters
+    ----------
+    fileobj: file
+      Where to write the compressed data to
+    compression: {'gz', 'bz2', 'xz'}
+    jobs: int, optional
+      Number of threads to compress with.  If not provided -- the number of
+      CPUs.  With a single job (and for bz2 on Python 2) no threads are used
+    level: int, optional
+      Compression level.  Defaults to 9 for gz and bz2 (as tarfile), and 6
+      for xz (as xz)
+    mtime: int, optional
+      Modification time to record in the gzip header
+    block_size: int, optional
+    """
+
+    _BLOCK_SIZES = {
+        'gz': 1024 ** 2,
+        # a bzip2 block at -9
+        'bz2': 900 * 1000,
+        # xz benefits from larger blocks
+        'xz': 8 * 1024 ** 2,
+    }
+    _DEFAULT_LEVELS = {
+        'gz': 9,
+        'bz2': 9,
+        'xz': 6,
+    }
+    _COMPRESSORS = {
+        'gz': _compress_gz_block,
+        'bz2': _compress_bz2_block,
+        'xz': _compress_xz_block,
+    }
+
+    def __init__(self, fileobj, compression, jobs=None, level=None, mtime=0,
+                 block_size=None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(
+                "Unknown compression %r. Known are: %s"
+                % (compression, ', '.join(COMPRESSIONS)))
+        self._fileobj = fileobj
+        self._compression = compression
+        self._compress = self._COMPRESSORS[compression]
+        self._level = self._DEFAULT_LEVELS[compression] \
+            if level is None else level
+        self._block_size = block_size or self._BLOCK_SIZES[compression]
+        self._buffer = bytearray()
+        self._dictionary = None
+        self._crc = 0
+        self._size = 0
+        # a single stream, compressed as data comes in
+        self._stream = None
+        if compression == 'bz2' and PY2:
+            import bz2
+            self._stream = bz2.BZ2Compressor(self._level)
+            jobs = 1
+        if jobs is None:
+            from multiprocessing import cpu_count
+            jobs = cpu_count()
+        self._pool = ThreadPool(jobs) if jobs > 1 else None
+        # blocks being compressed, in the order of their output.  Bounded so
+        # the memory use does not depend on the amount of data
+        self._pending = deque()
+        self._max_pending = 2 * jobs
+        self.closed = False
+        if compression == 'gz':
+            self._fileobj.write(
+                b'\x1f\x8b\x08\x00' + struct.pack('<I', int(mtime)) +
+                (b'\x02' if self._level == 9 else
+                 b'\x04' if self._level == 1 else b'\x00') +
+                b'\xff')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._terminate()
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed %s" % self.__class__.__name__)
+        if self._compression == 'gz':
+            self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            block = bytes(self._buffer[:self._block_size])
+            del self._buffer[:self._block_size]
+            self._submit(block)
+        return len(data)
+
+    def tell(self):
+        """Return the number of uncompressed bytes written"""
+        return self._size
+
+    def _submit(self, block):
+        args = (block, self._level, self._dictionary)
+        if self._compression == 'gz':
+            self._dictionary = block[-_GZIP_WINDOW:]
+        if self._stream is not None:
+            self._fileobj.write(self._stream.compress(block))
+            return
+        if self._pool is None:
+            self._fileobj.write(self._compress(*args))
+            return
+        self._pending.append(self._pool.apply_async(self._compress, args))
+        while len(self._pending) >= self._max_pending:
+            self._fileobj.write(self._pending.popleft().get())
+
+    def _terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+        self._pending.clear()
+        self.closed = True
+
+    def close(self):
+        """Compress the remaining data and write the end of the stream
+
+        The underlying file object is not closed.
+        """
+        if self.closed:
+            return
+        try:
+            if self._buffer or (self._compression != 'gz' and not self._size):
+                # there must be at least one stream
+                self._submit(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().get())
+            if self._stream is not None:
+                self._fileobj.write(self._stream.flush())
+            if self._compression == 'gz':
+                # final empty block, and the trailer
+                self._fileobj.write(
+                    zlib.compressobj(
+                        self._level, zlib.DEFLATED, -zlib.MAX_WBITS).flush())
+                self._fileobj.write(
+                    struct.pack('<II', self._crc & 0xffffffff,
+                                self._size & 0xffffffff))
+        finally:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+            self.closed = True
@@ -12,10 +12,14 @@ For further information on GitPython see http://gitpython.readthedocs.org/
 
 """
 from itertools import chain
+from multiprocessing.pool import ThreadPool
 import logging
 from collections import OrderedDict
 import re
 import shlex
+import subprocess
+import tempfile
+import threading
 import time
 import os
 import os.path as op
@@ -43,6 +47,7 @@ from six import text_type
 from six import add_metaclass
 from six import iteritems
 from six import PY2
+from six.moves.queue import Queue
 import git as gitpy
 from git import RemoteProgress
 from gitdb.exc import BadName
@@ -244,6 +249,67 @@ def normalize_path(func):
     return newfunc
 
 
+def _has_output(path, cmd):
+    """Whether command `cmd` outputs anything when run in `path`
+
+    The command is terminated as soon as its first output arrives.
+    """
+    lgr.debug("Probing for output of %s under %s", cmd, path)
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        env=GitRunner.get_git_environ_adjusted(),
+        cwd=path)
+    try:
+        return bool(proc.stdout.read(1))
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+        proc.stdout.close()
+        proc.wait()
+
+
+# content types of the file modes Git reports
+_GIT_MODE_TYPE_MAP = {
+    '100644': 'file',
+    '100755': 'file',
+    '120000': 'symlink',
+    '160000': 'dataset',
+}
+
+# git commands which can read pathspecs from a file (or stdin), and the version
+# of git which introduced it
+_PATHSPEC_FROM_FILE_COMMANDS = {
+    'add': '2.25',
+    'checkout': '2.25',
+    'commit': '2.25',
+    'reset': '2.25',
+    'rm': '2.26',
+}
+
+
+def _can_read_pathspecs(cmd):
+    """Whether the git command `cmd` can be given pathspecs on stdin
+
+    Parameters
+    ----------
+    cmd : list
+      Command without the pathspecs.
+    """
+    if cmd[0] != 'git' or '--' in cmd:
+        return False
+    args = iter(cmd[1:])
+    for arg in args:
+        if arg in ('-c', '-C'):
+            # skip the value of a git option
+            next(args, None)
+        elif not arg.startswith('-'):
+            min_version = _PATHSPEC_FROM_FILE_COMMANDS.get(arg)
+            return min_version is not None and \
+                external_versions['cmd:git'] >= min_version
+    return False
+
+
 @optional_args
 def normalize_paths(func, match_return_type=True, map_filenames_back=False,
                     serialize=False):
@@ -553,6 +619,125 @@ class GitPythonProgressBar(RemoteProgress):
         self._pbar.refresh()
 
 
+class CommitCache(object):
+    """Memoized answers to questions about the commits of a repository
+
+    Answers which are given for full SHAs only (e.g. whether one commit is an
+    ancestor of another) never change, and are kept for the lifetime of the
+    cache. All other answers (e.g. which commit 'HEAD' or a branch points to)
+    are dropped as soon as a ref they might depend on has changed. Only
+    `HEAD`, `packed-refs` and the loose ref files a commitish could name are
+    looked at (by inode, size and mtime), which is much cheaper than asking
+    Git and does not depend on the number of refs in the repository.
+
+    Parameters
+    ----------
+    git_dir : str
+      Absolute path of the repository's git directory.
+
+    Attributes
+    ----------
+    stats : dict
+      Number of 'hits' and 'misses' of cache lookups.
+    """
+
+    # where Git looks for a ref given by name (see gitrevisions(7))
+    _REF_LOCATIONS = ('refs/%s', 'refs/tags/%s', 'refs/heads/%s',
+                      'refs/remotes/%s', 'refs/remotes/%s/HEAD')
+
+    def __init__(self, git_dir):
+        self._git_dir = git_dir
+        # refs of a linked worktree are in the main repository
+        commondir = op.join(git_dir, 'commondir')
+        if op.exists(commondir):
+            with open(commondir) as f:
+                self._common_dir = op.normpath(
+                    op.join(git_dir, f.read().strip()))
+        else:
+            self._common_dir = git_dir
+        self._immutable = {}
+        self._refs = {}
+        self._lookup_state = None
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime)
+
+    def _get_symref_state(self, path):
+        # a symbolic ref is only a few bytes, and whatever it points to
+        # matters as much as the ref itself
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except (IOError, OSError):
+            return None,
+        if content.startswith(b'ref: '):
+            target = content[5:].strip().decode('utf-8', 'replace')
+            return content, self._stat(op.join(self._common_dir, target))
+        return content,
+
+    def _get_ref_paths(self, commitish):
+        # the ref a commitish starts with, e.g. 'master' for 'master~2^{tree}'
+        name = re.split(r'[~^:]|@\{|\.\.', commitish or 'HEAD')[0]
+        if name in ('', '@', 'HEAD') or _FULL_SHA_REGEX.match(name):
+            # HEAD is part of any state
+            return []
+        # pseudo refs like FETCH_HEAD are per worktree
+        return [op.join(self._git_dir, name)] + [
+            op.join(self._common_dir, loc % name)
+            for loc in self._REF_LOCATIONS]
+
+    def _get_refs_state(self, commitishes):
+        state = [self._get_symref_state(op.join(self._git_dir, 'HEAD')),
+                 self._stat(op.join(self._common_dir, 'packed-refs'))]
+        for commitish in commitishes:
+            for path in self._get_ref_paths(commitish):
+                if op.basename(path) == 'HEAD':
+                    state.append(self._get_symref_state(path))
+                else:
+                    state.append(self._stat(path))
+        return tuple(state)
+
+    def lookup(self, key, immutable=False, commitishes=()):
+        """Return a tuple of whether an answer for `key` is known, and the
+        answer
+
+        Unless `immutable`, a known answer is only returned, if none of the
+        refs `commitishes` might name (and neither `HEAD`) have changed since
+        it was stored.
+        """
+        if immutable:
+            found = key in self._immutable
+            value = self._immutable.get(key)
+        else:
+            state = self._get_refs_state(commitishes)
+            self._lookup_state = state
+            stored_state, value = self._refs.get(key, (None, None))
+            found = stored_state == state
+        self.stats['hits' if found else 'misses'] += 1
+        return found, value if found else None
+
+    def store(self, key, value, immutable=False):
+        """Record the answer `value` for `key`
+
+        Answers depending on refs are associated with the state of the refs
+        at the time of the preceding lookup(), so changes made to the refs
+        in the meantime lead to a cache miss next time.
+        """
+        if immutable:
+            self._immutable[key] = value
+        else:
+            self._refs[key] = (self._lookup_state, value)
+
+
+_FULL_SHA_REGEX = re.compile(r'^([0-9a-f]{40}|[0-9a-f]{64})$')
+
+
 @add_metaclass(Flyweight)
 class GitRepo(RepoInterface):
     """Representation of a git repository
@@ -722,6 +907,7 @@ class GitRepo(RepoInterface):
         self.cmd_call_wrapper = runner or GitRunner(cwd=self.path)
         self._repo = repo
         self._cfg = None
+        self._commit_cache = None
 
         _valid_repo = GitRepo.is_valid_repo(path)
         if create and not _valid_repo:
@@ -1488,12 +1674,45 @@ class GitRepo(RepoInterface):
         -------
         str or, if there are not commits yet, None.
         """
-        stdout = self.format_commit("%{}".format('h' if short else 'H'),
-                                    commitish)
-        if stdout is not None:
-            stdout = stdout.splitlines()
-            assert(len(stdout) == 1)
-            return stdout[0]
+        def _get_hexsha():
+            stdout = self.format_commit("%{}".format('h' if short else 'H'),
+                                        commitish)
+            if stdout is not None:
+                stdout = stdout.splitlines()
+                assert(len(stdout) == 1)
+                return stdout[0]
+
+        return self._memoize(
+            ('hexsha', commitish, short), [commitish], _get_hexsha,
+            # the abbreviation of even a full SHA grows with the repository
+            immutable=False if short else None)
+
+    @property
+    def commit_cache(self):
+        """`CommitCache` used by get_hexsha(), commit_exists(),
+        get_merge_base() and is_ancestor()"""
+        if self._commit_cache is None:
+            self._commit_cache = CommitCache(
+                op.join(self.path, self.get_git_dir(self)))
+        return self._commit_cache
+
+    def _memoize(self, key, commitishes, compute, cache_if=None,
+                 immutable=None):
+        """Return the answer for `key` from the commit cache, or `compute()` it
+
+        Unless `immutable` is given, the answer is considered to be immutable,
+        if all `commitishes` (which it depends on) are full SHAs. `cache_if` is
+        a function to decide whether a computed answer is cached.
+        """
+        if immutable is None:
+            immutable = bool(commitishes) and all(
+                c and _FULL_SHA_REGEX.match(c) for c in commitishes)
+        found, value = self.commit_cache.lookup(key, immutable, commitishes)
+        if not found:
+            value = compute()
+            if cache_if is None or cache_if(value):
+                self.commit_cache.store(key, value, immutable)
+        return value
 
     @normalize_paths(match_return_type=False)
     def get_last_commit_hash(self, files):
@@ -1523,16 +1742,23 @@ class GitRepo(RepoInterface):
         -------
         bool
         """
-        try:
-            # Note: The peeling operator "^{commit}" is required so that
-            # rev-parse doesn't succeed if passed a full hexsha that is valid
-            # but doesn't exist.
-            self._git_custom_command(
-                "", ["git", "rev-parse", "--verify", commitish + "^{commit}"],
-                expect_fail=True)
-        except CommandError:
-            return False
-        return True
+        def _commit_exists():
+            try:
+                # Note: The peeling operator "^{commit}" is required so that
+                # rev-parse doesn't succeed if passed a full hexsha that is
+                # valid but doesn't exist.
+                self._git_custom_command(
+                    "",
+                    ["git", "rev-parse", "--verify", commitish + "^{commit}"],
+                    expect_fail=True)
+            except CommandError:
+                return False
+            return True
+
+        return self._memoize(
+            ('commit_exists', commitish), [commitish], _commit_exists,
+            # a missing commit might still be fetched
+            cache_if=bool)
 
     def get_merge_base(self, commitishes):
         """Get a merge base hexsha
@@ -1557,17 +1783,24 @@ class GitRepo(RepoInterface):
         elif len(commitishes) == 1:
             commitishes = commitishes + [self.get_active_branch()]
 
-        try:
-            bases = self.repo.merge_base(*commitishes)
-        except GitCommandError as exc:
-            if "fatal: Not a valid object name" in str(exc):
+        def _get_merge_base():
+            try:
+                bases = self.repo.merge_base(*commitishes)
+            except GitCommandError as exc:
+                if "fatal: Not a valid object name" in str(exc):
+                    # might still be fetched, do not cache
+                    return False
+                raise
+
+            if not bases:
                 return None
-            raise
+            assert(len(bases) == 1)  # we do not do 'all' yet
+            return bases[0].hexsha
 
-        if not bases:
-            return None
-        assert(len(bases) == 1)  # we do not do 'all' yet
-        return bases[0].hexsha
+        return self._memoize(
+            ('merge_base',) + tuple(commitishes), commitishes,
+            _get_merge_base,
+            cache_if=lambda base: base is not False) or None
 
     def is_ancestor(self, reva, revb):
         """Is `reva` an ancestor of `revb`?
@@ -1581,13 +1814,20 @@ class GitRepo(RepoInterface):
         -------
         bool
         """
-        try:
-            self._git_custom_command(
-                "", ["git", "merge-base", "--is-ancestor", reva, revb],
-                expect_fail=True)
-        except CommandError:
-            return False
-        return True
+        def _is_ancestor():
+            try:
+                self._git_custom_command(
+                    "", ["git", "merge-base", "--is-ancestor", reva, revb],
+                    expect_fail=True)
+            except CommandError as e:
+                # 1 means "no", anything else is an error (e.g. a missing
+                # commit, which might still be fetched)
+                return False if e.code == 1 else None
+            return True
+
+        return bool(self._memoize(
+            ('is_ancestor', reva, revb), [reva, revb], _is_ancestor,
+            cache_if=lambda res: res is not None))
 
     def get_commit_date(self, branch=None, date='authored'):
         """Get the date stamp of the last commit (in a branch or head otherwise)
@@ -1862,24 +2102,39 @@ class GitRepo(RepoInterface):
         ):
         """
         Run `func(cmd + files, ...)` possibly multiple times if `files` is too long
+
+        Git commands which can read pathspecs from stdin get `files` that way
+        in a single run instead.
         """
         assert isinstance(cmd, list)
+        if files and 'stdin' not in kwargs and _can_read_pathspecs(cmd):
+            with tempfile.TemporaryFile() as pathspecs:
+                pathspecs.write(b'\0'.join(
+                    # byte strings (on PY2) must not go through text_type()
+                    assure_bytes(text_type(f) if isinstance(f, ut.PurePath)
+                                 else f)
+                    for f in files))
+                pathspecs.seek(0)
+                return func(
+                    cmd + ['--pathspec-from-file=-', '--pathspec-file-nul'],
+                    *args, stdin=pathspecs, **kwargs)
+
         if not files:
             file_chunks = [[]]
         else:
             file_chunks = generate_file_chunks(files, cmd)
 
-        out, err = "", ""
+        out, err = [], []
         for file_chunk in file_chunks:
             out_, err_ = func(
                 cmd + (['--'] if file_chunk else []) + file_chunk,
                 *args, **kwargs)
             # out_, err_ could be None, and probably no need to append empty strings
             if out_:
-                out += out_
+                out.append(out_)
             if err_:
-                err += err_
-        return out, err
+                err.append(err_)
+        return "".join(out), "".join(err)
 
 
 # TODO: --------------------------------------------------------------------
@@ -2974,12 +3229,7 @@ class GitRepo(RepoInterface):
     def _get_content_info_line_helper(self, paths, ref, info, lines,
                                       props_re, get_link_target):
         """Internal helper of get_content_info() to parse Git output"""
-        mode_type_map = {
-            '100644': 'file',
-            '100755': 'file',
-            '120000': 'symlink',
-            '160000': 'dataset',
-        }
+        mode_type_map = _GIT_MODE_TYPE_MAP
         for line in lines:
             if not line:
                 continue
@@ -3044,7 +3294,8 @@ class GitRepo(RepoInterface):
                     else 'directory' if path.is_dir() else 'file'
             info[path] = inf
 
-    def status(self, paths=None, untracked='all', eval_submodule_state='full'):
+    def status(self, paths=None, untracked='all', eval_submodule_state='full',
+               report_clean=True):
         """Simplified `git status` equivalent.
 
         Parameters
@@ -3066,6 +3317,10 @@ class GitRepo(RepoInterface):
           restricted to comparing the submodule's HEAD commit to the one
           recorded in the superdataset. If 'no', the state of the subdataset is
           not evaluated.
+        report_clean : bool
+          If False, only changed content is reported. This is much faster in
+          large repositories, as it does not require listing the entire
+          work tree.
 
         Returns
         -------
@@ -3087,7 +3342,8 @@ class GitRepo(RepoInterface):
             to=None,
             paths=paths,
             untracked=untracked,
-            eval_submodule_state=eval_submodule_state)
+            eval_submodule_state=eval_submodule_state,
+            report_clean=report_clean)
 
     def diff(self, fr, to, paths=None, untracked='all',
              eval_submodule_state='full'):
@@ -3133,19 +3389,24 @@ class GitRepo(RepoInterface):
         return {k: v for k, v in iteritems(self.diffstatus(
             fr=fr, to=to, paths=paths,
             untracked=untracked,
-            eval_submodule_state=eval_submodule_state))
+            eval_submodule_state=eval_submodule_state,
+            report_clean=False))
             if v.get('state', None) != 'clean'}
 
     def diffstatus(self, fr, to, paths=None, untracked='all',
                    eval_submodule_state='full', eval_file_type=True,
-                   _cache=None):
-        """Like diff(), but reports the status of 'clean' content too"""
+                   report_clean=True, _cache=None):
+        """Like diff(), but reports the status of 'clean' content too
+
+        Unless `report_clean` is False, in which case clean content may be
+        omitted from the report, if that is faster to compute.
+        """
         return self._diffstatus(
             fr, to, paths, untracked, eval_submodule_state, eval_file_type,
-            _cache)
+            _cache, report_clean=report_clean)
 
     def _diffstatus(self, fr, to, paths, untracked, eval_state,
-                    eval_file_type, _cache):
+                    eval_file_type, _cache, report_clean=True):
         """Just like diffstatus(), but supports an additional evaluation
         state 'global'. If given, it will return a single 'modified'
         (vs. 'clean') state label for the entire repository, as soon as
@@ -3166,6 +3427,13 @@ class GitRepo(RepoInterface):
                 for p in paths
             ]
 
+        if not report_clean and fr == 'HEAD' and to is None \
+                and eval_state != 'no':
+            # only changes are of interest, ask Git for those instead of
+            # comparing full listings of the worktree and HEAD
+            return self._diffstatus_changes(
+                paths, untracked, eval_state, eval_file_type, _cache)
+
         # TODO report more info from get_content_info() calls in return
         # value, those are cheap and possibly useful to a consumer
         # we need (at most) three calls to git
@@ -3308,6 +3576,7 @@ class GitRepo(RepoInterface):
                 return status
 
         # loop over all subdatasets and look for additional modifications
+        to_probe = OrderedDict()
         for f, st in iteritems(status):
             f = text_type(f)
             if 'state' in st or not st['type'] == 'dataset':
@@ -3329,22 +3598,16 @@ class GitRepo(RepoInterface):
                 else 'clean'
             if eval_state == 'global' and st['state'] == 'modified':
                 return 'modified'
-            if eval_state == 'commit':
+            if eval_state == 'commit' or st['state'] == 'modified':
                 continue
-            # the recorded commit did not change, so we need to make
-            # a more expensive traversal
-            st['state'] = subrepo._diffstatus(
-                # we can use 'HEAD' because we know that the commit
-                # did not change. using 'HEAD' will facilitate
-                # caching the result
-                fr='HEAD',
-                to=None,
-                paths=None,
-                untracked=untracked,
-                eval_state='global',
-                eval_file_type=False,
-                _cache=_cache) if st['state'] == 'clean' else 'modified'
-            if eval_state == 'global' and st['state'] == 'modified':
+            to_probe[f] = st
+
+        # the recorded commit did not change, so we need to make
+        # a more expensive check for modifications in these subdatasets
+        for f, modified in self._iter_subrepos_modified(
+                list(to_probe), untracked, None, _cache):
+            to_probe[f]['state'] = 'modified' if modified else 'clean'
+            if eval_state == 'global' and modified:
                 return 'modified'
 
         if eval_state == 'global':
@@ -3352,6 +3615,239 @@ class GitRepo(RepoInterface):
         else:
             return status
 
+    def is_modified(self, untracked='all', eval_submodule_state='full',
+                    jobs=None, _cache=None):
+        """Whether anything in the worktree differs from HEAD
+
+        Unlike status(), this does not report what was modified, but returns
+        as soon as a first modification is found. Checks are ordered from
+        cheap to expensive: changes to tracked content (including the state
+        of the subdatasets' HEAD), untracked content, and finally modifications
+        inside subdatasets.
+
+        Parameters
+        ----------
+        untracked : {'no', 'normal', 'all'}
+          Whether untracked content counts as a modification ('normal' and
+          'all' are equivalent here).
+        eval_submodule_state : {'full', 'commit', 'no'}
+          How to evaluate the state of subdatasets, see status().
+        jobs : int, optional
+          Number of subdatasets to inspect in parallel. By default, the
+          value of the `datalad.status.jobs` configuration is used.
+
+        Returns
+        -------
+        bool
+        """
+        if _cache is None:
+            _cache = {}
+        key = self.path, 'is_modified', untracked, eval_submodule_state
+        if key not in _cache:
+            _cache[key] = self._is_modified(
+                untracked, eval_submodule_state, jobs, _cache)
+        return _cache[key]
+
+    def _is_modified(self, untracked, eval_submodule_state, jobs, _cache):
+        # make sure no operations are pending before we figure things
+        # out in the worktree
+        self.precommit()
+        if self.get_hexsha() is None:
+            # nothing committed yet, anything in the index is new
+            if _has_output(self.path, ['git', 'ls-files']):
+                return True
+        else:
+            try:
+                self._git_custom_command(
+                    None,
+                    ['git', 'diff', '--quiet', 'HEAD',
+                     # only the commits of subdatasets are compared here
+                     '--ignore-submodules={}'.format(
+                         'all' if eval_submodule_state == 'no' else 'dirty')],
+                    expect_fail=True)
+            except CommandError as e:
+                if e.code == 1:
+                    # --quiet reports differences by exit code only
+                    return True
+                raise
+        if untracked != 'no' and _has_output(
+                self.path,
+                ['git', 'ls-files', '--others', '--exclude-standard',
+                 '--directory', '--no-empty-directory']):
+            return True
+        if eval_submodule_state != 'full':
+            return False
+        return any(modified for _, modified in self._iter_subrepos_modified(
+            [p for p in self._get_submodule_paths()
+             if GitRepo.is_valid_repo(p)],
+            untracked, jobs, _cache))
+
+    def _get_submodule_paths(self):
+        """Return the absolute paths of all submodules in .gitmodules"""
+        if not op.exists(op.join(self.path, '.gitmodules')):
+            return []
+        try:
+            stdout, _ = self._git_custom_command(
+                None,
+                ['git', 'config', '-z', '--file', '.gitmodules',
+                 '--get-regexp', r'^submodule\..*\.path$'],
+                expect_fail=True)
+        except CommandError as e:
+            if e.code == 1:
+                # no submodules
+                return []
+            raise
+        return [
+            op.join(self.path, *rec.split('\n', 1)[1].split('/'))
+            for rec in stdout.split('\0') if rec]
+
+    def _iter_subrepos_modified(self, paths, untracked, jobs, _cache):
+        """Yield `(path, modified)` for subdatasets with an unchanged commit
+
+        Subdatasets are inspected in parallel, results are yielded in the
+        order in which they become available.
+        """
+        def _probe(path):
+            # nested subdatasets are inspected sequentially, to not
+            # multiply the number of threads with each level
+            return path, GitRepo(path).is_modified(
+                untracked=untracked, jobs=1, _cache=_cache)
+
+        if jobs is None:
+            jobs = self.config.obtain('datalad.status.jobs')
+        if jobs <= 1 or len(paths) < 2:
+            for p in paths:
+                yield _probe(p)
+            return
+        pool = ThreadPool(min(jobs, len(paths)))
+        try:
+            for res in pool.imap_unordered(_probe, paths):
+                yield res
+        finally:
+            # nothing more is needed, when a consumer stops early
+            pool.terminate()
+
+    def _diffstatus_changes(self, paths, untracked, eval_state,
+                            eval_file_type, _cache):
+        """Helper of _diffstatus() reporting only changes of the worktree
+        with respect to HEAD.
+
+        A single `git status --porcelain=v2` call does all the work, which
+        scales with the number of changes rather than with the size of the
+        repository. Git also evaluates the state of subdatasets.
+        """
+        # with 'commit' only a changed commit of a subdataset matters
+        ignore_submodules = 'dirty' if eval_state == 'commit' else 'none'
+        key = self.path, 'porcelain', untracked, ignore_submodules
+        if key in _cache:
+            records = _cache[key]
+        else:
+            # make sure no operations are pending before we figure things
+            # out in the worktree
+            self.precommit()
+            records = self._git_custom_command(
+                None,
+                ['git', 'status', '--porcelain=v2', '-z',
+                 '--untracked-files={}'.format(untracked),
+                 '--ignore-submodules={}'.format(ignore_submodules)],
+                expect_fail=True)[0].split('\0')
+            _cache[key] = records
+
+        if paths:
+            paths = [ut.PurePosixPath(p) for p in paths]
+
+        def _get_type(mode, path):
+            type_ = _GIT_MODE_TYPE_MAP.get(mode, mode)
+            if type_ == 'symlink' and eval_file_type:
+                try:
+                    target = os.readlink(text_type(path))
+                except OSError:
+                    target = op.realpath(text_type(path))
+                if '.git/annex/objects' in ut.Path(target).as_posix():
+                    # report annex symlink pointers as file, like
+                    # get_content_info() does
+                    type_ = 'file'
+            return type_
+
+        status = OrderedDict()
+
+        def _report(path, props):
+            # same path matching as in get_content_info()
+            path = ut.PurePosixPath(path)
+            if paths \
+                and not any(
+                    path == c or path in c.parents or c in path.parents
+                    for c in paths):
+                return
+            path = self.pathobj.joinpath(path)
+            if 'type' not in props:
+                props['type'] = 'symlink' if path.is_symlink() \
+                    else 'directory' if path.is_dir() else 'file'
+            elif props['type'] == 'symlink':
+                props['type'] = _get_type('120000', path)
+            status[path] = props
+
+        records = iter(records)
+        for rec in records:
+            if rec.startswith('? '):
+                _report(rec[2:], dict(state='untracked'))
+                continue
+            elif rec.startswith('u '):
+                # unmerged, report our side
+                xy, sub, _, m_ours, _, _, _, h_ours, _, path = \
+                    rec[2:].split(' ', 9)
+                _report(path, dict(
+                    state='modified',
+                    type=_GIT_MODE_TYPE_MAP.get(m_ours, m_ours),
+                    gitshasum=h_ours))
+                continue
+            elif not rec.startswith(('1 ', '2 ')):
+                # ignored content, or nothing
+                continue
+            if rec[0] == '1':
+                xy, sub, m_head, m_index, _, h_head, h_index, path = \
+                    rec[2:].split(' ', 7)
+            else:
+                xy, sub, m_head, m_index, _, h_head, h_index, _, path = \
+                    rec[2:].split(' ', 8)
+                # a rename or copy, the origin follows as a separate record
+                origpath = next(records)
+                if xy[0] == 'R':
+                    _report(origpath, dict(
+                        state='deleted',
+                        type=_GIT_MODE_TYPE_MAP.get(m_head, m_head),
+                        gitshasum=h_head))
+                xy = 'A' + xy[1]
+            if xy[0] == 'A':
+                props = dict(state='added', type=m_index, gitshasum=h_index)
+            elif xy[0] == 'D':
+                props = dict(state='deleted', type=m_head, gitshasum=h_head)
+            elif sub.startswith('S') and xy[1] != 'D':
+                # a subdataset, whose directory is still around (a removed
+                # one is reported as deleted below, like any other path)
+                if xy[0] == '.' and sub[1:3] == '..' and \
+                        (sub[3] != 'U' or untracked == 'no'):
+                    # untracked content in a subdataset is only a
+                    # modification, if untracked content is considered
+                    continue
+                props = dict(
+                    state='modified', type=m_index,
+                    gitshasum=h_index, prev_gitshasum=h_head)
+            elif xy[1] == 'D':
+                props = dict(
+                    state='deleted', type=m_index, prev_gitshasum=h_head)
+            else:
+                props = dict(
+                    state='modified', type=m_index,
+                    gitshasum=h_index, prev_gitshasum=h_head)
+            props['type'] = _GIT_MODE_TYPE_MAP.get(
+                props['type'], props['type'])
+            _report(path, props)
+
+        if eval_state == 'global':
+            return 'modified' if status else 'clean'
+        return status
+
     def _save_pre(self, paths, _status, **kwargs):
         # helper to get an actionable status report
         if paths is not None and not paths and not _status:
@@ -3361,6 +3857,7 @@ class GitRepo(RepoInterface):
                 kwargs['untracked'] = 'normal'
             status = self.status(
                 paths=paths,
+                report_clean=False,
                 **{k: kwargs[k] for k in kwargs
                    if k in ('untracked', 'eval_submodule_state')})
         else:
@@ -3654,6 +4151,168 @@ class GitRepo(RepoInterface):
             raise
 
 
+class _CatFileContent(object):
+    """Read-only file object with the content of an object from cat-file"""
+
+    def __init__(self, stream, size):
+        self._stream = stream
+        self._left = size
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._left:
+            size = self._left
+        data = self._stream.read(size) if size else b''
+        if len(data) < size:
+            raise IOError("Unexpected end of the output of git cat-file")
+        self._left -= size
+        return data
+
+    def _finish(self):
+        """Skip the content which was not read and its terminating newline"""
+        while self._left:
+            self.read(min(self._left, 1024 ** 2))
+        self._stream.read(1)
+
+
+class BatchedCatFile(object):
+    """A `git cat-file --batch` process to read any number of objects
+
+    Unlike BatchedCommand, it communicates in bytes and objects' content is
+    read directly from the pipe, so objects of any size are handled with
+    constant memory use.
+
+    Parameters
+    ----------
+    path : str
+      Repository to read the objects from.
+    check : bool, optional
+      Use `--batch-check`, i.e. report only SHA, type and size of objects,
+      but not their content.
+    """
+
+    def __init__(self, path, check=False):
+        self.path = path
+        self.check = check
+        self._process = None
+        self._content = None
+
+    def _start(self):
+        cmd = ['git', 'cat-file', '--batch-check' if self.check else '--batch']
+        lgr.debug("Starting %s under %s", cmd, self.path)
+        return subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=GitRunner.get_git_environ_adjusted(),
+            cwd=self.path)
+
+    def _read_response(self, stdout):
+        if self._content is not None:
+            self._content._finish()
+            self._content = None
+        header = stdout.readline()
+        if not header:
+            raise CommandError(
+                msg="git cat-file terminated unexpectedly", cmd='git cat-file')
+        fields = header.split()
+        if len(fields) != 3:
+            # "<object> missing" or "<object> ambiguous"
+            return None
+        sha, type_, size = \
+            assure_unicode(fields[0]), assure_unicode(fields[1]), int(fields[2])
+        if self.check:
+            return sha, type_, size
+        self._content = _CatFileContent(stdout, size)
+        return sha, type_, size, self._content
+
+    def __call__(self, obj):
+        """Request an object
+
+        Parameters
+        ----------
+        obj : str
+          Anything `git cat-file` understands, e.g. a SHA or REF:PATH.
+
+        Returns
+        -------
+        tuple or None
+          None if there is no such object.  Otherwise (SHA, TYPE, SIZE),
+          with `check`, or (SHA, TYPE, SIZE, FILE), with FILE to read the
+          content from.  The content must be read before the next request,
+          since it is skipped otherwise.
+        """
+        if self._process is None:
+            self._process = self._start()
+        self._process.stdin.write(assure_bytes(obj) + b'\n')
+        self._process.stdin.flush()
+        return self._read_response(self._process.stdout)
+
+    def iter_objects(self, objs):
+        """Request all `objs` without waiting for each response
+
+        Requests are sent by a thread, while responses are read, so a
+        large number of objects could be processed without a round trip per
+        object.
+
+        Yields
+        ------
+        tuple
+          (OBJ, RESPONSE) with the RESPONSE as returned by a call.
+        """
+        process = self._start()
+        sent = Queue()
+        end = object()
+
+        def _send():
+            try:
+                for obj in objs:
+                    sent.put(obj)
+                    process.stdin.write(assure_bytes(obj) + b'\n')
+                    process.stdin.flush()
+            except (IOError, OSError, ValueError):
+                # reading was aborted
+                pass
+            finally:
+                sent.put(end)
+                try:
+                    process.stdin.close()
+                except (IOError, OSError):
+                    pass
+
+        sender = threading.Thread(target=_send)
+        sender.daemon = True
+        sender.start()
+        try:
+            while True:
+                obj = sent.get()
+                if obj is end:
+                    break
+                yield obj, self._read_response(process.stdout)
+        finally:
+            self._content = None
+            process.stdout.close()
+            if process.poll() is None:
+                process.terminate()
+            process.wait()
+            sender.join()
+
+    def close(self):
+        """Terminate the process, if running"""
+        self._content = None
+        if self._process:
+            process = self._process
+            self._process = None
+            process.stdin.close()
+            process.stdout.close()
+            process.wait()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
 # TODO
 # remove submodule: nope, this is just deinit_submodule + remove
 # status?
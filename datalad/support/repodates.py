@@ -13,15 +13,53 @@ import logging
 import operator
 import re
 import time
+from collections import (
+    deque,
+    OrderedDict,
+)
 
 from six import string_types
 
 from datalad.log import log_progress
-from datalad.support.gitrepo import GitRepo, GitCommandError
+from datalad.support.gitrepo import (
+    BatchedCatFile,
+    GitCommandError,
+    GitRepo,
+)
 
 lgr = logging.getLogger('datalad.repodates')
 
 
+def _iter_blob_contents(repo, blobs):
+    """Read the content of `blobs` through a single `git cat-file --batch`
+
+    Parameters
+    ----------
+    repo : GitRepo
+    blobs : iterable
+      (hexsha, file name) tuples.
+
+    Returns
+    -------
+    A generator object that returns (hexsha, content, file name) for each blob.
+    """
+    # Blobs are requested by a thread, while we read their content, so keep
+    # the names of requested blobs in the order of the responses.
+    fnames = deque()
+
+    def _request():
+        for obj, fname in blobs:
+            fnames.append(fname)
+            yield obj
+
+    for obj, res in BatchedCatFile(repo.path).iter_objects(_request()):
+        fname = fnames.popleft()
+        if res is None:
+            lgr.debug("Blob %s (%s) is missing", obj, fname)
+            continue
+        yield obj, res[3].read().decode("utf-8", "replace"), fname
+
+
 def branch_blobs(repo, branch):
     """Get all blobs for `branch`.
 
@@ -42,23 +80,25 @@ def branch_blobs(repo, branch):
     lines = git.rev_list(branch, objects=True).splitlines()
     # Trees and blobs have an associated path printed.
     objects = (ln.split() for ln in lines)
-    blob_trees = [obj for obj in objects if len(obj) == 2]
+    blob_trees = dict(obj for obj in objects if len(obj) == 2)
 
     num_objects = len(blob_trees)
 
     log_progress(lgr.info, "repodates_branch_blobs",
                  "Checking %d objects", num_objects,
                  label="Checking objects", total=num_objects, unit=" objects")
-    # This is inefficient.  It makes a git call for each object, some of which
-    # aren't even blobs.  We could instead use 'git cat-file --batch'.
-    for obj, fname in blob_trees:
+    # Weed out the trees with a single `git cat-file --batch-check`, and read
+    # the content of the blobs with a single `git cat-file --batch`.  Both
+    # stream, so the object types are checked while the blobs are read.
+    checked = BatchedCatFile(repo.path, check=True).iter_objects(blob_trees)
+    blobs = ((obj, blob_trees[obj])
+             for obj, res in checked
+             if res is not None and res[1] == "blob")
+    for obj, content, fname in _iter_blob_contents(repo, blobs):
         log_progress(lgr.info, "repodates_branch_blobs",
                      "Checking %s", obj,
                      increment=True, update=1)
-        try:
-            yield obj, git.cat_file("blob", obj), fname
-        except GitCommandError:  # The object was a tree.
-            continue
+        yield obj, content, fname
     log_progress(lgr.info, "repodates_branch_blobs",
                  "Finished checking %d objects", num_objects)
 
@@ -78,25 +118,25 @@ def branch_blobs_in_tree(repo, branch):
     the first file name that is reported by 'git ls-tree' is used (i.e., one
     entry per blob is yielded).
     """
-    seen_blobs = set()
     git = repo.repo.git
     out = git.ls_tree(branch, z=True, r=True)
     if out:
-        lines = out.strip("\0").split("\0")
-        num_lines = len(lines)
+        blobs = OrderedDict()
+        for line in out.strip("\0").split("\0"):
+            _, obj_type, obj, fname = line.split()
+            if obj_type == "blob" and obj not in blobs:
+                blobs[obj] = fname
+        num_lines = len(blobs)
         log_progress(lgr.info,
                      "repodates_blobs_in_tree",
                      "Checking %d objects in git-annex tree", num_lines,
                      label="Checking objects", total=num_lines,
                      unit=" objects")
-        for line in lines:
-            _, obj_type, obj, fname = line.split()
+        for obj, content, fname in _iter_blob_contents(repo, blobs.items()):
             log_progress(lgr.info, "repodates_blobs_in_tree",
                          "Checking %s", obj,
                          increment=True, update=1)
-            if obj_type == "blob" and obj not in seen_blobs:
-                yield obj, git.cat_file("blob", obj), fname
-            seen_blobs.add(obj)
+            yield obj, content, fname
         log_progress(lgr.info, "repodates_blobs_in_tree",
                      "Finished checking %d blobs", num_lines)
 
@@ -127,7 +167,48 @@ def search_annex_timestamps(text):
         yield int(match.group(1))
 
 
-def annex_dates(repo, all_objects=True):
+def _search_annex_timestamps_batch(blobs):
+    """Search a list of (hexsha, content, file name) in a worker process"""
+    return [(hexsha, list(search_annex_timestamps(content)), fname)
+            for hexsha, content, fname in blobs]
+
+
+def _search_annex_timestamps_parallel(blobs, jobs, batch_size=256):
+    """Like `search_annex_timestamps` on each of `blobs`, in `jobs` processes
+
+    Blobs are sent to the workers in batches, and results are yielded in the
+    order of `blobs`.  The number of batches in flight is bounded, so the
+    memory use does not depend on the number of blobs.
+    """
+    from multiprocessing import Pool
+
+    pool = Pool(jobs)
+    pending = deque()
+    try:
+        batch = []
+        for blob in blobs:
+            batch.append(blob)
+            if len(batch) < batch_size:
+                continue
+            pending.append(
+                pool.apply_async(_search_annex_timestamps_batch, (batch,)))
+            batch = []
+            while len(pending) >= 2 * jobs:
+                for res in pending.popleft().get():
+                    yield res
+        if batch:
+            pending.append(
+                pool.apply_async(_search_annex_timestamps_batch, (batch,)))
+        while pending:
+            for res in pending.popleft().get():
+                yield res
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def annex_dates(repo, all_objects=True, jobs=None):
     """Get git-annex branch blobs containing dates.
 
     Parameters
@@ -137,14 +218,22 @@ def annex_dates(repo, all_objects=True):
         Instead for searching the content of all blobs in the git-annex branch,
         search only the blobs that are in the tree of the tip of the git-annex
         branch.
+    jobs : int, optional
+        Number of worker processes to search the blobs' content for
+        timestamps.  By default, it is searched in the current process.
 
     Returns
     -------
-    A generator object that returns a tuple with the blob hexsha, a generator
+    A generator object that returns a tuple with the blob hexsha, an iterable
     with the blob's timestamps, and an associated file name.
     """
     blob_fn = branch_blobs if all_objects else branch_blobs_in_tree
-    for hexsha, content, fname in blob_fn(repo, "git-annex"):
+    blobs = blob_fn(repo, "git-annex")
+    if jobs and jobs > 1:
+        for res in _search_annex_timestamps_parallel(blobs, jobs):
+            yield res
+        return
+    for hexsha, content, fname in blobs:
         yield hexsha, search_annex_timestamps(content), fname
 
 
@@ -201,7 +290,7 @@ def log_dates(repo, revs=None):
 
 
 def check_dates(repo, timestamp=None, which="newer", revs=None,
-                annex=True, tags=True):
+                annex=True, tags=True, jobs=None):
     """Search for dates in `repo` that are newer than `timestamp`.
 
     This examines commit logs of local branches and the content of blobs in the
@@ -225,6 +314,8 @@ def check_dates(repo, timestamp=None, which="newer", revs=None,
         git-annex branch.  If False, do not search git-annex blobs.
     tags : bool, optional
         Whether to check dates the dates of annotated tags.
+    jobs : int, optional
+        Number of worker processes to search the git-annex blobs with.
 
     Returns
     -------
@@ -263,7 +354,7 @@ def check_dates(repo, timestamp=None, which="newer", revs=None,
         all_objects = annex != "tree"
         lgr.debug("Checking dates in blobs of git-annex branch%s",
                   "" if all_objects else "'s tip")
-        for hexsha, timestamps, fname in annex_dates(repo, all_objects):
+        for hexsha, timestamps, fname in annex_dates(repo, all_objects, jobs=jobs):
             hits = [ts for ts in timestamps if cmp_fn(ts, timestamp)]
             if hits:
                 results[hexsha] = {"type": "annex-blob",
@@ -13,6 +13,7 @@
 from datalad.tests.utils import known_failure_v6
 
 import logging
+import threading
 from functools import partial
 from glob import glob
 import os
@@ -231,6 +232,114 @@ def test_AnnexRepo_get_file_key(src, annex_path):
     eq_(ar.get_file_key("test.dat", batch=True), '')
     eq_(ar.get_file_key("test-annex.dat", batch=True), test_annex_key)
 
+    # keys are looked up without git-annex
+    with patch.object(AnnexRepo, '_run_annex_command',
+                      side_effect=AssertionError("must not be called")):
+        eq_(ar.get_file_key(["test.dat", "test-annex.dat"]),
+            ['', test_annex_key])
+        info = ar.get_content_annexinfo(init=None, ref='HEAD')
+    rec = info[ar.pathobj / 'test-annex.dat']
+    eq_(rec['key'], test_annex_key)
+    eq_(rec['bytesize'], 28)
+    # same properties as reported by git-annex itself
+    annex_rec = [
+        r for r in ar._run_annex_command_json(
+            'findref', opts=['--copies', '0', 'HEAD'])
+        if r['file'] == 'test-annex.dat'][0]
+    for prop in ('key', 'backend', 'keyname', 'hashdirmixed', 'hashdirlower'):
+        eq_(rec[prop], annex_rec[prop])
+
+
+def test_annex_key_props():
+    from datalad.support.annexrepo import (
+        _get_annex_key_from_link,
+        _get_annex_key_props,
+    )
+    key = 'MD5E-s5--275876e34cf609db118f3d84b799a790.txt'
+    eq_(_get_annex_key_from_link(
+        '../.git/annex/objects/7p/gp/{0}/{0}'.format(key)), key)
+    eq_(_get_annex_key_from_link('/annex/objects/{}'.format(key)), key)
+    eq_(_get_annex_key_from_link('some/other/target'), None)
+    eq_(_get_annex_key_from_link('/annex/objects/'), None)
+    eq_(_get_annex_key_props(key),
+        {'key': key,
+         'backend': 'MD5E',
+         'keyname': '275876e34cf609db118f3d84b799a790.txt',
+         'bytesize': '5',
+         'hashdirmixed': opj('7p', 'gp', ''),
+         'hashdirlower': opj('f33', '94b', '')})
+    eq_(_get_annex_key_props('URL--http://example.com')['bytesize'],
+        'unknown')
+    # keys are escaped in link targets, e.g. the path in an old WORM key,
+    # and hashed in their original form, spaces and all
+    key = 'WORM-s5-m1555000000--sub/my file.txt'
+    eq_(_get_annex_key_from_link(
+        '../.git/annex/objects/XP/qx/{0}/{0}'.format(
+            'WORM-s5-m1555000000--sub%my file.txt')), key)
+    eq_(_get_annex_key_from_link('/annex/objects/URL--http&c%%a&ab&sc'),
+        'URL--http://a&b%c')
+    eq_(_get_annex_key_props(key),
+        {'key': key,
+         'backend': 'WORM',
+         'keyname': 'sub/my file.txt',
+         'bytesize': '5',
+         'hashdirmixed': opj('XP', 'qx', ''),
+         'hashdirlower': opj('3ed', '62e', '')})
+    # same as git-annex's own example of the hash directories
+    eq_(_get_annex_key_props(
+        'SHA256E-s0--e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b'
+        '7852b855')['hashdirmixed'], opj('pX', 'ZJ', ''))
+
+
+@with_tree(tree={'annexed.dat': 'content', 'ingit.txt': 'text'})
+def test_get_content_annexinfo_noinit(path):
+    ar = AnnexRepo(path, create=True)
+    ar.add('annexed.dat', git=False)
+    ar.add('ingit.txt', git=True)
+    ar.commit('add')
+    annexed = ar.pathobj / 'annexed.dat'
+    for ref in (None, 'HEAD'):
+        info = ar.get_content_annexinfo(
+            init=None, ref=ref, eval_availability=True)
+        # only annexed files are reported without an init
+        eq_(list(info), [annexed])
+        eq_(info[annexed]['key'], ar.get_file_key('annexed.dat'))
+        eq_(info[annexed]['bytesize'], 7)
+        ok_(info[annexed]['has_content'])
+    # limited to the requested paths
+    eq_(ar.get_content_annexinfo(paths=['ingit.txt'], init=None), {})
+
+
+@with_tempfile(mkdir=True)
+def test_iter_annex_keys_sizes(path):
+    from datalad.support.annexrepo import _MAX_POINTER_SIZE
+    from datalad.support.gitrepo import BatchedCatFile
+    ar = AnnexRepo(path, create=True)
+    pointer = '/annex/objects/MD5-s1--0cc175b9c0f1b6a831c399e269772661\n'
+    create_tree(path, {
+        'pointer': pointer,
+        # starts like a pointer file, but is too large to be one
+        'large': pointer + 'x' * _MAX_POINTER_SIZE,
+    })
+    ar.add(['pointer', 'large'], git=True)
+    ar.commit('add')
+    read = []
+    iter_objects = BatchedCatFile.iter_objects
+
+    def _iter_objects(self, objs):
+        objs = list(objs)
+        if not self.check:
+            read.extend(objs)
+        return iter_objects(self, objs)
+
+    for ref in (None, 'HEAD'):
+        del read[:]
+        with patch.object(BatchedCatFile, 'iter_objects', _iter_objects):
+            keys = dict(ar._iter_annex_keys(ref))
+        eq_(keys, {'pointer': 'MD5-s1--0cc175b9c0f1b6a831c399e269772661',
+                   'large': None})
+        # the content of the large file is not read
+        eq_(len(read), 1)
 
 
 @with_tempfile(mkdir=True)
@@ -492,6 +601,13 @@ def test_find_batch_equivalence(path):
     # If we give a subdirectory, we split that output.
     eq_(set(ar.find(["subdir"])["subdir"]), {"subdir/d", "subdir/e"})
     eq_(ar.find(["subdir"]), ar.find(["subdir"], batch=True))
+    # a single git-annex call answers for files and directories alike
+    with patch.object(AnnexRepo, '_run_annex_command',
+                      wraps=ar._run_annex_command) as run:
+        found = ar.find(query + ["subdir"])
+    eq_(run.call_count, 1)
+    eq_(set(found.pop("subdir")), {"subdir/d", "subdir/e"})
+    eq_(expected, found)
 
 
 @with_tempfile(mkdir=True)
@@ -841,6 +957,42 @@ def test_AnnexRepo_add_to_git(path):
     ok_clean_git(repo, annex=True, ignore_submodules=True)
 
 
+def test_split_by_size():
+    from datalad.support.annexrepo import _split_by_size
+    sizes = {'a': 10, 'b': 7, 'c': 5, 'd': 3, 'e': 2, 'f': 0}
+    eq_(_split_by_size(sizes, 2), [['b', 'c', 'e'], ['a', 'd', 'f']])
+    eq_(_split_by_size(sizes, 3), [['a'], ['b', 'e'], ['c', 'd', 'f']])
+    # never more groups than paths, and no empty ones
+    eq_(_split_by_size({'a': 1, 'b': 1}, 4), [['a'], ['b']])
+    eq_(_split_by_size(sizes, 1), [['a', 'b', 'c', 'd', 'e', 'f']])
+    eq_(_split_by_size({}, 2), [])
+
+
+@with_tree(tree={'small%i' % i: 'x' * i for i in range(6)})
+def test_AnnexRepo_add_sharded(path):
+    repo = AnnexRepo(path, create=True)
+    files = sorted(f for f in os.listdir(path) if f.startswith('small'))
+    with open(opj(path, 'big'), 'w') as f:
+        f.write('big' * 100)
+    files.append('big')
+    with patch.object(AnnexRepo, '_iter_annex_command_json',
+                      wraps=repo._iter_annex_command_json) as iter_json:
+        res = list(repo._iter_annex_add(
+            files, ['--include-dotfiles'], shards=3))
+    # one git-annex process per shard
+    eq_(iter_json.call_count, 3)
+    eq_(sorted(r['file'] for r in res), sorted(files))
+    ok_(all(r['success'] for r in res))
+    # everything was staged in the main index, and no temporary index
+    # is left behind
+    eq_(set(repo.get_indexed_files()), set(files))
+    eq_(glob(opj(repo.path, '.git', 'datalad-*.index')), [])
+    for r in res:
+        eq_(repo.get_file_key(r['file']), r['key'])
+    repo.commit("sharded add")
+    ok_clean_git(repo, annex=True)
+
+
 @with_testrepos('.*annex.*', flavors=['local'])
 # TODO: flavor 'network' has wrong content for test-annex.dat!
 @with_tempfile
@@ -1593,6 +1745,40 @@ def test_ProcessAnnexProgressIndicators():
         eq_(proc.finish(), None)
         eq_(proc.total_pbar, None)
 
+    # updates of a key with a progress bar are coalesced
+    progress_line = \
+        '{"byte-progress":%d,"action":{"command":"get","note":"from web...",' \
+        '"key":"key1","file":"file1"},"percent-progress":"10%%"}'
+    proc = ProcessAnnexProgressIndicators()
+    proc.update_interval = 1000
+    with swallow_outputs():
+        eq_(proc(progress_line % 10), None)
+        pbar = proc.pbars[('get', 'key1')]
+        from datalad.support.json_py import loads as json_loads
+        with patch('datalad.support.annexrepo.json_loads',
+                   wraps=json_loads) as loads, \
+                patch('datalad.support.annexrepo.json.loads') as slow_loads:
+            eq_(proc(progress_line % 20), None)
+            eq_(proc(progress_line % 30), None)
+        # the first update was shown right away, the following one
+        # waits without being parsed
+        eq_(loads.call_count, 1)
+        eq_(slow_loads.call_count, 0)
+        eq_(pbar._old_value, 20)
+        eq_(list(proc._pending.values()), [progress_line % 30])
+        # only the last update is shown once the interval passed
+        proc.update_interval = 0
+        eq_(proc(progress_line % 40), None)
+        eq_(proc._pending, {})
+        eq_(pbar._old_value, 40)
+        # pending updates are dropped when the download completes
+        proc.update_interval = 1000
+        eq_(proc(progress_line % 50), None)
+        eq_(proc(success_lines[0]), success_lines[0])
+        eq_(proc._pending, {})
+        eq_(proc.pbars, {})
+        eq_(proc.finish(), None)
+
 
 @with_tempfile
 @with_tempfile
@@ -2019,6 +2205,65 @@ def test_error_reporting(path):
     )
 
 
+@with_tempfile(mkdir=True)
+def test_iter_annex_command_json(path):
+    ar = AnnexRepo(path, create=True)
+    first_consumed = threading.Event()
+
+    def run_get(command, files=None, annex_options=None, log_stdout=None,
+                **kwargs):
+        assert_in('--json', annex_options)
+        log_stdout('{"command": "get", "file": "a", "success": true}\n')
+        # the first result gets to the consumer while we are running
+        ok_(first_consumed.wait(10))
+        log_stdout('some noise\n')
+        log_stdout('{"byte-progress": 10}\n')
+        log_stdout('{"command": "get", "file": "b", "success": false}\n')
+        raise CommandError(
+            "Failed to run ...", stdout='some noise\n',
+            stderr='git-annex: c d not found\n')
+
+    with patch.object(ar, '_run_annex_command', run_get), swallow_logs():
+        results = ar._iter_annex_command_json('get', files=['a', 'b', 'c d'])
+        eq_(next(results), {'command': 'get', 'file': 'a', 'success': True})
+        first_consumed.set()
+        eq_(list(results),
+            [{'command': 'get', 'file': 'b', 'success': False},
+             {'command': 'get', 'file': 'c d', 'note': 'not found',
+              'success': False}])
+
+    def run_out_of_space(command, **kwargs):
+        kwargs['log_stdout'](
+            '{"command": "get", "file": "a", "success": true}\n')
+        raise CommandError(
+            "Failed to run ...", stdout='',
+            stderr='git-annex: not enough free space, need 5 MB more\n')
+
+    with patch.object(ar, '_run_annex_command', run_out_of_space):
+        results = ar._iter_annex_command_json('get', files=['a'])
+        eq_(next(results)['file'], 'a')
+        assert_raises(OutOfSpaceError, list, results)
+
+    emitted = []
+
+    def run_many(command, log_stdout=None, **kwargs):
+        for i in range(100):
+            log_stdout(
+                '{"command": "get", "file": "%d", "success": true}\n' % i)
+            emitted.append(i)
+        return '', ''
+
+    with patch.object(ar, '_run_annex_command', run_many), \
+            patch('datalad.support.annexrepo._JSON_RESULTS_BUFFER', 2):
+        results = ar._iter_annex_command_json('get', files=['a'])
+        eq_(next(results)['file'], '0')
+        # output is not read beyond what is buffered for the consumer
+        ok_(len(emitted) < 5)
+        # and the command is aborted once the consumer is gone
+        results.close()
+    ok_(len(emitted) < 5)
+
+
 # http://git-annex.branchable.com/bugs/cannot_commit___34__annex_add__34__ed_modified_file_which_switched_its_largefile_status_to_be_committed_to_git_now/#comment-bf70dd0071de1bfdae9fd4f736fd1ec
 # https://github.com/datalad/datalad/issues/1651
 @with_tree(tree={
@@ -0,0 +1,76 @@
+# emacs: -*- mode: python; py-indent-offset: 4; tab-width: 4; indent-tabs-mode: nil -*-
+# ex: set sts=4 ts=4 sw=4 noet:
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the datalad package for the
+#   copyright and license terms.
+#
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""Tests of the parallel block compression"""
+
+import bz2
+import gzip
+import random
+import tarfile
+
+from six import (
+    BytesIO,
+    PY2,
+)
+
+from ..compression import BlockCompressor
+from datalad.tests.utils import (
+    assert_raises,
+    eq_,
+    SkipTest,
+)
+
+
+def _decompress(compression, data):
+    if compression == 'gz':
+        with gzip.GzipFile(fileobj=BytesIO(data)) as f:
+            return f.read()
+    if compression == 'bz2':
+        return bz2.decompress(data)
+    import lzma
+    return lzma.decompress(data)
+
+
+def _compress(compression, data, **kwargs):
+    out = BytesIO()
+    with BlockCompressor(out, compression, **kwargs) as f:
+        # in chunks not aligned with blocks
+        for i in range(0, len(data), 1000):
+            f.write(data[i:i + 1000])
+    return out.getvalue()
+
+
+def check_block_compressor(compression):
+    if compression == 'xz' and PY2:
+        raise SkipTest("No lzma module")
+    rng = random.Random(0)
+    data = b''.join(
+        rng.choice([b'abc', b'def', b'xyz']) for _ in range(50000))
+    compressed = _compress(compression, data, jobs=1, block_size=10000)
+    eq_(_decompress(compression, compressed), data)
+    # the output does not depend on the number of jobs
+    eq_(_compress(compression, data, jobs=3, block_size=10000), compressed)
+    # nothing written
+    eq_(_decompress(compression, _compress(compression, b'', jobs=2)), b'')
+
+    # TAR archives are readable
+    out = BytesIO()
+    with BlockCompressor(out, compression, jobs=2, block_size=10000) as f, \
+            tarfile.open(fileobj=f, mode='w|') as tf:
+        ti = tarfile.TarInfo('data')
+        ti.size = len(data)
+        tf.addfile(ti, BytesIO(data))
+    out.seek(0)
+    with tarfile.open(fileobj=out, mode='r:' + compression) as tf:
+        eq_(tf.extractfile('data').read(), data)
+
+
+def test_block_compressor():
+    for compression in ('gz', 'bz2', 'xz'):
+        yield check_block_compressor, compression
+    assert_raises(ValueError, BlockCompressor, BytesIO(), 'zip')
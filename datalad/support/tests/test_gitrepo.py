@@ -20,6 +20,7 @@ import os.path as op
 
 import sys
 
+from six import PY2
 from six import text_type
 
 from datalad import get_encoding_info
@@ -55,6 +56,7 @@ from datalad.dochelpers import exc_str
 
 from datalad.support.sshconnector import get_connection_hash
 
+from datalad.support.gitrepo import BatchedCatFile
 from datalad.support.gitrepo import GitRepo
 from datalad.support.gitrepo import GitCommandError
 from datalad.support.gitrepo import NoSuchPathError
@@ -239,6 +241,42 @@ def test_GitRepo_remove(path):
     eq_(set(gr.remove('*', r=True, f=True)), {'file2', 'd2/f1', 'd2/f2'})
 
 
+@with_tree(tree={'f%d' % i: 'content%d' % i for i in range(10)})
+def test_GitRepo_pathspecs_from_stdin(path):
+    from mock import patch
+    from datalad.support.gitrepo import _can_read_pathspecs
+    gr = GitRepo(path, create=True)
+    files = sorted(os.listdir(path))
+    files.remove('.git')
+    with patch('datalad.support.gitrepo.generate_file_chunks') as chunks:
+        gr.add(files)
+        gr.commit("committing all the files", files=files)
+        eq_(set(gr.remove(files, cached=True)), set(files))
+        gr.commit("removing all the files", files=files)
+    if _can_read_pathspecs(['git', 'add']):
+        assert_false(chunks.called)
+    eq_(gr.get_indexed_files(), [])
+    # commands which cannot read from stdin still get the files chunked
+    assert_false(_can_read_pathspecs(['git', 'annex', 'add']))
+    assert_false(_can_read_pathspecs(['git', 'add', '--', 'f1']))
+    out, _ = gr._git_custom_command(files, ['git', 'ls-files', '-o'])
+    eq_(out.splitlines(), files)
+
+
+@with_tempfile(mkdir=True)
+def test_GitRepo_pathspecs_from_stdin_nonascii(path):
+    gr = GitRepo(path, create=True)
+    fname = u'caf\xe9.txt'
+    # callers on PY2 pass byte strings
+    fpath = fname.encode('utf-8') if PY2 else fname
+    with open(op.join(path, fpath), 'w') as f:
+        f.write('content')
+    with open(op.join(path, 'other.txt'), 'w') as f:
+        f.write('content')
+    gr.add([fpath, gr.pathobj / 'other.txt'])
+    eq_(set(gr.get_indexed_files()), {fname, 'other.txt'})
+
+
 @assert_cwd_unchanged
 @with_tempfile
 def test_GitRepo_commit(path):
@@ -1208,6 +1246,105 @@ def test_GitRepo_flyweight_monitoring_inode(path, store):
     check_repo_deals_with_inode_change(GitRepo, path, store)
 
 
+@with_tree(tree={'a': 'a', 'b': 'b', 'c': 'c', 'e': 'e',
+                 'd': {'x': 'x'},
+                 'sub1': {'y': 'y'},
+                 'sub2': {'y': 'y'},
+                 'sub3': {'y': 'y'},
+                 'sub4': {'y': 'y'}})
+def test_GitRepo_diffstatus_changes_only(path):
+    gr = GitRepo(path, create=True)
+    subs = ['sub1', 'sub2', 'sub3', 'sub4']
+    for s in subs:
+        sub = GitRepo(op.join(path, s), create=True)
+        sub.add('y')
+        sub.commit('sub')
+    gr.add(['a', 'b', 'c', 'd', 'e'])
+    for s in subs:
+        gr.add_submodule(s)
+    gr.commit('init')
+    # nothing changed
+    eq_(gr.diffstatus('HEAD', None, report_clean=False), {})
+    eq_(gr._diffstatus('HEAD', None, None, 'all', 'global', True, {},
+                       report_clean=False),
+        'clean')
+
+    create_tree(path, {
+        'a': 'modified', 'new': 'new', 'ud': {'u': 'u'},
+        'sub1': {'untracked': 'u'}, 'sub2': {'y': 'modified'},
+        'sub3': {'q': 'q'}})
+    unlink(op.join(path, 'b'))
+    gr.remove('c')
+    gr.add('new')
+    gr._git_custom_command(None, ['git', 'mv', 'e', 'e2'])
+    sub3 = GitRepo(op.join(path, 'sub3'))
+    sub3.add('q')
+    sub3.commit('new commit')
+    rmtree(op.join(path, 'sub4'))
+
+    for untracked in ('no', 'normal', 'all'):
+        for eval_state in ('full', 'commit'):
+            changes = gr.diffstatus(
+                'HEAD', None, untracked=untracked,
+                eval_submodule_state=eval_state, report_clean=False)
+            # identical to the non-clean part of the full report
+            eq_(changes,
+                {p: props for p, props in gr.diffstatus(
+                    'HEAD', None, untracked=untracked,
+                    eval_submodule_state=eval_state).items()
+                 if props['state'] != 'clean'})
+            assert_in(gr.pathobj / 'sub3', changes)
+            eq_(gr.pathobj / 'sub2' in changes, eval_state == 'full')
+            eq_(gr.pathobj / 'sub1' in changes,
+                eval_state == 'full' and untracked != 'no')
+    eq_(changes[gr.pathobj / 'e']['state'], 'deleted')
+    eq_(changes[gr.pathobj / 'e2']['state'], 'added')
+    # a removed subdataset is deleted, also when only commits matter
+    eq_(changes[gr.pathobj / 'sub4']['state'], 'deleted')
+    eq_(changes[gr.pathobj / 'sub4']['type'], 'dataset')
+    # path constraints
+    eq_(list(gr.diff('HEAD', None, paths=['a', 'd', 'sub1/untracked'])),
+        [gr.pathobj / 'a', gr.pathobj / 'sub1'])
+
+
+@with_tree(tree={'a': 'a', 'sub1': {'y': 'y'}, 'sub2': {'y': 'y'}})
+def test_GitRepo_is_modified(path):
+    gr = GitRepo(path, create=True)
+    # nothing committed, nothing added
+    assert_false(gr.is_modified(untracked='no'))
+    ok_(gr.is_modified())
+    subs = [GitRepo(op.join(path, s), create=True) for s in ('sub1', 'sub2')]
+    for sub in subs:
+        sub.add('y')
+        sub.commit('sub')
+        gr.add_submodule(op.basename(sub.path))
+    gr.add('a')
+    ok_(gr.is_modified(untracked='no'))
+    gr.commit('init')
+    for jobs in (1, 2):
+        assert_false(gr.is_modified(jobs=jobs))
+
+    # untracked content in a subdataset
+    create_tree(subs[1].path, {'untracked': 'u'})
+    for jobs in (1, 2):
+        ok_(gr.is_modified(jobs=jobs))
+        assert_false(gr.is_modified(untracked='no', jobs=jobs))
+        assert_false(gr.is_modified(eval_submodule_state='commit', jobs=jobs))
+    eq_(gr.status(untracked='no')[gr.pathobj / 'sub2']['state'], 'clean')
+    eq_(gr.status()[gr.pathobj / 'sub2']['state'], 'modified')
+    # a new commit in a subdataset
+    subs[1].add('untracked')
+    subs[1].commit('more')
+    ok_(gr.is_modified(untracked='no', eval_submodule_state='commit'))
+    assert_false(gr.is_modified(untracked='no', eval_submodule_state='no'))
+    gr.add('sub2')
+    gr.commit('update sub2')
+    assert_false(gr.is_modified())
+    # modified tracked content
+    create_tree(path, {'a': 'modified'})
+    ok_(gr.is_modified(untracked='no', eval_submodule_state='no'))
+
+
 @with_tree(tree={'ignore-sub.me': {'a_file.txt': 'some content'},
                  'ignore.me': 'ignored content',
                  'dontigno.re': 'other content'})
@@ -1327,6 +1464,64 @@ def test_get_hexsha_tag(path):
     eq_(gr.get_hexsha("atag"), gr.get_hexsha())
 
 
+@with_tempfile(mkdir=True)
+def test_commit_cache(path):
+    from mock import patch
+    gr = GitRepo(path, create=True)
+    eq_(gr.get_hexsha(), None)
+    gr.commit(msg="first", options=["--allow-empty"])
+    first = gr.get_hexsha()
+    ok_(first)
+    gr.commit(msg="second", options=["--allow-empty"])
+    # a new commit is noticed without any git call
+    second = gr.get_hexsha()
+    neq_(first, second)
+    eq_(gr.get_hexsha('HEAD~1'), first)
+
+    stats = gr.commit_cache.stats
+    with patch.object(gr, '_git_custom_command',
+                      side_effect=AssertionError("must not be called")):
+        eq_(gr.get_hexsha(), second)
+        eq_(gr.get_hexsha('HEAD~1'), first)
+    hits = stats['hits']
+
+    ok_(gr.is_ancestor(first, second))
+    assert_false(gr.is_ancestor(second, first))
+    ok_(gr.commit_exists(first))
+    assert_false(gr.commit_exists('0' * 40))
+    eq_(gr.get_merge_base([first, second]), first)
+    # answers about SHAs survive ref changes
+    gr.checkout('other', options=['-b'])
+    gr.commit(msg="third", options=["--allow-empty"])
+    neq_(gr.get_hexsha(), second)
+    with patch.object(gr, '_git_custom_command',
+                      side_effect=AssertionError("must not be called")):
+        ok_(gr.is_ancestor(first, second))
+        assert_false(gr.is_ancestor(second, first))
+        ok_(gr.commit_exists(first))
+        eq_(gr.get_merge_base([first, second]), first)
+    eq_(stats['hits'], hits + 4)
+    # but not the ones about refs
+    eq_(gr.get_merge_base(['master', 'other']), second)
+    gr.checkout('master')
+    gr.merge('other')
+    eq_(gr.get_merge_base(['master', 'other']), gr.get_hexsha('other'))
+    # only the refs a commitish could name are considered
+    third = gr.get_hexsha('other')
+    gr._git_custom_command('', ['git', 'branch', 'unrelated', first])
+    with patch.object(gr, '_git_custom_command',
+                      side_effect=AssertionError("must not be called")):
+        eq_(gr.get_hexsha('other'), third)
+    gr._git_custom_command('', ['git', 'update-ref', 'refs/heads/other',
+                                first])
+    eq_(gr.get_hexsha('other'), first)
+    # and packing them is noticed as well
+    gr._git_custom_command('', ['git', 'pack-refs', '--all'])
+    gr._git_custom_command('', ['git', 'update-ref', 'refs/heads/other',
+                                second])
+    eq_(gr.get_hexsha('other'), second)
+
+
 @with_tempfile(mkdir=True)
 def test_get_tags(path):
     from mock import patch
@@ -1502,3 +1697,29 @@ def test_duecredit(path):
         assert_in('Data management and distribution platform', outs)
     else:
         eq_(outs, '')
+
+
+@with_tree(tree={'file': 'content', 'big': 'x' * 100000})
+def test_BatchedCatFile(path):
+    repo = GitRepo(path, create=True)
+    repo.add(['file', 'big'])
+    repo.commit('added')
+
+    cat_file = BatchedCatFile(path)
+    sha, type_, size, content = cat_file('HEAD:file')
+    eq_((type_, size), ('blob', 7))
+    eq_(content.read(3), b'con')
+    eq_(content.read(), b'tent')
+    # content which was not read is skipped
+    eq_(cat_file('HEAD:big')[:3][1:], ('blob', 100000))
+    ok_(cat_file('HEAD:nonexistent') is None)
+    eq_(cat_file(sha)[3].read(), b'content')
+    cat_file.close()
+
+    objs = ['HEAD', 'HEAD:file', 'HEAD:nonexistent'] * 1000
+    res = list(BatchedCatFile(path, check=True).iter_objects(objs))
+    eq_([o for o, r in res], objs)
+    eq_(res[:3],
+        [('HEAD', (repo.get_hexsha(), 'commit', res[0][1][2])),
+         ('HEAD:file', (sha, 'blob', 7)),
+         ('HEAD:nonexistent', None)])
@@ -7,11 +7,18 @@
 #
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 
+import os.path as op
+
 from mock import patch
 
 from datalad.support.annexrepo import AnnexRepo
 from datalad.support.gitrepo import GitRepo
-from datalad.support.repodates import check_dates
+from datalad.support.repodates import (
+    annex_dates,
+    branch_blobs,
+    branch_blobs_in_tree,
+    check_dates,
+)
 from datalad.tests.utils import assert_equal, assert_false, \
     assert_in, assert_not_in, assert_raises, eq_, ok_, \
     set_date, with_tempfile, with_tree
@@ -93,3 +100,43 @@ def test_check_dates(path):
 
     with assert_raises(ValueError):
         check_dates(ar, refdate, which="unrecognized")
+
+
+@with_tree(tree={"uuid.log": "u1 here timestamp=1218182888.123s\n",
+                 "aaa": {"key1.log": "1218182890.5s 1 u1\n"},
+                 "bbb": {"key2.log": "1218182888s 1 u1\n1218182891s 0 u1\n",
+                         "key3.log": "1218182890.5s 1 u1\n"}})
+def test_annex_dates_without_annex(path):
+    # a git-annex branch as git-annex would make it, but without git-annex
+    repo = GitRepo(path, create=True)
+    repo.checkout("git-annex", options=["--orphan"])
+    repo.add(".")
+    repo.commit("first")
+    with open(op.join(path, "aaa", "key1.log"), "a") as f:
+        f.write("1218182892s 0 u1\n")
+    repo.add(".")
+    repo.commit("second")
+    # key1.log and key3.log start out as the same blob
+    eq_(len(list(branch_blobs(repo, "git-annex"))), 4)
+    in_tree = list(branch_blobs_in_tree(repo, "git-annex"))
+    eq_(sorted(fname for _, _, fname in in_tree),
+        ["aaa/key1.log", "bbb/key2.log", "bbb/key3.log", "uuid.log"])
+    eq_(dict((fname, content) for _, content, fname in in_tree)["uuid.log"],
+        "u1 here timestamp=1218182888.123s\n")
+
+    serial = [(hexsha, list(ts), fname)
+              for hexsha, ts, fname in annex_dates(repo)]
+    eq_(sorted(ts for _, tss, _ in serial for ts in tss),
+        [1218182888, 1218182888, 1218182890, 1218182890, 1218182891,
+         1218182892])
+    eq_([(hexsha, list(ts), fname)
+         for hexsha, ts, fname in annex_dates(repo, jobs=2)],
+        serial)
+
+    objects = check_dates(repo, 1218182890, annex="tree", jobs=2)["objects"]
+    eq_(sorted((o for o in objects.values() if o["type"] == "annex-blob"),
+               key=lambda x: x["filename"]),
+        [{"type": "annex-blob", "timestamps": [1218182892],
+          "filename": "aaa/key1.log"},
+         {"type": "annex-blob", "timestamps": [1218182891],
+          "filename": "bbb/key2.log"}])
@@ -34,6 +34,16 @@ def test_basic_setup():
     assert_in('Parameters', api.Dataset.create.__doc__)
 
 
+def test_star_import():
+    ns = {}
+    exec('from datalad.api import *', ns)
+    for name in ('Dataset', 'create', 'save', 'install'):
+        assert_in(name, ns)
+    assert_true(callable(ns['save']))
+    # helpers of the lazy API must not be exported
+    assert_false([n for n in ns if n.startswith('_') and n != '__builtins__'])
+
+
 def _test_consistent_order_of_args(intf, spec_posargs):
     f = getattr(intf, '__call__')
     args, varargs, varkw, defaults = getargspec(f)
@@ -8,11 +8,13 @@
 # ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
 
 import os
+from hashlib import md5
 from os.path import join as opj, exists
+from six import BytesIO
 
 from mock import patch
 from .utils import (
-    assert_true, assert_false, eq_,
+    assert_true, assert_false, eq_, ok_,
     with_tree, with_tempfile, swallow_outputs, on_windows,
     ok_file_has_content,
 )
@@ -20,6 +22,7 @@ from .utils import assert_equal
 
 from ..dochelpers import exc_str
 from ..support.archives import (
+    ArchiveIndex,
     ArchivesCache,
     compress_files,
     decompress_file,
@@ -183,6 +186,101 @@ def test_ExtractedArchive(path):
     if not os.environ.get('DATALAD_TESTS_TEMP_KEEP'):
         assert_false(exists(earchive.path))
 
+
+@with_tree(**tree_simplearchive)
+def test_ExtractedArchive_single_file(path):
+    archive = opj(path, fn_archive_obscure_ext)
+    extracted_sizes = []
+    earchive = ExtractedArchive(archive, on_extracted=extracted_sizes.append)
+    with patch('datalad.support.archives.decompress_file') as decompress:
+        extracted = earchive.get_extracted_file(
+            opj(fn_archive_obscure, '3.txt'))
+        # only the requested file was extracted, not the entire archive
+        assert_false(decompress.called)
+    ok_file_has_content(extracted, '3 load')
+    assert_false(exists(opj(earchive.path, fn_archive_obscure,
+                            fn_in_archive_obscure)))
+    assert_false(earchive.is_extracted)
+    eq_(extracted_sizes, [len('3 load')])
+    # an already extracted file is not extracted again
+    eq_(earchive.get_extracted_file(opj(fn_archive_obscure, '3.txt')),
+        extracted)
+    eq_(extracted_sizes, [len('3 load')])
+    inode = os.stat(extracted).st_ino
+    # the entire archive gets extracted if asked for all files
+    eq_(len(list(earchive.get_extracted_files())), 2)
+    assert_true(earchive.is_extracted)
+    # but the already extracted file, possibly in use, was kept,
+    # and only the added content is reported
+    eq_(os.stat(extracted).st_ino, inode)
+    eq_(extracted_sizes, [len('3 load'), len('2 load')])
+    assert_false([f for f in os.listdir(op.dirname(earchive.path))
+                  if f.endswith('.tmp')])
+    earchive.clean()
+    assert_false(exists(earchive.path))
+    assert_false(exists(earchive.path + ExtractedArchive.ACCESS_SUFFIX))
+
+
+@with_tree(**tree_simplearchive)
+def test_ArchivesCache_evict(path):
+    archive = opj(path, fn_archive_obscure_ext)
+    cache = ArchivesCache(size_limit=len('2 load'))
+    earchive = cache[archive]
+    earchive.get_extracted_file(opj(fn_archive_obscure, '3.txt'))
+    with patch.object(ArchivesCache, 'EVICTION_GRACE', -1):
+        cache.evict()
+        # within the limit
+        assert_true(exists(earchive.path))
+    earchive.assure_extracted()
+    # exceeding the limit, but recently accessed content is kept
+    cache.evict()
+    assert_true(exists(earchive.path))
+    with patch.object(ArchivesCache, 'EVICTION_GRACE', -1):
+        cache.evict()
+        assert_false(exists(earchive.path))
+        assert_false(exists(earchive.stamp_path))
+        # and could be extracted again
+        ok_file_has_content(
+            earchive.get_extracted_file(opj(fn_archive_obscure, '3.txt')),
+            '3 load')
+    cache.clean()
+
+
+@with_tree(**tree_simplearchive)
+def test_ArchiveIndex(path):
+    archive = opj(path, fn_archive_obscure_ext)
+    index = ArchiveIndex.from_archive(archive)
+    eq_(index.kind, 'tar')
+    eq_(index.compression, 'gz')
+    fpath = op.join(fn_archive_obscure, '3.txt')
+    eq_(sorted(index),
+        sorted([op.join(fn_archive_obscure, fn_in_archive_obscure), fpath]))
+    assert_in('./' + fpath, index)
+    eq_(index[fpath]['size'], len('3 load'))
+    eq_(index[fpath]['md5'], md5(b'3 load').hexdigest())
+    f = BytesIO()
+    index.extract(archive, fpath, f)
+    eq_(f.getvalue(), b'3 load')
+
+    # not an archive
+    ok_(ArchiveIndex.from_archive(opj(path, 'bogus')) is None)
+
+    # the index is stored by the key of an archive and reused
+    cache = ArchivesCache(path, persistent=True)
+    ok_(cache.get_index('KEY') is None)
+    earchive = cache.get_archive(archive, key='KEY')
+    with patch('datalad.support.archives.decompress_file') as decompress:
+        eq_(sorted(earchive.get_archived_files()), sorted(index))
+        ok_file_has_content(earchive.get_extracted_file(fpath), '3 load')
+        assert_false(decompress.called)
+    eq_(cache.get_index('KEY').members, index.members)
+    with patch.object(ArchiveIndex, 'from_archive') as from_archive:
+        eq_(ArchivesCache(path).get_archive(archive, key='KEY').index.members,
+            index.members)
+        assert_false(from_archive.called)
+    cache.clean(force=True)
+
+
 #@with_tree(**tree_simplearchive)
 #@with_tree(**tree_simplearchive)
 def test_ArchivesCache():
@@ -20,6 +20,9 @@ from git.exc import GitCommandError
 from mock import patch
 
 from datalad.log import LoggerHelper
+from datalad.log import OnlyProgressLog
+from datalad.log import ProgressHandler
+from datalad.log import log_progress
 from datalad.log import TraceBack
 from datalad.log import ColorFormatter
 from datalad import cfg
@@ -32,6 +35,8 @@ from datalad.tests.utils import assert_in
 from datalad.tests.utils import assert_not_in
 from datalad.tests.utils import ok_endswith
 from datalad.tests.utils import assert_re_in
+from datalad.tests.utils import eq_
+from datalad.tests.utils import patch_config
 
 # pretend we are in interactive mode so we could check if coloring is
 # disabled
@@ -154,4 +159,63 @@ def test_color_formatter():
         (assert_in if use_color else assert_not_in)(colors.RESET_SEQ, cf.format(rec))
 
 
+def test_log_progress():
+    def get_updates():
+        return [(getattr(r, 'dlm_progress_update', None),
+                 getattr(r, 'dlm_progress_increment', None))
+                for r in records]
+
+    lgr = logging.getLogger('dataladtest-progress')
+    lgr.propagate = False
+    lgr.setLevel(logging.INFO)
+    handler = ProgressHandler()
+    # record instead of showing progress bars
+    handler.emit = lambda record: records.append(record)
+    handler.addFilter(OnlyProgressLog())
+    lgr.addHandler(handler)
+    records = []
+    with patch_config({'datalad.log.progress-interval': '1000'}):
+        log_progress(lgr.info, 'p1', 'Start', total=5)
+        for i in range(5):
+            log_progress(lgr.info, 'p1', 'Item %i', i,
+                         update=1, increment=True)
+        log_progress(lgr.info, 'p1', 'Done')
+    # the first update passes, the remaining ones are aggregated and
+    # passed on before the process ends
+    eq_(get_updates(),
+        [(None, None), (1, True), (4, True), (None, None)])
+    eq_(records[2].getMessage(), 'Item 4')
+
+    # nothing is aggregated without a limit on the rate
+    records = []
+    with patch_config({'datalad.log.progress-interval': '0'}):
+        log_progress(lgr.info, 'p2', 'Start', total=2)
+        log_progress(lgr.info, 'p2', 'Item', update=1)
+        log_progress(lgr.info, 'p2', 'Item', update=2)
+        log_progress(lgr.info, 'p2', 'Done')
+    eq_(get_updates(),
+        [(None, None), (1, None), (2, None), (None, None)])
+
+    # no record is created when it would not be logged
+    records = []
+    with patch('datalad.log._log_progress') as log:
+        log_progress(lgr.debug, 'p3', 'Start', total=2)
+        log_progress(lgr.debug, 'p3', 'Item', update=1)
+        log_progress(lgr.debug, 'p3', 'Done')
+    eq_(log.call_count, 0)
+    eq_(records, [])
+
+    # updates which get logged as they are, are not aggregated
+    with swallow_logs(new_level=logging.INFO, name='dataladtest-progress') \
+            as cml, \
+            patch_config({'datalad.log.progress-interval': '1000'}):
+        log_progress(lgr.info, 'p4', 'Start', total=2)
+        log_progress(lgr.info, 'p4', 'Item 1', update=1, increment=True)
+        log_progress(lgr.info, 'p4', 'Item 2', update=1, increment=True)
+        log_progress(lgr.info, 'p4', 'Done')
+        assert_in('Item 1', cml.out)
+        assert_in('Item 2', cml.out)
+    lgr.removeHandler(handler)
+
+
 # TODO: somehow test is stdout/stderr get their stuff
@@ -52,6 +52,7 @@ from ..utils import _path_
 from ..utils import get_timestamp_suffix
 from ..utils import get_trace
 from ..utils import get_dataset_root
+from ..utils import _get_dataset_root_abs
 from ..utils import better_wraps
 from ..utils import path_startswith
 from ..utils import path_is_subpath
@@ -69,6 +70,7 @@ from ..utils import never_fail
 from ..utils import Path
 
 from ..support.annexrepo import AnnexRepo
+from ..support.gitrepo import GitRepo
 
 from nose.tools import (
     assert_equal,
@@ -829,6 +831,34 @@ def test_get_dataset_root(path):
         eq_(get_dataset_root(fname), os.curdir)
 
 
+@with_tempfile(mkdir=True)
+def test_get_dataset_root_cache(path):
+    subdir = opj(path, 'sub', 'deep')
+    os.makedirs(subdir)
+    cache = {}
+    eq_(_get_dataset_root_abs(subdir, cache=cache), None)
+    # no dataset is known for any visited directory
+    eq_(cache.get(subdir, 'missing'), None)
+    eq_(cache.get(path, 'missing'), None)
+    # without a cache, a new repository is found right away
+    GitRepo(opj(path, 'sub'), create=True)
+    eq_(get_dataset_root(subdir), opj(path, 'sub'))
+    eq_(get_dataset_root(opj(subdir, 'file')), opj(path, 'sub'))
+    # relative paths are reported as relative paths
+    with chpwd(subdir):
+        eq_(get_dataset_root(os.curdir), opj(os.pardir))
+        eq_(get_dataset_root('some'), opj(os.pardir))
+    # lookups sharing a cache reuse the directories visited before
+    cache = {}
+    eq_(_get_dataset_root_abs(subdir, cache=cache), opj(path, 'sub'))
+    eq_(cache[subdir], opj(path, 'sub'))
+    with patch('datalad.utils.exists', side_effect=AssertionError):
+        eq_(_get_dataset_root_abs(subdir, cache=cache), opj(path, 'sub'))
+    # removed datasets are no longer reported
+    shutil.rmtree(opj(path, 'sub', '.git'))
+    eq_(get_dataset_root(subdir), None)
+
+
 def test_path_startswith():
     ok_(path_startswith('/a/b', '/a'))
     ok_(path_startswith('/a/b', '/a/b'))
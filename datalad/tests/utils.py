@@ -25,6 +25,7 @@ import socket
 import warnings
 from six import PY2, text_type, iteritems
 from six import binary_type
+from six import BytesIO
 from six import string_types
 from fnmatch import fnmatch
 import time
@@ -453,6 +454,38 @@ class SilentHTTPHandler(SimpleHTTPRequestHandler):
             return
         lgr.debug("HTTP: " + format % args)
 
+    def end_headers(self):
+        self.send_header('Accept-Ranges', 'bytes')
+        SimpleHTTPRequestHandler.end_headers(self)
+
+    def send_head(self):
+        """Serve a single byte range of a file if requested"""
+        path = self.translate_path(self.path)
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if not match or not os.path.isfile(path):
+            return SimpleHTTPRequestHandler.send_head(self)
+        with open(path, 'rb') as f:
+            fs = os.fstat(f.fileno())
+            last_modified = self.date_time_string(fs.st_mtime)
+            if self.headers.get('If-Range', last_modified) != last_modified:
+                # content has changed, full content must be sent
+                return SimpleHTTPRequestHandler.send_head(self)
+            start = int(match.group(1))
+            end = min(int(match.group(2) or fs.st_size - 1), fs.st_size - 1)
+            if start > end:
+                self.send_error(416)
+                return None
+            f.seek(start)
+            content = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-type', self.guess_type(path))
+        self.send_header(
+            'Content-Range', 'bytes %d-%d/%d' % (start, end, fs.st_size))
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        return BytesIO(content)
+
 
 def _multiproc_serve_path_via_http(hostname, path_to_serve_from, queue): # pragma: no cover
     chpwd(path_to_serve_from)
@@ -799,8 +832,12 @@ with_testrepos.__test__ = False
 @optional_args
 def with_fake_cookies_db(func, cookies={}):
     """mock original cookies db with a fake one for the duration of the test
+
+    Shared HTTP sessions (which might carry cookies) are discarded before
+    and after the test.
     """
     from ..support.cookies import cookies_db
+    from ..downloaders.http import http_sessions
 
     @wraps(func)
     @attr('with_fake_cookies_db')
@@ -808,9 +845,11 @@ def with_fake_cookies_db(func, cookies={}):
         try:
             orig_cookies_db = cookies_db._cookies_db
             cookies_db._cookies_db = cookies.copy()
+            http_sessions.clear()
             return func(*args, **kwargs)
         finally:
             cookies_db._cookies_db = orig_cookies_db
+            http_sessions.clear()
     return newfunc
 
 
@@ -1766,6 +1766,55 @@ def get_trace(edges, start, end, trace=None):
     return None
 
 
+def _get_dataset_root_abs(apath, cache=None):
+    """Return the absolute root path of the dataset containing directory `apath`
+
+    Parameters
+    ----------
+    apath : str
+    cache : dict, optional
+      Maps any directory visited while walking up the tree to the root of
+      its dataset (or None), such that subsequent lookups for paths sharing
+      parent directories do not `stat()` the same directories again. It must
+      only be shared across lookups that are not expected to see datasets
+      being created or removed (e.g. for a batch of paths).
+    """
+    visited = []
+    root = None
+    # while we can still go up
+    while psplit(apath)[1]:
+        if cache is not None and apath in cache:
+            root = cache[apath]
+            break
+        visited.append(apath)
+        if exists(opj(apath, '.git')):
+            root = apath
+            break
+        # no luck, next round
+        apath = dirname(apath)
+    if cache is not None:
+        for d in visited:
+            cache[d] = root
+    return root
+
+
+def _get_containing_dataset_root(path, cache=None):
+    """Helper to return the root of the dataset containing directory `path`
+
+    The root path is returned in the same absolute or relative form
+    as the input argument, or None. See `_get_dataset_root_abs()` for
+    `cache`.
+    """
+    apath = abspath(path)
+    root = _get_dataset_root_abs(apath, cache=cache)
+    if root is None:
+        return None
+    # report in the format we got it
+    for _ in range(apath.count(sep) - root.count(sep)):
+        path = normpath(opj(path, os.pardir))
+    return path
+
+
 def get_dataset_root(path):
     """Return the root of an existent dataset containing a given path
 
@@ -1773,19 +1822,9 @@ def get_dataset_root(path):
     as the input argument. If no associated dataset exists, or the
     input path doesn't exist, None is returned.
     """
-    suffix = '.git'
     if not isdir(path):
         path = dirname(path)
-    apath = abspath(path)
-    # while we can still go up
-    while psplit(apath)[1]:
-        if exists(opj(path, suffix)):
-            return path
-        # new test path in the format we got it
-        path = normpath(opj(path, os.pardir))
-        # no luck, next round
-        apath = abspath(path)
-    return None
+    return _get_containing_dataset_root(path)
 
 
 def get_dataset_pwds(dataset):